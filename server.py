@@ -5,21 +5,55 @@ import json
 import subprocess
 import os
 import re
+import shlex
+import shutil
 import asyncio
 import time
-import hashlib
 import threading
 import pty
 import signal
-from dataclasses import dataclass, field
-from typing import Any, Callable, Optional
+import uuid
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache, partial
+from typing import Any, Awaitable, Callable, Optional, Union
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+# Compact JSON for tool responses; orjson when available, stdlib otherwise.
+# Set ZELLIJ_MCP_PRETTY=1 to get indented output when debugging.
+if os.environ.get("ZELLIJ_MCP_PRETTY"):
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
+else:
+    try:
+        import orjson
+
+        def _dumps(obj: Any) -> str:
+            try:
+                return orjson.dumps(obj).decode()
+            except TypeError:
+                # orjson is stricter than json (non-str keys, huge ints)
+                return json.dumps(obj, separators=(",", ":"))
+    except ImportError:
+        def _dumps(obj: Any) -> str:
+            return json.dumps(obj, separators=(",", ":"))
+
 server = Server("zellij-mcp")
 
+# The session/pane this server was launched from never changes at runtime
+_CURRENT_SESSION = os.environ.get("ZELLIJ_SESSION_NAME")
+_CURRENT_PANE_ID = os.environ.get("ZELLIJ_PANE_ID", "unknown")
+
+# Resolve the zellij binary once instead of searching PATH on every exec
+_ZELLIJ_BIN = shutil.which("zellij") or "zellij"
+
+# Bound once so the cache hit paths skip the time-module attribute lookup
+_monotonic = time.monotonic
+
 # Tools to HIDE from tools/list (still callable, just not listed)
 # Goal: Expose only ~15 essential tools to save context tokens
 HIDDEN_TOOLS = {
@@ -52,9 +86,9 @@ HIDDEN_TOOLS = {
     # Waiting (advanced)
     "wait_for_idle", "wait_for_output",
     # Misc (advanced)
-    "pipe", "send_keys", "write_chars", "search_pane", "tail_pane",
+    "pipe", "send_keys", "write_chars", "write_lines", "focus_then_write", "search_pane", "tail_pane",
     "list_clients", "edit_file", "launch_plugin", "query_tab_names",
-    "session_attach", "session_map",
+    "session_attach", "session_map", "batch_actions",
 }
 
 
@@ -70,76 +104,55 @@ AGENT_SESSION = "zellij-agent"  # DEPRECATED: Kept for backwards compatibility
 DEFAULT_WORKSPACE_TAB = "agent-work"  # Default tab for autonomous operations
 
 
+# Short-lived memo of `zellij list-sessions` so bursts of checks share one fork
+_SESSIONS_TTL = 0.5
+_sessions_cache: Optional[tuple[float, list[str]]] = None
+_SESSION_NAME_RE = re.compile(rb"^[ \t]*(\S+)", re.M)
+
+
+def _invalidate_sessions_cache():
+    """Forget the memoized session list after sessions are created or renamed."""
+    global _sessions_cache
+    _sessions_cache = None
+
+
 def get_active_sessions() -> list[str]:
     """Get list of active zellij session names."""
+    global _sessions_cache
+    now = _monotonic()
+    cached = _sessions_cache
+    if cached is not None and now - cached[0] < _SESSIONS_TTL:
+        return list(cached[1])
     try:
         result = subprocess.run(
-            ["zellij", "list-sessions", "-n"],
-            capture_output=True, text=True, timeout=5
+            [_ZELLIJ_BIN, "list-sessions", "-n"],
+            capture_output=True, timeout=5
         )
         if result.returncode == 0:
-            # Parse session name (first word before space/bracket)
-            sessions = []
-            for line in result.stdout.strip().split('\n'):
-                if line.strip():
-                    # Extract just the session name (first token)
-                    name = line.strip().split()[0] if line.strip() else ""
-                    if name:
-                        sessions.append(name)
-            return sessions
+            # Session name is the first token of each non-empty line
+            sessions = [m.decode(errors="replace") for m in _SESSION_NAME_RE.findall(result.stdout)]
+            _sessions_cache = (now, sessions)
+            return list(sessions)
     except Exception:
         pass
     return []
 
 
-_agent_session_lock = threading.Lock()
-
-# Per-session locks for focus operations to prevent race conditions
-_focus_locks: dict[str, threading.Lock] = {}
-_focus_locks_lock = threading.Lock()
+# Per-session locks for focus operations to prevent race conditions.
+# asyncio locks: the critical section awaits subprocesses, and a thread lock
+# held across an await would block the event loop for every other caller.
+# Weak values: a lock nobody holds or waits on can be dropped, so sessions
+# that come and go don't accumulate entries.
+_focus_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
 
 
-def get_focus_lock(session: str = None) -> threading.Lock:
+def get_focus_lock(session: str = None) -> asyncio.Lock:
     """Get or create a lock for focus operations on a session."""
-    key = session or os.environ.get("ZELLIJ_SESSION_NAME", "_default")
-    with _focus_locks_lock:
-        if key not in _focus_locks:
-            _focus_locks[key] = threading.Lock()
-        return _focus_locks[key]
-
-
-def ensure_agent_session() -> bool:
-    """Ensure the agent session exists, create if needed. Thread-safe."""
-    with _agent_session_lock:
-        sessions = get_active_sessions()
-        if AGENT_SESSION in sessions:
-            return True
-
-        # Create the agent session in detached mode
-        try:
-            result = subprocess.run(
-                ["zellij", "-s", AGENT_SESSION, "options", "--detached"],
-                capture_output=True, text=True, timeout=10
-            )
-            # Also try attach --create which works better
-            if result.returncode != 0:
-                subprocess.Popen(
-                    ["zellij", "attach", "--create", AGENT_SESSION],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    start_new_session=True
-                )
-                time.sleep(1)  # Give it time to start
-            # Re-check after creation
-            return AGENT_SESSION in get_active_sessions()
-        except Exception:
-            return False
-
-
-def get_agent_session() -> str:
-    """Get the agent session name, ensuring it exists."""
-    ensure_agent_session()
-    return AGENT_SESSION
+    key = session or _CURRENT_SESSION or "_default"
+    lock = _focus_locks.get(key)
+    if lock is None:
+        lock = _focus_locks[key] = asyncio.Lock()
+    return lock
 
 
 # =============================================================================
@@ -171,13 +184,13 @@ def is_plugin_available() -> bool:
     return _plugin_available
 
 
-def plugin_command(cmd: str, payload: dict = None, timeout: float = 5.0, session: str = None) -> dict:
+async def plugin_command(cmd: str, payload: dict = None, timeout: float = 5.0, session: str = None) -> dict:
     """Execute a command via the pane-bridge plugin.
 
     Returns dict with success/error/data fields.
 
     Note: zellij pipe outputs data but doesn't exit on its own. We use the
-    shell `timeout` command to force termination after getting the output.
+    `timeout` command to force termination after getting the output.
 
     Args:
         cmd: Plugin command name
@@ -192,25 +205,27 @@ def plugin_command(cmd: str, payload: dict = None, timeout: float = 5.0, session
     payload_json = json.dumps(payload) if payload else "{}"
 
     try:
-        # Escape single quotes in payload for shell safety
-        escaped_payload = payload_json.replace("'", "'\"'\"'")
-
         # Add session targeting if specified
-        session_flag = f"-s '{session}'" if session else ""
+        session_args = ["-s", session] if session else []
 
         # IMPORTANT: zellij pipe expects payload as positional arg after --, NOT via stdin
         # The stdin pipe method only works for streaming mode, not one-shot commands
-        shell_cmd = f"timeout {int(timeout)} zellij {session_flag} pipe -p '{plugin_url}' -n {cmd} -- '{escaped_payload}'"
-
-        result = subprocess.run(
-            ["bash", "-c", shell_cmd],
-            capture_output=True,
-            text=True,
-            timeout=timeout + 2  # Extra buffer for Python timeout
+        proc = await asyncio.create_subprocess_exec(
+            "timeout", str(int(timeout)), _ZELLIJ_BIN, *session_args,
+            "pipe", "-p", plugin_url, "-n", cmd, "--", payload_json,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
+        try:
+            # Extra buffer on top of the `timeout` kill
+            out, err = await asyncio.wait_for(proc.communicate(), timeout=timeout + 2)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
 
         # returncode 124 means timeout killed it (expected), but we got output
-        stdout = result.stdout.strip()
+        stdout = out.decode(errors="replace").strip()
         if stdout:
             try:
                 return json.loads(stdout)
@@ -218,37 +233,37 @@ def plugin_command(cmd: str, payload: dict = None, timeout: float = 5.0, session
                 return {"success": True, "raw": stdout}
 
         # No output - check if there was an error
-        if result.stderr:
-            return {"success": False, "error": result.stderr.strip()}
+        if err:
+            return {"success": False, "error": err.decode(errors="replace").strip()}
 
         return {"success": False, "error": "No output from plugin"}
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         return {"success": False, "error": "Plugin command timed out"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
-def plugin_write_to_pane(pane_id: int, chars: str, session: str = None) -> dict:
+async def plugin_write_to_pane(pane_id: int, chars: str, session: str = None) -> dict:
     """Write characters to a pane by ID without focus stealing."""
-    return plugin_command("write", {"pane_id": pane_id, "chars": chars}, session=session)
+    return await plugin_command("write", {"pane_id": pane_id, "chars": chars}, session=session)
 
 
-def plugin_list_panes(session: str = None) -> dict:
+async def plugin_list_panes(session: str = None) -> dict:
     """Get list of all panes via plugin."""
-    return plugin_command("list", session=session)
+    return await plugin_command("list", session=session)
 
 
-def plugin_get_protected(session: str = None) -> dict:
+async def plugin_get_protected(session: str = None) -> dict:
     """Get the protected (Claude) pane ID."""
-    return plugin_command("get_protected", session=session)
+    return await plugin_command("get_protected", session=session)
 
 
-def plugin_find_pane_id(name: str, session: str = None) -> Optional[int]:
+async def plugin_find_pane_id(name: str, session: str = None) -> Optional[int]:
     """Find a pane ID by name/title/command using the plugin.
 
     Returns the pane ID if found, None otherwise.
     """
-    result = plugin_list_panes(session=session)
+    result = await plugin_list_panes(session=session)
     if not result.get("success") or not result.get("data"):
         return None
 
@@ -269,12 +284,10 @@ def plugin_find_pane_id(name: str, session: str = None) -> Optional[int]:
 # The daemon runs INSIDE a Zellij session and can use dump-screen reliably.
 # It listens on a Unix socket for commands from the MCP server.
 
-import socket as socket_module
-
 
 def get_daemon_socket_path(session: str = None) -> str:
     """Get the daemon socket path for a session."""
-    session_name = session or os.environ.get("ZELLIJ_SESSION_NAME", "default")
+    session_name = session or _CURRENT_SESSION or "default"
     return f"/tmp/zellij-daemon-{session_name}.sock"
 
 
@@ -284,33 +297,37 @@ def is_daemon_running(session: str = None) -> bool:
     return os.path.exists(socket_path)
 
 
-def daemon_request(request: dict, session: str = None, timeout: float = 10.0) -> dict:
+async def daemon_request(request: dict, session: str = None, timeout: float = 10.0) -> dict:
     """Send a request to the daemon and return the response."""
     socket_path = get_daemon_socket_path(session)
     if not os.path.exists(socket_path):
         return {"success": False, "error": "Daemon not running"}
 
-    sock = socket_module.socket(socket_module.AF_UNIX, socket_module.SOCK_STREAM)
+    async def exchange() -> dict:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        try:
+            writer.write(json.dumps(request).encode('utf-8'))
+            await writer.drain()
+            # The daemon closes the connection after its reply, so read to EOF
+            # (large --full dumps don't fit in one recv)
+            return json.loads((await reader.read()).decode('utf-8'))
+        finally:
+            writer.close()
+
     try:
-        sock.settimeout(timeout)
-        sock.connect(socket_path)
-        sock.send(json.dumps(request).encode('utf-8'))
-        response = sock.recv(65536).decode('utf-8')
-        return json.loads(response)
-    except socket_module.timeout:
+        return await asyncio.wait_for(exchange(), timeout=timeout)
+    except asyncio.TimeoutError:
         return {"success": False, "error": "Daemon request timed out"}
     except ConnectionRefusedError:
         return {"success": False, "error": "Daemon connection refused"}
     except Exception as e:
         return {"success": False, "error": str(e)}
-    finally:
-        sock.close()
 
 
-def daemon_read_pane(pane_id: int, full: bool = False, tail: int = None,
+async def daemon_read_pane(pane_id: int, full: bool = False, tail: int = None,
                      session: str = None) -> dict:
     """Read pane content via the daemon (focus-free)."""
-    return daemon_request({
+    return await daemon_request({
         "cmd": "read",
         "pane_id": pane_id,
         "full": full,
@@ -318,34 +335,34 @@ def daemon_read_pane(pane_id: int, full: bool = False, tail: int = None,
     }, session=session)
 
 
-def daemon_write_pane(pane_id: int, chars: str, session: str = None) -> dict:
+async def daemon_write_pane(pane_id: int, chars: str, session: str = None) -> dict:
     """Write to a pane via the daemon."""
-    return daemon_request({
+    return await daemon_request({
         "cmd": "write",
         "pane_id": pane_id,
         "chars": chars
     }, session=session)
 
 
-def daemon_list_panes(session: str = None) -> dict:
+async def daemon_list_panes(session: str = None) -> dict:
     """List panes via the daemon."""
-    return daemon_request({"cmd": "list"}, session=session)
+    return await daemon_request({"cmd": "list"}, session=session)
 
 
-def daemon_status(session: str = None) -> dict:
+async def daemon_status(session: str = None) -> dict:
     """Get daemon status."""
-    return daemon_request({"cmd": "status"}, session=session)
+    return await daemon_request({"cmd": "status"}, session=session)
 
 
 _daemon_start_attempted: dict[str, bool] = {}  # Track per-session to avoid repeated attempts
 
 
-def start_daemon(session: str = None) -> dict:
+async def start_daemon(session: str = None) -> dict:
     """Start the daemon in a hidden pane within the session.
 
     The daemon must run INSIDE the Zellij session for dump-screen to work.
     """
-    session_name = session or os.environ.get("ZELLIJ_SESSION_NAME")
+    session_name = session or _CURRENT_SESSION
     if not session_name:
         return {"success": False, "error": "No session specified"}
 
@@ -364,23 +381,23 @@ def start_daemon(session: str = None) -> dict:
     # Use a floating pane that we immediately minimize
     args = ["action", "new-pane", "--floating", "--name", "zellij-daemon",
             "--", "python3", daemon_script, "--socket", socket_path]
-    result = run_zellij(*args, session=session)
+    result = await run_zellij(*args, session=session)
 
     if not result.get("success"):
         return result
 
     # Wait for daemon to start
     for _ in range(10):
-        time.sleep(0.3)
+        await asyncio.sleep(0.3)
         if is_daemon_running(session):
             # Hide the daemon pane by toggling floating
-            zellij_action("toggle-floating-panes", session=session)
+            await zellij_action("toggle-floating-panes", session=session)
             return {"success": True, "message": "Daemon started", "socket": socket_path}
 
     return {"success": False, "error": "Daemon failed to start within timeout"}
 
 
-def ensure_daemon(session: str = None) -> bool:
+async def ensure_daemon(session: str = None) -> bool:
     """Ensure daemon is running, auto-start if needed. Returns True if available."""
     session_key = _resolve_session_key(session)
 
@@ -394,7 +411,7 @@ def ensure_daemon(session: str = None) -> bool:
 
     # Try to start
     _daemon_start_attempted[session_key] = True
-    result = start_daemon(session)
+    result = await start_daemon(session)
     return result.get("success", False)
 
 
@@ -409,6 +426,8 @@ class SessionAttachment:
     pid: int
     master_fd: int
     created_at: float = field(default_factory=time.time)
+    # Held so the asyncio transport isn't collected, which would kill the client
+    proc: Optional[asyncio.subprocess.Process] = field(default=None, repr=False, compare=False)
 
 
 class SessionManager:
@@ -421,11 +440,12 @@ class SessionManager:
 
     def __init__(self):
         self._lock = threading.Lock()
+        self._attach_lock = asyncio.Lock()  # One attach in flight at a time
         self._attachments: dict[str, SessionAttachment] = {}
 
     def _is_current_session(self, session: str) -> bool:
         """Check if session is the current attached session."""
-        current = os.environ.get("ZELLIJ_SESSION_NAME")
+        current = _CURRENT_SESSION
         return session == current or (not session and current)
 
     def _is_attachment_alive(self, attachment: SessionAttachment) -> bool:
@@ -436,69 +456,70 @@ class SessionManager:
         except OSError:
             return False
 
-    def headless_attach(self, session: str) -> dict:
+    async def headless_attach(self, session: str) -> dict:
         """Create a headless pty attachment to a Zellij session.
 
-        This creates a pseudo-terminal and forks a process that runs
-        'zellij attach <session>', making Zellij think a client is connected.
+        This creates a pseudo-terminal and spawns 'zellij attach <session>' on
+        it, making Zellij think a client is connected. The client is started
+        through asyncio rather than os.fork(), which is unsafe once the server
+        has threads.
         """
-        with self._lock:
-            # Already attached?
-            if session in self._attachments:
-                att = self._attachments[session]
-                if self._is_attachment_alive(att):
-                    return {"success": True, "message": "Already attached", "pid": att.pid}
-                else:
-                    # Clean up dead attachment
-                    self._cleanup_attachment(att)
-                    del self._attachments[session]
+        async with self._attach_lock:
+            with self._lock:
+                # Already attached?
+                if session in self._attachments:
+                    att = self._attachments[session]
+                    if self._is_attachment_alive(att):
+                        return {"success": True, "message": "Already attached", "pid": att.pid}
+                    else:
+                        # Clean up dead attachment
+                        self._cleanup_attachment(att)
+                        del self._attachments[session]
 
             # Check if session exists
-            active = get_active_sessions()
+            active = await asyncio.to_thread(get_active_sessions)
             if session not in active:
                 return {"success": False, "error": f"Session '{session}' not found"}
 
+            master_fd = None
             try:
-                # Create pseudo-terminal
+                # Create pseudo-terminal; the client gets the slave end as its
+                # stdio in a new session, detached from ours
                 master_fd, slave_fd = pty.openpty()
-
-                pid = os.fork()
-                if pid == 0:
-                    # Child process - becomes the headless Zellij client
-                    try:
-                        os.setsid()  # New session, detach from parent
-                        os.dup2(slave_fd, 0)  # stdin
-                        os.dup2(slave_fd, 1)  # stdout
-                        os.dup2(slave_fd, 2)  # stderr
-                        os.close(master_fd)
-                        os.close(slave_fd)
-                        os.execvp("zellij", ["zellij", "attach", session])
-                    except Exception:
-                        os._exit(1)
-                else:
-                    # Parent process
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        _ZELLIJ_BIN, "attach", session,
+                        stdin=slave_fd, stdout=slave_fd, stderr=slave_fd,
+                        start_new_session=True,
+                    )
+                finally:
                     os.close(slave_fd)
 
-                    # Wait briefly for attachment to establish
-                    time.sleep(0.5)
+                # Wait briefly for attachment to establish
+                await asyncio.sleep(0.5)
 
-                    # Verify it's still running
-                    try:
-                        os.kill(pid, 0)
-                    except OSError:
-                        os.close(master_fd)
-                        return {"success": False, "error": "Attachment process died immediately"}
+                # Verify it's still running
+                if proc.returncode is not None:
+                    os.close(master_fd)
+                    return {"success": False, "error": "Attachment process died immediately"}
 
-                    attachment = SessionAttachment(
-                        session=session,
-                        pid=pid,
-                        master_fd=master_fd
-                    )
+                attachment = SessionAttachment(
+                    session=session,
+                    pid=proc.pid,
+                    master_fd=master_fd,
+                    proc=proc,
+                )
+                with self._lock:
                     self._attachments[session] = attachment
 
-                    return {"success": True, "pid": pid, "session": session}
+                return {"success": True, "pid": proc.pid, "session": session}
 
             except Exception as e:
+                if master_fd is not None:
+                    try:
+                        os.close(master_fd)
+                    except OSError:
+                        pass
                 return {"success": False, "error": str(e)}
 
     def detach(self, session: str) -> dict:
@@ -530,26 +551,25 @@ class SessionManager:
         except OSError:
             pass
 
-    def ensure_session_ready(self, session: str) -> bool:
+    def is_ready(self, session: str) -> bool:
+        """True if session needs no new attachment: current, or already attached."""
+        if not session or self._is_current_session(session):
+            return True
+        with self._lock:
+            att = self._attachments.get(session)
+            return att is not None and self._is_attachment_alive(att)
+
+    async def ensure_session_ready(self, session: str) -> bool:
         """Ensure a session is ready for daemon operations.
 
         For current session: just return True (already have client).
         For other sessions: create headless attachment if needed.
         """
-        if self._is_current_session(session):
+        if self.is_ready(session):
             return True
 
-        if not session:
-            return True  # Will use current session
-
-        # Check if already attached
-        with self._lock:
-            if session in self._attachments:
-                if self._is_attachment_alive(self._attachments[session]):
-                    return True
-
         # Need to attach
-        result = self.headless_attach(session)
+        result = await self.headless_attach(session)
         return result.get("success", False)
 
     def list_attachments(self) -> list[dict]:
@@ -586,63 +606,99 @@ class SessionManager:
 session_manager = SessionManager()
 
 
-def ensure_session_daemon(session: str = None) -> bool:
+async def ensure_session_daemon(session: str = None) -> bool:
     """Ensure both session attachment and daemon are ready.
 
     This is the main entry point for cross-session operations.
     """
     # First ensure we can talk to the session (pty attachment for remote sessions)
-    if not session_manager.ensure_session_ready(session):
+    if not await session_manager.ensure_session_ready(session):
         return False
 
     # Then ensure daemon is running in that session
-    return ensure_daemon(session)
+    return await ensure_daemon(session)
 
 
 # =============================================================================
 # UTILITIES
 # =============================================================================
 
+# One pass over the text: CSI sequences (colors, cursor movement, etc.),
+# OSC sequences (title, hyperlinks, etc.) and other escape sequences, plus
+# CSI in its single-character 8-bit form (U+009B)
+_ANSI_RE = re.compile(r'\x1b(?:\[[0-9;]*[a-zA-Z]|\].*?\x07|[PX^_].*?\x1b\\)|\x9b[0-9;]*[a-zA-Z]')
+
+# Pollers (wait_for_prompt, wait_for_idle) mostly re-read an unchanged screen,
+# so remember the last few dumps rather than re-running the substitution
+_strip_escapes = lru_cache(maxsize=4)(partial(_ANSI_RE.sub, ''))
+
+
 def strip_ansi(text: str) -> str:
     """Remove ANSI escape sequences from text for clean LLM consumption."""
-    # CSI sequences (colors, cursor movement, etc.)
-    text = re.sub(r'\x1b\[[0-9;]*[a-zA-Z]', '', text)
-    # OSC sequences (title, hyperlinks, etc.)
-    text = re.sub(r'\x1b\].*?\x07', '', text)
-    # Other escape sequences
-    text = re.sub(r'\x1b[PX^_].*?\x1b\\', '', text)
-    return text
+    # Already-clean output is common; skip the regex pass entirely
+    if '\x1b' not in text and '\x9b' not in text:
+        return text
+    return _strip_escapes(text)
+
+
+# Agents reuse the same few prompt/search patterns across calls; keep the
+# compiled objects rather than going back through re's own cache each time
+_compile_pattern = lru_cache(maxsize=256)(re.compile)
+
+
+def tail_text(text: str, n: int) -> str:
+    """Last n lines of text, found by scanning back for newlines.
+
+    Same result as '\\n'.join(text.split('\\n')[-n:]) but without splitting
+    (or copying) the rest of a long scrollback.
+    """
+    if n <= 0:
+        return text
+    pos = len(text)
+    for _ in range(n):
+        pos = text.rfind('\n', 0, pos)
+        if pos < 0:
+            return text
+    return text[pos + 1:]
 
 
 # Key name to byte sequence mapping for send_keys
-KEY_SEQUENCES: dict[str, list[int]] = {
+KEY_SEQUENCES: dict[str, bytes] = {
     # Control characters
-    "ctrl+a": [1], "ctrl+b": [2], "ctrl+c": [3], "ctrl+d": [4],
-    "ctrl+e": [5], "ctrl+f": [6], "ctrl+g": [7], "ctrl+h": [8],
-    "ctrl+i": [9], "ctrl+j": [10], "ctrl+k": [11], "ctrl+l": [12],
-    "ctrl+m": [13], "ctrl+n": [14], "ctrl+o": [15], "ctrl+p": [16],
-    "ctrl+q": [17], "ctrl+r": [18], "ctrl+s": [19], "ctrl+t": [20],
-    "ctrl+u": [21], "ctrl+v": [22], "ctrl+w": [23], "ctrl+x": [24],
-    "ctrl+y": [25], "ctrl+z": [26],
+    "ctrl+a": b"\x01", "ctrl+b": b"\x02", "ctrl+c": b"\x03", "ctrl+d": b"\x04",
+    "ctrl+e": b"\x05", "ctrl+f": b"\x06", "ctrl+g": b"\x07", "ctrl+h": b"\x08",
+    "ctrl+i": b"\x09", "ctrl+j": b"\x0a", "ctrl+k": b"\x0b", "ctrl+l": b"\x0c",
+    "ctrl+m": b"\x0d", "ctrl+n": b"\x0e", "ctrl+o": b"\x0f", "ctrl+p": b"\x10",
+    "ctrl+q": b"\x11", "ctrl+r": b"\x12", "ctrl+s": b"\x13", "ctrl+t": b"\x14",
+    "ctrl+u": b"\x15", "ctrl+v": b"\x16", "ctrl+w": b"\x17", "ctrl+x": b"\x18",
+    "ctrl+y": b"\x19", "ctrl+z": b"\x1a",
     # Special keys
-    "tab": [9], "enter": [13], "return": [13], "escape": [27], "esc": [27],
-    "backspace": [127], "delete": [27, 91, 51, 126],
-    "space": [32],
+    "tab": b"\x09", "enter": b"\x0d", "return": b"\x0d", "escape": b"\x1b", "esc": b"\x1b",
+    "backspace": b"\x7f", "delete": b"\x1b[3~",
+    "space": b" ",
     # Arrow keys
-    "up": [27, 91, 65], "down": [27, 91, 66],
-    "right": [27, 91, 67], "left": [27, 91, 68],
+    "up": b"\x1b[A", "down": b"\x1b[B",
+    "right": b"\x1b[C", "left": b"\x1b[D",
     # Navigation
-    "home": [27, 91, 72], "end": [27, 91, 70],
-    "pageup": [27, 91, 53, 126], "pagedown": [27, 91, 54, 126],
-    "insert": [27, 91, 50, 126],
+    "home": b"\x1b[H", "end": b"\x1b[F",
+    "pageup": b"\x1b[5~", "pagedown": b"\x1b[6~",
+    "insert": b"\x1b[2~",
     # Function keys
-    "f1": [27, 79, 80], "f2": [27, 79, 81], "f3": [27, 79, 82], "f4": [27, 79, 83],
-    "f5": [27, 91, 49, 53, 126], "f6": [27, 91, 49, 55, 126],
-    "f7": [27, 91, 49, 56, 126], "f8": [27, 91, 49, 57, 126],
-    "f9": [27, 91, 50, 48, 126], "f10": [27, 91, 50, 49, 126],
-    "f11": [27, 91, 50, 51, 126], "f12": [27, 91, 50, 52, 126],
+    "f1": b"\x1bOP", "f2": b"\x1bOQ", "f3": b"\x1bOR", "f4": b"\x1bOS",
+    "f5": b"\x1b[15~", "f6": b"\x1b[17~",
+    "f7": b"\x1b[18~", "f8": b"\x1b[19~",
+    "f9": b"\x1b[20~", "f10": b"\x1b[21~",
+    "f11": b"\x1b[23~", "f12": b"\x1b[24~",
 }
 
+# Decimal argv form of each sequence for `zellij action write`, built once
+KEY_WRITE_ARGS: dict[str, tuple[str, ...]] = {
+    name: tuple(map(str, seq)) for name, seq in KEY_SEQUENCES.items()
+}
+
+_GRID_DIRECTIONS = ("down", "right")
+
+
 def calculate_grid_direction(pane_count: int) -> str:
     """Calculate optimal split direction for grid layout.
 
@@ -662,23 +718,40 @@ def calculate_grid_direction(pane_count: int) -> str:
     4: [A][B]
        [C][D]
     """
-    if pane_count <= 0:
-        return "right"  # First split
-    # Alternate: odd count → right, even count → down
-    return "right" if pane_count % 2 == 1 else "down"
-
-
-# REPL prompt patterns for auto-detection
-REPL_PROMPTS: dict[str, str] = {
-    "ipython": r"In \[\d+\]:\s*$",
-    "python": r">>>\s*$",
-    "r": r">\s*$",
-    "julia": r"julia>\s*$",
-    "bash": r"[\$#]\s*$",
-    "zsh": r"[%#]\s*$",
-    "default": r"[\$#>%]\s*$",
+    # Alternate: odd count → right, even count → down; first split (<= 0) → right
+    return _GRID_DIRECTIONS[(pane_count & 1) | (pane_count <= 0)]
+
+
+# REPL prompt patterns for auto-detection, compiled once since they are
+# matched on every poll of a REPL pane
+REPL_PROMPTS: dict[str, re.Pattern] = {
+    name: re.compile(pattern)
+    for name, pattern in {
+        "ipython": r"In \[\d+\]:\s*$",
+        "python": r">>>\s*$",
+        "r": r">\s*$",
+        "julia": r"julia>\s*$",
+        "bash": r"[\$#]\s*$",
+        "zsh": r"[%#]\s*$",
+        "default": r"[\$#>%]\s*$",
+    }.items()
 }
 
+# run_in_pane's default prompt, matching its schema default
+_SHELL_PROMPT_RE = re.compile(r"[\$#>]\s*$")
+
+# All specific prompts fused into one alternation so a single scan of a pane
+# tail says which REPL is showing (earlier entries win on overlaps like '#')
+_REPL_UNION = re.compile("|".join(
+    f"(?P<{name}>{regex.pattern})" for name, regex in REPL_PROMPTS.items() if name != "default"
+))
+
+
+def detect_repl_type(text: str) -> str:
+    """Identify the REPL whose prompt ends text, or 'default' if none match."""
+    m = _REPL_UNION.search(text)
+    return m.lastgroup if m else "default"
+
 
 # =============================================================================
 # LAYOUT CACHE - Reduces redundant subprocess calls
@@ -686,54 +759,151 @@ REPL_PROMPTS: dict[str, str] = {
 
 def _resolve_session_key(session: str = None) -> str:
     """Resolve session to a stable cache key, avoiding _default bleeding."""
-    if session:
-        return session
-    # Try to get from environment if not specified
-    env_session = os.environ.get("ZELLIJ_SESSION_NAME")
-    if env_session:
-        return env_session
-    return "_default"
+    # Fall back to the session this server runs in (read once at import)
+    return session or _CURRENT_SESSION or "_default"
 
 
 class LayoutCache:
-    """Cache for dump-layout results with TTL to reduce subprocess calls."""
+    """Cache for dump-layout results with TTL to reduce subprocess calls.
+
+    Failed dump-layouts (e.g. unknown session) are remembered too, for
+    miss_ttl, so repeated queries don't re-spawn zellij just to fail again.
+    """
+
+    _SHARDS = 16  # Write-lock stripes; sessions hash onto one so they don't contend
 
-    def __init__(self, ttl: float = 0.5):
-        self._cache: dict[str, tuple[float, str]] = {}  # session -> (timestamp, layout)
+    def __init__(self, ttl: float = 0.5, maxsize: int = 128, miss_ttl: float = 1.0):
+        # session -> (timestamp, layout str, or the failed result dict for a miss),
+        # least recently used first
+        self._cache: OrderedDict[str, tuple[float, Any]] = OrderedDict()
         self._ttl = ttl
-        self._lock = threading.Lock()
+        self._miss_ttl = miss_ttl
+        self._maxsize = maxsize
+        self._locks = [threading.Lock() for _ in range(self._SHARDS)]
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) & (self._SHARDS - 1)]
 
     def get(self, session: str = None) -> Optional[str]:
         """Get cached layout if still valid."""
+        # Lock-free: get and move_to_end are atomic and entries are immutable
+        # tuples, so the worst case is a stale read that the TTL check rejects
         key = _resolve_session_key(session)
-        with self._lock:
-            if key in self._cache:
-                ts, layout = self._cache[key]
-                if time.time() - ts < self._ttl:
-                    return layout
+        cache = self._cache
+        entry = cache.get(key)
+        if entry is not None:
+            ts, layout = entry
+            if type(layout) is str and _monotonic() - ts < self._ttl:
+                try:
+                    cache.move_to_end(key)  # Keep hot sessions clear of eviction
+                except KeyError:
+                    pass  # Evicted or invalidated meanwhile
+                return layout
+        return None
+
+    def get_miss(self, session: str = None) -> Optional[dict]:
+        """Get a copy of the cached failure for a session if still valid."""
+        entry = self._cache.get(_resolve_session_key(session))
+        if entry is not None:
+            ts, failed = entry
+            if type(failed) is dict and _monotonic() - ts < self._miss_ttl:
+                return dict(failed)
         return None
 
     def set(self, layout: str, session: str = None):
         """Cache a layout result."""
-        key = _resolve_session_key(session)
-        with self._lock:
-            self._cache[key] = (time.time(), layout)
+        self._store(_resolve_session_key(session), layout)
+
+    def set_miss(self, result: dict, session: str = None):
+        """Cache a failed dump-layout result."""
+        self._store(_resolve_session_key(session), dict(result))
+
+    def _store(self, key: str, value: Any):
+        with self._lock_for(key):
+            # Writes count as use too; then evict the least recently used
+            # entries so transient sessions can't grow the cache without bound
+            cache = self._cache
+            cache[key] = (_monotonic(), value)
+            cache.move_to_end(key)
+            while len(cache) > self._maxsize:
+                try:
+                    cache.popitem(last=False)
+                except KeyError:
+                    break
 
     def invalidate(self, session: str = None):
         """Invalidate cache for a session (call after mutations)."""
         key = _resolve_session_key(session)
-        with self._lock:
+        with self._lock_for(key):
             self._cache.pop(key, None)
 
     def invalidate_all(self):
         """Invalidate all cached layouts."""
-        with self._lock:
-            self._cache.clear()
+        # Take every stripe in a fixed order so this can't deadlock with itself
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            # Swap rather than clear(): O(1) under the locks, and lock-free
+            # readers still holding the old dict finish against it safely
+            self._cache = OrderedDict()
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
 
 
 layout_cache = LayoutCache()
 
 
+class QueryCache:
+    """Short-lived cache for read-only query tools (list_sessions, list_clients,
+    query_tab_names) so polling agents don't fork zellij for every call."""
+
+    GLOBAL = "*"  # Key for queries that aren't tied to one session
+
+    def __init__(self, ttl: float = 0.25):
+        self._cache: dict[tuple[str, str], tuple[float, dict]] = {}  # (tool, session) -> (timestamp, result)
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    def get(self, tool: str, session_key: str) -> Optional[dict]:
+        """Get a copy of the cached result if still valid."""
+        with self._lock:
+            entry = self._cache.get((tool, session_key))
+        if entry is not None and _monotonic() - entry[0] < self._ttl:
+            return dict(entry[1])
+        return None
+
+    def set(self, tool: str, session_key: str, result: dict):
+        """Cache a query result."""
+        with self._lock:
+            self._cache[(tool, session_key)] = (_monotonic(), dict(result))
+
+    def invalidate(self, session: str = None):
+        """Drop results for a session, plus global ones (call after any action)."""
+        key = _resolve_session_key(session)
+        with self._lock:
+            for k in [k for k in self._cache if k[1] in (key, self.GLOBAL)]:
+                del self._cache[k]
+
+
+query_cache = QueryCache()
+
+
+async def cached_query(tool: str, session: Optional[str], fetch: Callable[[], Awaitable[dict]],
+                       scoped: bool = True) -> dict:
+    """Return a fresh-enough cached result for a read-only tool, else fetch it.
+
+    Pass scoped=False for queries that don't depend on the session.
+    """
+    key = _resolve_session_key(session) if scoped else QueryCache.GLOBAL
+    result = query_cache.get(tool, key)
+    if result is None:
+        result = await fetch()
+        if result.get("success"):
+            query_cache.set(tool, key, result)
+    return result
+
+
 # =============================================================================
 # SESSION STATE - In-memory registry for panes, SSH sessions, jobs
 # =============================================================================
@@ -752,7 +922,7 @@ class PaneInfo:
     pane_id: Optional[int] = None  # Zellij pane ID for daemon communication
 
 
-@dataclass
+@dataclass(frozen=True)
 class SSHSession:
     """Registered SSH session."""
     name: str
@@ -761,7 +931,7 @@ class SSHSession:
     connected_at: float = field(default_factory=time.time)
 
 
-@dataclass
+@dataclass(frozen=True)
 class TrackedJob:
     """Tracked HPC job."""
     job_id: str
@@ -821,14 +991,57 @@ class SessionState:
 
     def get_pane(self, name: str) -> Optional[PaneInfo]:
         """Get registered pane info. Thread-safe."""
-        with self._lock:
-            return self.panes.get(name)
+        # A single dict.get is atomic; only multi-step updates take the lock
+        return self.panes.get(name)
 
 
 # Global state instance
 state = SessionState()
 
 
+# Tab lines are rare, so they keep a regex; everything else in a layout line
+# is a fixed keyword and is picked out with str.find by the helpers below
+_TAB_LINE_RE = re.compile(r'tab\s+name="([^"]+)".*?(focus=true)?')
+
+
+def _is_pane_line(stripped: str) -> bool:
+    """True if a stripped KDL line opens a pane node (`pane`, not `pane_template`)."""
+    if not stripped.startswith('pane'):
+        return False
+    if len(stripped) == 4:
+        return True
+    c = stripped[4]
+    return not (c.isalnum() or c == '_')
+
+
+def _kdl_attr(line: str, prefix: str) -> Optional[str]:
+    """Value of the first non-empty `key="value"` in line, given prefix 'key="'."""
+    start = line.find(prefix)
+    while start != -1:
+        start += len(prefix)
+        end = line.find('"', start)
+        if end == -1:
+            return None
+        if end > start:
+            return line[start:end]
+        start = line.find(prefix, end)
+    return None
+
+
+def _kdl_args(stripped: str) -> Optional[str]:
+    """Raw argument string following an `args` keyword, or None."""
+    i = stripped.find('args')
+    n = len(stripped)
+    while i != -1:
+        j = k = i + 4
+        while k < n and stripped[k].isspace():
+            k += 1
+        if j < k < n:
+            return stripped[k:]
+        i = stripped.find('args', i + 1)
+    return None
+
+
 def parse_layout_panes(layout_text: str) -> list[dict]:
     """Parse KDL layout to extract pane info with enhanced metadata."""
     panes = []
@@ -841,7 +1054,7 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
     pane_brace_depth = 0  # Track brace depth within pane block
     swap_layout_depth = 0  # Track depth inside swap_* template sections
 
-    for line in layout_text.split('\n'):
+    for line in layout_text.splitlines():
         stripped = line.strip()
 
         # Skip swap_tiled_layout and swap_floating_layout sections (templates, not real panes)
@@ -870,7 +1083,7 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
             continue
         if floating_depth > 0 and current_pane is None:
             # Check if this is a pane start within floating_panes
-            if re.match(r'\s*pane\b', stripped):
+            if _is_pane_line(stripped):
                 pass  # Let it fall through to pane handling
             else:
                 floating_depth += stripped.count('{')
@@ -882,7 +1095,7 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
         in_floating = floating_depth > 0
 
         # Match tab lines
-        tab_match = re.search(r'tab\s+name="([^"]+)".*?(focus=true)?', line)
+        tab_match = _TAB_LINE_RE.search(line) if 'tab' in line else None
         if tab_match and current_pane is None:
             current_tab = tab_match.group(1)
             current_tab_index += 1
@@ -896,16 +1109,14 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
             pane_brace_depth -= stripped.count('}')
 
             # Extract args from inside pane block
-            args_match = re.search(r'args\s+(.+)', stripped)
-            if args_match:
-                # Parse the args string - format: "arg1" "arg2" "arg3"
-                args_str = args_match.group(1)
+            args_str = _kdl_args(stripped)
+            if args_str is not None:
+                # Keep the raw args string - format: "arg1" "arg2" "arg3"
                 current_pane["args"] = args_str
 
             # Check for nested pane declarations (e.g., inside split_direction blocks)
             # These are real panes that need to be captured
-            nested_pane_match = re.match(r'\s*pane\b', stripped)
-            if nested_pane_match and 'borderless=true' not in stripped:
+            if _is_pane_line(stripped) and 'borderless=true' not in stripped:
                 # This is a nested pane - create a new pane_info for it
                 nested_info = {
                     "tab": current_tab,
@@ -917,19 +1128,19 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
                 pane_index_in_tab += 1
 
                 # Extract command from nested pane
-                cmd_match = re.search(r'command="([^"]+)"', stripped)
-                if cmd_match:
-                    nested_info["command"] = cmd_match.group(1)
+                cmd = _kdl_attr(stripped, 'command="')
+                if cmd:
+                    nested_info["command"] = cmd
 
                 # Extract name from nested pane
-                name_match = re.search(r'name="([^"]+)"', stripped)
-                if name_match:
-                    nested_info["name"] = name_match.group(1)
+                name = _kdl_attr(stripped, 'name="')
+                if name:
+                    nested_info["name"] = name
 
                 # Extract size
-                size_match = re.search(r'size="([^"]+)"', stripped)
-                if size_match:
-                    nested_info["size"] = size_match.group(1)
+                size = _kdl_attr(stripped, 'size="')
+                if size:
+                    nested_info["size"] = size
 
                 # Check if focused
                 nested_info["focused"] = "focus=true" in stripped and tab_focused
@@ -944,7 +1155,7 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
             continue
 
         # Match pane lines (any pane, not just named ones)
-        if re.match(r'\s*pane\b', stripped):
+        if _is_pane_line(stripped):
             pane_info = {
                 "tab": current_tab,
                 "tab_index": current_tab_index,
@@ -955,27 +1166,27 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
             pane_index_in_tab += 1
 
             # Extract command
-            cmd_match = re.search(r'command="([^"]+)"', line)
-            if cmd_match:
-                pane_info["command"] = cmd_match.group(1)
+            cmd = _kdl_attr(line, 'command="')
+            if cmd:
+                pane_info["command"] = cmd
 
             # Extract name
-            name_match = re.search(r'name="([^"]+)"', line)
-            if name_match:
-                pane_info["name"] = name_match.group(1)
+            name = _kdl_attr(line, 'name="')
+            if name:
+                pane_info["name"] = name
 
             # Extract size
-            size_match = re.search(r'size="([^"]+)"', line)
-            if size_match:
-                pane_info["size"] = size_match.group(1)
+            size = _kdl_attr(line, 'size="')
+            if size:
+                pane_info["size"] = size
 
             # Check if focused
             pane_info["focused"] = "focus=true" in line and tab_focused
 
             # Extract cwd if present
-            cwd_match = re.search(r'cwd="([^"]+)"', line)
-            if cwd_match:
-                pane_info["cwd"] = cwd_match.group(1)
+            cwd = _kdl_attr(line, 'cwd="')
+            if cwd:
+                pane_info["cwd"] = cwd
 
             # Check if pane has a block (contains '{')
             if '{' in stripped:
@@ -990,6 +1201,12 @@ def parse_layout_panes(layout_text: str) -> list[dict]:
     return panes
 
 
+# Parses keyed by the dump text. LayoutCache hands back the same string while
+# it is fresh, so all consumers of one layout version share a single parse;
+# the returned list is shared and must be treated as read-only
+_parse_layout_cached = lru_cache(maxsize=16)(parse_layout_panes)
+
+
 def find_pane_by_name(panes: list[dict], name: str, registered_pane: PaneInfo = None) -> Optional[dict]:
     """Find a pane by name, command, args marker, or registered index."""
     name_lower = name.lower()
@@ -997,15 +1214,14 @@ def find_pane_by_name(panes: list[dict], name: str, registered_pane: PaneInfo =
     marker_lower = marker.lower()
 
     for p in panes:
-        pane_name = p.get("name", "").lower()
-        pane_cmd = p.get("command", "").lower()
-        pane_args = p.get("args", "").lower()
-
-        # Match by name or command (existing behavior)
-        if name_lower in pane_name or name_lower in pane_cmd:
+        # Match by name or command (existing behavior); each field is only
+        # lowercased once the previous check has missed
+        if name_lower in p.get("name", "").lower():
+            return p
+        if name_lower in p.get("command", "").lower():
             return p
         # Match by ZELLIJ_PANE_NAME marker in args
-        if marker_lower in pane_args:
+        if marker_lower in p.get("args", "").lower():
             return p
 
     # If not found by name/command, try registered pane index
@@ -1030,36 +1246,43 @@ def find_pane_by_name(panes: list[dict], name: str, registered_pane: PaneInfo =
 
 async def wait_for_prompt(
     pane_name: str,
-    pattern: str,
+    pattern: Union[str, re.Pattern],
     timeout: float,
     session: str = None,
     poll_interval: float = 1.0,
     check_lines: int = 5,
+    initial_poll_interval: float = 0.1,
 ) -> dict:
     """
     Wait for a prompt pattern to appear in pane output.
 
     Common helper for run_in_pane, repl_execute, ssh_run, repl_interrupt.
+    Polls start at initial_poll_interval and back off by 1.5x up to
+    poll_interval, so quick commands return fast and long ones poll less.
     Returns dict with success, completed, output, and elapsed.
     """
     async def do_read():
-        return zellij_action("dump-screen", "/dev/stdout", capture=True, session=session)
+        return await zellij_action("dump-screen", "/dev/stdout", capture=True, session=session)
 
     start_time = time.time()
-    regex = re.compile(pattern)
+    regex = pattern if isinstance(pattern, re.Pattern) else _compile_pattern(pattern)
     output = ""
+    # The layout doesn't change while we wait, only the pane contents do
+    panes = await layout_panes(session) if pane_name else None
+    interval = min(initial_poll_interval, poll_interval)
 
     while time.time() - start_time < timeout:
         if pane_name:
-            read_result = await with_pane_focus(pane_name, do_read, session=session)
+            read_result = await with_pane_focus(pane_name, do_read, session=session, panes=panes)
         else:
             read_result = await do_read()
 
         if read_result.get("success"):
             content = strip_ansi(read_result.get("stdout", ""))
             output = content
-            # Check last few lines for prompt
-            last_lines = '\n'.join(content.split('\n')[-check_lines:])
+            # Check last few lines for prompt; only split off the tail
+            # rather than the whole scrollback
+            last_lines = tail_text(content, check_lines)
             if regex.search(last_lines):
                 return {
                     "success": True,
@@ -1068,7 +1291,8 @@ async def wait_for_prompt(
                     "elapsed": round(time.time() - start_time, 2),
                 }
 
-        await asyncio.sleep(poll_interval)
+        await asyncio.sleep(interval)
+        interval = min(interval * 1.5, poll_interval)
 
     return {
         "success": True,
@@ -1079,7 +1303,16 @@ async def wait_for_prompt(
     }
 
 
-async def with_pane_focus(pane_name: str, action_fn: Callable, session: str = None) -> dict:
+async def layout_panes(session: str = None) -> Optional[list[dict]]:
+    """Dump and parse the session layout, or None if the dump fails."""
+    layout_result = await zellij_action("dump-layout", capture=True, session=session)
+    if not layout_result.get("success"):
+        return None
+    return _parse_layout_cached(layout_result.get("stdout", ""))
+
+
+async def with_pane_focus(pane_name: str, action_fn: Callable, session: str = None,
+                          panes: list[dict] = None) -> dict:
     """
     Execute action_fn while the named pane is focused, then restore focus.
 
@@ -1090,27 +1323,50 @@ async def with_pane_focus(pane_name: str, action_fn: Callable, session: str = No
         pane_name: Name of the pane to focus
         action_fn: Async or sync callable that performs the action
         session: Target zellij session
+        panes: Already-parsed layout to resolve the pane against; polling
+            loops pass one from layout_panes() to skip a dump per poll
 
     Returns:
         Result dict from action_fn, with focus restoration info
     """
     # Acquire per-session lock to prevent concurrent focus operations
     focus_lock = get_focus_lock(session)
-    with focus_lock:
-        return await _with_pane_focus_impl(pane_name, action_fn, session)
+    async with focus_lock:
+        return await _with_pane_focus_impl(pane_name, action_fn, session, panes)
 
 
-async def _with_pane_focus_impl(pane_name: str, action_fn: Callable, session: str = None) -> dict:
+async def _call_action(action_fn: Callable) -> dict:
+    """Run a sync or async focus action, turning exceptions into error results."""
+    try:
+        if asyncio.iscoroutinefunction(action_fn):
+            return await action_fn()
+        return action_fn()
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+async def _with_pane_focus_impl(pane_name: str, action_fn: Callable, session: str = None,
+                                panes: list[dict] = None) -> dict:
     """Internal implementation of with_pane_focus (called under lock)."""
+    registered_pane = state.get_pane(pane_name)
+
+    # Panes registered with a zellij pane ID can be focused in one step through
+    # the pane-bridge plugin, skipping the layout dump and focus cycling
+    if registered_pane and registered_pane.pane_id is not None and is_plugin_available():
+        focus_result = await plugin_command("focus", {"pane_id": registered_pane.pane_id}, session=session)
+        if focus_result.get("success"):
+            layout_cache.invalidate(session)
+            return await _call_action(action_fn)
+
     # Get current layout to find original focus and target pane
-    layout_result = zellij_action("dump-layout", capture=True, session=session)
-    if not layout_result.get("success"):
-        return {"success": False, "error": "Failed to get layout", "details": layout_result}
+    if panes is None:
+        layout_result = await zellij_action("dump-layout", capture=True, session=session)
+        if not layout_result.get("success"):
+            return {"success": False, "error": "Failed to get layout", "details": layout_result}
 
-    panes = parse_layout_panes(layout_result.get("stdout", ""))
+        panes = _parse_layout_cached(layout_result.get("stdout", ""))
 
-    # Look up registered pane info for index-based matching
-    registered_pane = state.panes.get(pane_name)
+    # Registered pane info allows index-based matching
     target_pane = find_pane_by_name(panes, pane_name, registered_pane)
 
     if not target_pane:
@@ -1126,7 +1382,7 @@ async def _with_pane_focus_impl(pane_name: str, action_fn: Callable, session: st
 
     # Switch to target tab if needed
     if not target_pane.get("tab_focused") and target_pane.get("tab"):
-        tab_result = zellij_action("go-to-tab-name", target_pane["tab"], session=session)
+        tab_result = await zellij_action("go-to-tab-name", target_pane["tab"], session=session)
         if not tab_result.get("success"):
             return {"success": False, "error": "Failed to switch tab", "details": tab_result}
 
@@ -1147,48 +1403,195 @@ async def _with_pane_focus_impl(pane_name: str, action_fn: Callable, session: st
         # Cycle to target pane (use modulo to handle wrapping)
         cycles_needed = target_index % num_panes if num_panes > 0 else 0
 
-        for _ in range(cycles_needed):
-            zellij_action("focus-next-pane", session=session)
+        # One shell spawn for the whole run of focus moves
+        if cycles_needed:
+            await run_zellij_batch([["action", "focus-next-pane"]] * cycles_needed, session=session)
 
         layout_cache.invalidate(session)
 
-    # Execute the action
-    try:
-        if asyncio.iscoroutinefunction(action_fn):
-            result = await action_fn()
-        else:
-            result = action_fn()
-    except Exception as e:
-        result = {"success": False, "error": str(e)}
+    result = await _call_action(action_fn)
 
     # Restore original tab focus (pane focus within tab is best-effort)
     if original_tab and original_tab != target_pane.get("tab"):
-        zellij_action("go-to-tab-name", original_tab, session=session)
+        await zellij_action("go-to-tab-name", original_tab, session=session)
 
     return result
 
 
-def run_zellij(*args: str, capture: bool = False, session: str = None) -> dict[str, Any]:
-    """Run a zellij command, optionally targeting a specific session."""
-    cmd = ["zellij"]
-    if session:
-        cmd.extend(["-s", session])
-    cmd.extend(args)
+# =============================================================================
+# ZELLIJ WORKER - Persistent shell for fire-and-forget zellij commands
+# =============================================================================
+
+class ZellijWorker:
+    """Long-lived `sh` process that runs zellij commands fed over stdin.
+
+    Spawning zellij straight from the server forks the whole Python process
+    for every action. Keeping one shell around means only the small shell
+    forks per command. Each command is followed by a sentinel line carrying
+    its exit status so the caller knows when it has finished.
+    """
+
+    def __init__(self):
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_proc(self) -> asyncio.subprocess.Process:
+        if self._proc is None or self._proc.returncode is not None:
+            self._proc = await asyncio.create_subprocess_exec(
+                "sh",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        return self._proc
+
+    async def _reset(self):
+        """Kill the shell so the next command starts from a clean one."""
+        if self._proc is not None and self._proc.returncode is None:
+            try:
+                self._proc.kill()
+                await self._proc.wait()
+            except Exception:
+                pass
+        self._proc = None
+
+    async def run(self, script: str, timeout: float = 10.0) -> int:
+        """Run a shell command line and return its exit status.
+
+        Raises asyncio.TimeoutError if the sentinel doesn't show up within
+        timeout. The shell is discarded whenever run() doesn't return normally,
+        cancellation included.
+        """
+        # Fresh per command, so a line left behind by an abandoned command can
+        # never be mistaken for this one's
+        sentinel = f"__zellij_mcp_done_{uuid.uuid4().hex}__".encode()
+        # stdin is redirected so zellij can't swallow the commands queued behind it;
+        # its output is discarded so only the sentinel line crosses the pipe
+        line = f"{{ {script} ; }} </dev/null >/dev/null 2>&1\nprintf '\\n%s %d\\n' {sentinel.decode()} $?\n"
+        async with self._lock:
+            try:
+                proc = await self._ensure_proc()
+                try:
+                    proc.stdin.write(line.encode())
+                    await proc.stdin.drain()
+                except (BrokenPipeError, ConnectionResetError):
+                    await self._reset()
+                    proc = await self._ensure_proc()
+                    proc.stdin.write(line.encode())
+                    await proc.stdin.drain()
+
+                buf = b""
+                deadline = time.monotonic() + timeout
+                while True:
+                    idx = buf.find(sentinel)
+                    if idx >= 0:
+                        end = buf.find(b"\n", idx)
+                        if end >= 0:
+                            return int(buf[idx + len(sentinel):end])
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    chunk = await asyncio.wait_for(proc.stdout.read(65536), remaining)
+                    if not chunk:
+                        # Shell died mid-command; don't let callers retry it blindly
+                        raise RuntimeError("zellij worker shell exited")
+                    buf += chunk
+            except BaseException:
+                # Timed out, cancelled or broken: the command may still be
+                # running, so don't hand this shell to the next caller
+                await self._reset()
+                raise
+
+
+zellij_worker = ZellijWorker()
+
+# Memoized shell quoting for the small set of argv tuples that recur verbatim
+_quoted_command = lru_cache(maxsize=128)(shlex.join)
+
+
+async def run_zellij(*args: str, capture: bool = False, session: str = None) -> dict[str, Any]:
+    """Run a zellij command, optionally targeting a specific session.
+
+    Commands whose output isn't needed go through the persistent worker
+    shell; captured commands are exec'd directly so stderr stays separate.
+    """
+    cmd = (_ZELLIJ_BIN, "-s", session, *args) if session else (_ZELLIJ_BIN, *args)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        if not capture:
+            try:
+                # Zero-argument actions ("action", "close-tab") repeat constantly
+                line = _quoted_command(cmd) if len(args) <= 2 else shlex.join(cmd)
+                status = await zellij_worker.run(line)
+                return {"success": status == 0}
+            except OSError:
+                pass  # Worker unavailable, fall back to a direct spawn
+        # Don't allocate pipes for output nobody reads
+        out = asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL
+        proc = await asyncio.create_subprocess_exec(*cmd, stdout=out, stderr=out)
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=10)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
         if capture:
             return {
-                "success": result.returncode == 0,
-                "stdout": result.stdout.strip(),
-                "stderr": result.stderr.strip(),
+                "success": proc.returncode == 0,
+                "stdout": stdout.decode(errors="replace").strip(),
+                "stderr": stderr.decode(errors="replace").strip(),
             }
-        return {"success": result.returncode == 0}
-    except subprocess.TimeoutExpired:
+        return {"success": proc.returncode == 0}
+    except asyncio.TimeoutError:
         return {"success": False, "error": "Command timed out"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+async def run_zellij_batch(commands: list[list[str]], session: str = None) -> dict[str, Any]:
+    """Run several zellij commands in order through a single shell spawn.
+
+    Each entry is an argv list as passed to run_zellij (without the leading
+    "zellij"). The batch stops at the first failure, and the index of the
+    failing command is reported as failed_step.
+    """
+    prefix = [_ZELLIJ_BIN]
+    if session:
+        prefix.extend(["-s", session])
+    # Subshell exits with the 1-based index of the failing command
+    script = "( " + "; ".join(
+        f"{shlex.join(prefix + list(c))} || exit {min(i + 1, 255)}"
+        for i, c in enumerate(commands)
+    ) + " )"
+    try:
+        try:
+            status = await zellij_worker.run(script)
+        except OSError:
+            proc = await asyncio.create_subprocess_exec(
+                "sh", "-c", script,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise
+            status = proc.returncode
+    except asyncio.TimeoutError:
+        result = {"success": False, "error": "Command timed out"}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    else:
+        result = {"success": status == 0}
+        if 0 < status < 255:
+            result["failed_step"] = status - 1
+
+    if any(c[0] == "action" and c[1] in LAYOUT_MUTATING_ACTIONS for c in commands if len(c) > 1):
+        layout_cache.invalidate(session)
+    query_cache.invalidate(session)
+    return result
+
+
 # Actions that mutate layout and should invalidate cache
 LAYOUT_MUTATING_ACTIONS = {
     "new-pane", "close-pane", "new-tab", "close-tab", "rename-pane",
@@ -1198,7 +1601,7 @@ LAYOUT_MUTATING_ACTIONS = {
 }
 
 
-def zellij_action(*args: str, capture: bool = False, session: str = None) -> dict[str, Any]:
+async def zellij_action(*args: str, capture: bool = False, session: str = None) -> dict[str, Any]:
     """Run a zellij action command, optionally targeting a specific session."""
     action_name = args[0] if args else ""
 
@@ -1207,16 +1610,25 @@ def zellij_action(*args: str, capture: bool = False, session: str = None) -> dic
         cached = layout_cache.get(session)
         if cached is not None:
             return {"success": True, "stdout": cached, "stderr": ""}
+        failed = layout_cache.get_miss(session)
+        if failed is not None:
+            return failed
 
-    result = run_zellij("action", *args, capture=capture, session=session)
+    result = await run_zellij("action", *args, capture=capture, session=session)
 
-    # Cache dump-layout results
-    if action_name == "dump-layout" and capture and result.get("success"):
-        layout_cache.set(result.get("stdout", ""), session)
+    # Cache dump-layout results, including failures
+    if action_name == "dump-layout" and capture:
+        if result.get("success"):
+            layout_cache.set(result.get("stdout", ""), session)
+        elif "stderr" in result:  # zellij answered; timeouts aren't cached
+            layout_cache.set_miss(result, session)
 
     # Invalidate cache after layout-mutating actions
     if action_name in LAYOUT_MUTATING_ACTIONS:
         layout_cache.invalidate(session)
+    # Any non-query action may change what the query tools report
+    if not capture:
+        query_cache.invalidate(session)
 
     return result
 
@@ -1225,2448 +1637,2825 @@ def zellij_action(*args: str, capture: bool = False, session: str = None) -> dic
 SESSION_PARAM = {"session": {"type": "string", "description": "Target session name (default: current)"}}
 
 
+def _schema(properties: dict, required: list[str] = None) -> dict:
+    """Build a tool input schema with the shared session parameter embedded."""
+    # A tool's own "session" property (session_attach) keeps its description
+    schema = {"type": "object", "properties": {**SESSION_PARAM, **properties}}
+    if required:
+        schema["required"] = required
+    return schema
+
+
+# Shared by every tool whose only parameter is the session
+_EMPTY_SCHEMA = _schema({})
+
+
+# Shared fragments; tools spread them into their own property dicts. enum
+# must stay a list: the schema is checked against the JSON Schema metaschema
 DIRECTION_ENUM = {"type": "string", "enum": ["down", "right", "up", "left"]}
 MODE_ENUM = {"type": "string", "enum": ["locked", "pane", "tab", "resize", "move", "search", "session", "normal"]}
 
 
-def with_session(tools: list[Tool]) -> list[Tool]:
-    """Add session parameter to all tool schemas and filter hidden tools."""
-    # Filter hidden tools to save context tokens
-    filtered = [t for t in tools if t.name not in HIDDEN_TOOLS]
-    for tool in filtered:
-        tool.inputSchema["properties"] = {
-            **tool.inputSchema.get("properties", {}),
-            **SESSION_PARAM,
-        }
-    return filtered
+def visible_tools(tools: list[Tool]) -> list[Tool]:
+    """Filter hidden tools out of the listed set to save context tokens."""
+    return [t for t in tools if t.name not in HIDDEN_TOOLS]
 
 
-@server.list_tools()
-async def list_tools() -> list[Tool]:
-    """List all Zellij control tools."""
-    return with_session([
-        # === PANE MANAGEMENT ===
-        Tool(
-            name="new_pane",
-            description="Open a new pane in Zellij",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "direction": {**DIRECTION_ENUM, "description": "Direction for new pane"},
-                    "floating": {"type": "boolean", "description": "Create floating pane"},
-                    "in_place": {"type": "boolean", "description": "Open in place (replace current)"},
-                    "command": {"type": "string", "description": "Command to run"},
-                    "name": {"type": "string", "description": "Pane name"},
-                    "cwd": {"type": "string", "description": "Working directory"},
-                    "close_on_exit": {"type": "boolean", "description": "Close pane when command exits"},
-                    "start_suspended": {"type": "boolean", "description": "Start suspended"},
-                },
+# Tool schemas are static, so build the list once instead of on every tools/list
+TOOLS: list[Tool] = visible_tools([
+    # === PANE MANAGEMENT ===
+    Tool(
+        name="new_pane",
+        description="Open a new pane in Zellij",
+        inputSchema=_schema(
+            {
+                "direction": {**DIRECTION_ENUM, "description": "Direction for new pane"},
+                "floating": {"type": "boolean", "description": "Create floating pane"},
+                "in_place": {"type": "boolean", "description": "Open in place (replace current)"},
+                "command": {"type": "string", "description": "Command to run"},
+                "name": {"type": "string", "description": "Pane name"},
+                "cwd": {"type": "string", "description": "Working directory"},
+                "close_on_exit": {"type": "boolean", "description": "Close pane when command exits"},
+                "start_suspended": {"type": "boolean", "description": "Start suspended"},
             },
         ),
-        Tool(
-            name="close_pane",
-            description="Close the focused pane",
-            inputSchema={"type": "object", "properties": {}},
+    ),
+    Tool(
+        name="close_pane",
+        description="Close the focused pane",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="focus_pane",
+        description="Move focus to pane in direction",
+        inputSchema=_schema(
+            {"direction": {**DIRECTION_ENUM, "description": "Direction to move focus"}},
+            required=["direction"],
         ),
-        Tool(
-            name="focus_pane",
-            description="Move focus to pane in direction",
-            inputSchema={
-                "type": "object",
-                "properties": {"direction": {**DIRECTION_ENUM, "description": "Direction to move focus"}},
-                "required": ["direction"],
+    ),
+    Tool(
+        name="focus_next_pane",
+        description="Move focus to the next pane",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="focus_previous_pane",
+        description="Move focus to the previous pane",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="move_pane",
+        description="Move the focused pane in a direction",
+        inputSchema=_schema({"direction": {**DIRECTION_ENUM, "description": "Direction to move pane"}}),
+    ),
+    Tool(
+        name="move_pane_backwards",
+        description="Rotate pane location backwards",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="resize_pane",
+        description="Resize the focused pane",
+        inputSchema=_schema(
+            {
+                "direction": {**DIRECTION_ENUM, "description": "Border to resize"},
+                "increase": {"type": "boolean", "description": "Increase size (default true)", "default": True},
+                "amount": {"type": "integer", "description": "Number of resize steps (default 1)", "default": 1},
             },
+            required=["direction"],
         ),
-        Tool(
-            name="focus_next_pane",
-            description="Move focus to the next pane",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="focus_previous_pane",
-            description="Move focus to the previous pane",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="move_pane",
-            description="Move the focused pane in a direction",
-            inputSchema={
-                "type": "object",
-                "properties": {"direction": {**DIRECTION_ENUM, "description": "Direction to move pane"}},
+    ),
+    Tool(
+        name="rename_pane",
+        description="Rename the focused pane",
+        inputSchema=_schema({"name": {"type": "string", "description": "New pane name"}}, required=["name"]),
+    ),
+    Tool(
+        name="undo_rename_pane",
+        description="Remove custom pane name",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="toggle_floating",
+        description="Toggle floating panes visibility",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="toggle_fullscreen",
+        description="Toggle fullscreen for focused pane",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="toggle_embed_or_floating",
+        description="Toggle between embedded and floating for focused pane",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="toggle_pane_frames",
+        description="Toggle pane frames in the UI",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="toggle_sync_tab",
+        description="Toggle sending commands to all panes in tab",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="stack_panes",
+        description="Stack multiple panes together",
+        inputSchema=_schema(
+            {
+                "pane_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Pane IDs (e.g., terminal_1, plugin_1)",
+                }
             },
+            required=["pane_ids"],
         ),
-        Tool(
-            name="move_pane_backwards",
-            description="Rotate pane location backwards",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="resize_pane",
-            description="Resize the focused pane",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "direction": {**DIRECTION_ENUM, "description": "Border to resize"},
-                    "increase": {"type": "boolean", "description": "Increase size (default true)", "default": True},
-                },
-                "required": ["direction"],
+    ),
+    # === TAB MANAGEMENT ===
+    Tool(
+        name="new_tab",
+        description="Create a new tab",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Tab name"},
+                "layout": {"type": "string", "description": "Layout file path"},
+                "cwd": {"type": "string", "description": "Working directory"},
             },
         ),
-        Tool(
-            name="rename_pane",
-            description="Rename the focused pane",
-            inputSchema={
-                "type": "object",
-                "properties": {"name": {"type": "string", "description": "New pane name"}},
-                "required": ["name"],
+    ),
+    Tool(
+        name="close_tab",
+        description="Close the current tab",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="focus_tab",
+        description="Switch to a tab by index or direction",
+        inputSchema=_schema(
+            {
+                "index": {"type": "integer", "description": "Tab index (1-based)"},
+                "name": {"type": "string", "description": "Tab name"},
+                "direction": {"type": "string", "enum": ["next", "previous"], "description": "Relative navigation"},
             },
         ),
-        Tool(
-            name="undo_rename_pane",
-            description="Remove custom pane name",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="toggle_floating",
-            description="Toggle floating panes visibility",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="toggle_fullscreen",
-            description="Toggle fullscreen for focused pane",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="toggle_embed_or_floating",
-            description="Toggle between embedded and floating for focused pane",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="toggle_pane_frames",
-            description="Toggle pane frames in the UI",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="toggle_sync_tab",
-            description="Toggle sending commands to all panes in tab",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="stack_panes",
-            description="Stack multiple panes together",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_ids": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "Pane IDs (e.g., terminal_1, plugin_1)",
-                    }
-                },
-                "required": ["pane_ids"],
+    ),
+    Tool(
+        name="move_tab",
+        description="Move the current tab left or right",
+        inputSchema=_schema(
+            {
+                "direction": {"type": "string", "enum": ["left", "right"], "description": "Direction to move"},
             },
+            required=["direction"],
         ),
-        # === TAB MANAGEMENT ===
-        Tool(
-            name="new_tab",
-            description="Create a new tab",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Tab name"},
-                    "layout": {"type": "string", "description": "Layout file path"},
-                    "cwd": {"type": "string", "description": "Working directory"},
+    ),
+    Tool(
+        name="rename_tab",
+        description="Rename the current tab",
+        inputSchema=_schema({"name": {"type": "string", "description": "New tab name"}}, required=["name"]),
+    ),
+    Tool(
+        name="undo_rename_tab",
+        description="Remove custom tab name",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="query_tab_names",
+        description="Get names of all tabs",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    # === SCROLLING ===
+    Tool(
+        name="scroll",
+        description="Scroll in the focused pane",
+        inputSchema=_schema(
+            {
+                "direction": {"type": "string", "enum": ["up", "down"], "description": "Scroll direction"},
+                "amount": {
+                    "type": "string",
+                    "enum": ["line", "half_page", "page", "top", "bottom"],
+                    "description": "Scroll amount (default: line)",
                 },
             },
+            required=["direction"],
         ),
-        Tool(
-            name="close_tab",
-            description="Close the current tab",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="focus_tab",
-            description="Switch to a tab by index or direction",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "index": {"type": "integer", "description": "Tab index (1-based)"},
-                    "name": {"type": "string", "description": "Tab name"},
-                    "direction": {"type": "string", "enum": ["next", "previous"], "description": "Relative navigation"},
-                },
+    ),
+    # === TEXT/COMMAND ===
+    Tool(
+        name="write_chars",
+        description="Send characters to the focused pane",
+        inputSchema=_schema({"chars": {"type": "string", "description": "Characters to send"}}, required=["chars"]),
+    ),
+    Tool(
+        name="write_lines",
+        description="Send several lines to the focused pane in one write (each line is followed by a newline)",
+        inputSchema=_schema(
+            {
+                "lines": {"type": "array", "items": {"type": "string"}, "description": "Lines to send, in order"},
             },
+            required=["lines"],
         ),
-        Tool(
-            name="move_tab",
-            description="Move the current tab left or right",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "direction": {"type": "string", "enum": ["left", "right"], "description": "Direction to move"},
-                },
-                "required": ["direction"],
+    ),
+    Tool(
+        name="focus_then_write",
+        description="Move focus in a direction and send characters there, in one process spawn",
+        inputSchema=_schema(
+            {
+                "direction": {**DIRECTION_ENUM, "description": "Direction to move focus"},
+                "chars": {"type": "string", "description": "Characters to write after focusing"},
             },
+            required=["direction", "chars"],
         ),
-        Tool(
-            name="rename_tab",
-            description="Rename the current tab",
-            inputSchema={
-                "type": "object",
-                "properties": {"name": {"type": "string", "description": "New tab name"}},
-                "required": ["name"],
+    ),
+    Tool(
+        name="clear_pane",
+        description="Clear all buffers for the focused pane",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="read_pane",
+        description="Read content from any pane by name. Returns cleaned text suitable for LLM processing.",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane name (default: focused pane)"},
+                "full": {"type": "boolean", "description": "Include full scrollback history"},
+                "tail": {"type": "integer", "description": "Return only the last N lines"},
+                "strip_ansi": {"type": "boolean", "description": "Strip ANSI codes (default: true)", "default": True},
             },
         ),
-        Tool(
-            name="undo_rename_tab",
-            description="Remove custom tab name",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="query_tab_names",
-            description="Get names of all tabs",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        # === SCROLLING ===
-        Tool(
-            name="scroll",
-            description="Scroll in the focused pane",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "direction": {"type": "string", "enum": ["up", "down"], "description": "Scroll direction"},
-                    "amount": {
-                        "type": "string",
-                        "enum": ["line", "half_page", "page", "top", "bottom"],
-                        "description": "Scroll amount (default: line)",
-                    },
-                },
-                "required": ["direction"],
+    ),
+    Tool(
+        name="list_panes",
+        description="List all panes in the current session with their names, commands, and focus state",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="focus_pane_by_name",
+        description="Focus a pane by its name (searches all tabs)",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Pane name to focus"},
             },
+            required=["name"],
         ),
-        # === TEXT/COMMAND ===
-        Tool(
-            name="write_chars",
-            description="Send characters to the focused pane",
-            inputSchema={
-                "type": "object",
-                "properties": {"chars": {"type": "string", "description": "Characters to send"}},
-                "required": ["chars"],
+    ),
+    Tool(
+        name="write_to_pane",
+        description="Send characters to a specific named pane without changing visible focus",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane name"},
+                "chars": {"type": "string", "description": "Characters to send"},
+                "press_enter": {"type": "boolean", "description": "Append newline after chars", "default": False},
             },
+            required=["pane_name", "chars"],
         ),
-        Tool(
-            name="clear_pane",
-            description="Clear all buffers for the focused pane",
-            inputSchema={"type": "object", "properties": {}},
+    ),
+    Tool(
+        name="send_keys",
+        description="Send special key sequences to a pane (ctrl+c, tab, arrows, etc.)",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
+                "keys": {"type": "string", "description": "Key spec: ctrl+c, ctrl+d, tab, enter, escape, up, down, left, right, etc."},
+                "repeat": {"type": "integer", "description": "Repeat the key N times", "default": 1},
+            },
+            required=["keys"],
         ),
-        Tool(
-            name="read_pane",
-            description="Read content from any pane by name. Returns cleaned text suitable for LLM processing.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane name (default: focused pane)"},
-                    "full": {"type": "boolean", "description": "Include full scrollback history"},
-                    "tail": {"type": "integer", "description": "Return only the last N lines"},
-                    "strip_ansi": {"type": "boolean", "description": "Strip ANSI codes (default: true)", "default": True},
-                },
+    ),
+    Tool(
+        name="search_pane",
+        description="Search a pane's content for a regex pattern, returns matching lines",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
+                "pattern": {"type": "string", "description": "Python regex pattern to search"},
+                "context": {"type": "integer", "description": "Lines of context around matches", "default": 0},
+                "full": {"type": "boolean", "description": "Search full scrollback", "default": True},
             },
+            required=["pattern"],
         ),
-        Tool(
-            name="list_panes",
-            description="List all panes in the current session with their names, commands, and focus state",
-            inputSchema={"type": "object", "properties": {}},
+    ),
+    # === MONITORING ===
+    Tool(
+        name="wait_for_output",
+        description="Wait for a regex pattern to appear in pane output. Essential for waiting for command completion.",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
+                "pattern": {"type": "string", "description": "Regex pattern to wait for"},
+                "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 30},
+                "poll_interval": {"type": "number", "description": "Seconds between polls", "default": 1.0},
+            },
+            required=["pattern"],
         ),
-        Tool(
-            name="focus_pane_by_name",
-            description="Focus a pane by its name (searches all tabs)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Pane name to focus"},
-                },
-                "required": ["name"],
+    ),
+    Tool(
+        name="wait_for_idle",
+        description="Wait until pane output stops changing (command finished producing output)",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
+                "stable_seconds": {"type": "number", "description": "How long output must be stable", "default": 3.0},
+                "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 60},
+                "poll_interval": {"type": "number", "description": "Seconds between polls", "default": 1.0},
             },
         ),
-        Tool(
-            name="write_to_pane",
-            description="Send characters to a specific named pane without changing visible focus",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane name"},
-                    "chars": {"type": "string", "description": "Characters to send"},
-                    "press_enter": {"type": "boolean", "description": "Append newline after chars", "default": False},
-                },
-                "required": ["pane_name", "chars"],
+    ),
+    Tool(
+        name="tail_pane",
+        description="Get only new output since last read (incremental monitoring)",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
+                "reset": {"type": "boolean", "description": "Reset cursor to current position", "default": False},
             },
         ),
-        Tool(
-            name="send_keys",
-            description="Send special key sequences to a pane (ctrl+c, tab, arrows, etc.)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
-                    "keys": {"type": "string", "description": "Key spec: ctrl+c, ctrl+d, tab, enter, escape, up, down, left, right, etc."},
-                    "repeat": {"type": "integer", "description": "Repeat the key N times", "default": 1},
-                },
-                "required": ["keys"],
+    ),
+    # === WORKSPACE MANAGEMENT ===
+    Tool(
+        name="agent_session",
+        description="Manage workspace tabs for agent operations. Creates 'agent-work' tab if needed. DEPRECATED: Session isolation doesn't work in Zellij; now uses tab-based workspaces.",
+        inputSchema=_schema(
+            {
+                "action": {"type": "string", "enum": ["status", "create", "destroy"],
+                           "description": "Action: status (default), create workspace tab, or destroy workspace tab", "default": "status"},
             },
         ),
-        Tool(
-            name="search_pane",
-            description="Search a pane's content for a regex pattern, returns matching lines",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
-                    "pattern": {"type": "string", "description": "Python regex pattern to search"},
-                    "context": {"type": "integer", "description": "Lines of context around matches", "default": 0},
-                    "full": {"type": "boolean", "description": "Search full scrollback", "default": True},
+    ),
+    Tool(
+        name="spawn_agents",
+        description="Spawn multiple Claude agents in parallel, each working on a task. Creates panes in a dedicated tab.",
+        inputSchema=_schema(
+            {
+                "tasks": {
+                    "type": "array",
+                    "description": "List of tasks for agents",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string", "description": "Task/agent name (used as pane name)"},
+                            "prompt": {"type": "string", "description": "Task prompt for the agent"},
+                            "model": {"type": "string", "description": "Model to use (default: claude-sonnet-4-22k-0514)"},
+                            "cwd": {"type": "string", "description": "Working directory for agent"},
+                        },
+                        "required": ["name", "prompt"],
+                    },
                 },
-                "required": ["pattern"],
+                "tab": {"type": "string", "description": "Tab name for agents (default: agents)", "default": "agents"},
+                "dangerously_skip_permissions": {"type": "boolean", "description": "Run with --dangerously-skip-permissions", "default": False},
             },
+            required=["tasks"],
         ),
-        # === MONITORING ===
-        Tool(
-            name="wait_for_output",
-            description="Wait for a regex pattern to appear in pane output. Essential for waiting for command completion.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
-                    "pattern": {"type": "string", "description": "Regex pattern to wait for"},
-                    "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 30},
-                    "poll_interval": {"type": "number", "description": "Seconds between polls", "default": 1.0},
-                },
-                "required": ["pattern"],
+    ),
+    Tool(
+        name="list_spawned_agents",
+        description="List all spawned agents and their status",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="agent_output",
+        description="Read output from a spawned agent's pane",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Agent name"},
+                "tail": {"type": "integer", "description": "Last N lines (default: 50)", "default": 50},
             },
+            required=["name"],
         ),
-        Tool(
-            name="wait_for_idle",
-            description="Wait until pane output stops changing (command finished producing output)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
-                    "stable_seconds": {"type": "number", "description": "How long output must be stable", "default": 3.0},
-                    "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 60},
-                    "poll_interval": {"type": "number", "description": "Seconds between polls", "default": 1.0},
-                },
+    ),
+    Tool(
+        name="stop_agent",
+        description="Stop a running agent (sends Ctrl+C)",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Agent name to stop"},
             },
+            required=["name"],
         ),
-        Tool(
-            name="tail_pane",
-            description="Get only new output since last read (incremental monitoring)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane (default: focused)"},
-                    "reset": {"type": "boolean", "description": "Reset cursor to current position", "default": False},
-                },
+    ),
+    # === COMPOUND OPERATIONS (run in agent session by default) ===
+    Tool(
+        name="run_in_pane",
+        description="Run command in a pane (agent session by default). No focus stealing - safe for autonomous use.",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "Target pane name in agent session"},
+                "command": {"type": "string", "description": "Command to execute"},
+                "wait": {"type": "boolean", "description": "Wait for completion", "default": True},
+                "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 30},
+                "capture": {"type": "boolean", "description": "Return output", "default": True},
+                "prompt_pattern": {"type": "string", "description": "Regex for shell prompt", "default": "[\\$#>]\\s*$"},
             },
+            required=["pane_name", "command"],
         ),
-        # === WORKSPACE MANAGEMENT ===
-        Tool(
-            name="agent_session",
-            description="Manage workspace tabs for agent operations. Creates 'agent-work' tab if needed. DEPRECATED: Session isolation doesn't work in Zellij; now uses tab-based workspaces.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "action": {"type": "string", "enum": ["status", "create", "destroy"],
-                               "description": "Action: status (default), create workspace tab, or destroy workspace tab", "default": "status"},
-                },
+    ),
+    Tool(
+        name="create_named_pane",
+        description="Create pane in agent session (isolated workspace). No focus stealing.",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Unique pane name"},
+                "command": {"type": "string", "description": "Command to run (e.g., ipython3, R)"},
+                "tab": {"type": "string", "description": "Tab name (creates if needed)"},
+                "direction": {**DIRECTION_ENUM, "description": "Split direction"},
+                "floating": {"type": "boolean", "description": "Create as floating"},
+                "cwd": {"type": "string", "description": "Working directory"},
             },
+            required=["name"],
         ),
-        Tool(
-            name="spawn_agents",
-            description="Spawn multiple Claude agents in parallel, each working on a task. Creates panes in a dedicated tab.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "tasks": {
-                        "type": "array",
-                        "description": "List of tasks for agents",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string", "description": "Task/agent name (used as pane name)"},
-                                "prompt": {"type": "string", "description": "Task prompt for the agent"},
-                                "model": {"type": "string", "description": "Model to use (default: claude-sonnet-4-22k-0514)"},
-                                "cwd": {"type": "string", "description": "Working directory for agent"},
-                            },
-                            "required": ["name", "prompt"],
-                        },
-                    },
-                    "tab": {"type": "string", "description": "Tab name for agents (default: agents)", "default": "agents"},
-                    "dangerously_skip_permissions": {"type": "boolean", "description": "Run with --dangerously-skip-permissions", "default": False},
-                },
-                "required": ["tasks"],
+    ),
+    Tool(
+        name="destroy_named_pane",
+        description="Close a named pane in agent session",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Pane name to close"},
             },
+            required=["name"],
         ),
-        Tool(
-            name="list_spawned_agents",
-            description="List all spawned agents and their status",
-            inputSchema={"type": "object", "properties": {}},
+    ),
+    Tool(
+        name="list_named_panes",
+        description="List all registered panes in agent session",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    # === REPL ===
+    Tool(
+        name="repl_execute",
+        description="Execute code in an interactive REPL (IPython, R, Julia) and capture output",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "REPL pane name"},
+                "code": {"type": "string", "description": "Code to execute (can be multi-line)"},
+                "repl_type": {"type": "string", "enum": ["ipython", "python", "r", "julia", "bash", "auto"],
+                              "description": "REPL type for prompt detection", "default": "auto"},
+                "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 60},
+            },
+            required=["pane_name", "code"],
         ),
-        Tool(
-            name="agent_output",
-            description="Read output from a spawned agent's pane",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Agent name"},
-                    "tail": {"type": "integer", "description": "Last N lines (default: 50)", "default": 50},
-                },
-                "required": ["name"],
+    ),
+    Tool(
+        name="repl_interrupt",
+        description="Send Ctrl+C to interrupt a running command in a REPL",
+        inputSchema=_schema(
+            {
+                "pane_name": {"type": "string", "description": "REPL pane name"},
+                "wait_for_prompt": {"type": "boolean", "description": "Wait for prompt to return", "default": True},
+                "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 10},
             },
+            required=["pane_name"],
         ),
-        Tool(
-            name="stop_agent",
-            description="Stop a running agent (sends Ctrl+C)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Agent name to stop"},
-                },
-                "required": ["name"],
+    ),
+    # === SSH/HPC ===
+    Tool(
+        name="ssh_connect",
+        description="Open an SSH connection in a named pane",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Name for this SSH session"},
+                "host": {"type": "string", "description": "SSH host (user@host or config name)"},
+                "tab": {"type": "string", "description": "Tab to create pane in"},
+                "port": {"type": "integer", "description": "SSH port"},
+                "identity_file": {"type": "string", "description": "Path to SSH key"},
             },
+            required=["name", "host"],
         ),
-        # === COMPOUND OPERATIONS (run in agent session by default) ===
-        Tool(
-            name="run_in_pane",
-            description="Run command in a pane (agent session by default). No focus stealing - safe for autonomous use.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "Target pane name in agent session"},
-                    "command": {"type": "string", "description": "Command to execute"},
-                    "wait": {"type": "boolean", "description": "Wait for completion", "default": True},
-                    "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 30},
-                    "capture": {"type": "boolean", "description": "Return output", "default": True},
-                    "prompt_pattern": {"type": "string", "description": "Regex for shell prompt", "default": "[\\$#>]\\s*$"},
-                },
-                "required": ["pane_name", "command"],
+    ),
+    Tool(
+        name="ssh_run",
+        description="Execute a command on a remote host via existing SSH session",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "SSH session name"},
+                "command": {"type": "string", "description": "Command to run"},
+                "wait": {"type": "boolean", "description": "Wait for completion", "default": True},
+                "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 30},
             },
+            required=["name", "command"],
         ),
-        Tool(
-            name="create_named_pane",
-            description="Create pane in agent session (isolated workspace). No focus stealing.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Unique pane name"},
-                    "command": {"type": "string", "description": "Command to run (e.g., ipython3, R)"},
-                    "tab": {"type": "string", "description": "Tab name (creates if needed)"},
-                    "direction": {**DIRECTION_ENUM, "description": "Split direction"},
-                    "floating": {"type": "boolean", "description": "Create as floating"},
-                    "cwd": {"type": "string", "description": "Working directory"},
-                },
-                "required": ["name"],
+    ),
+    Tool(
+        name="job_submit",
+        description="Submit an HPC job (SLURM/PBS) and track it",
+        inputSchema=_schema(
+            {
+                "ssh_name": {"type": "string", "description": "SSH session to use"},
+                "script": {"type": "string", "description": "Path to job script"},
+                "scheduler": {"type": "string", "enum": ["slurm", "pbs"], "default": "slurm"},
+                "extra_args": {"type": "string", "description": "Additional sbatch/qsub args"},
             },
+            required=["ssh_name", "script"],
         ),
-        Tool(
-            name="destroy_named_pane",
-            description="Close a named pane in agent session",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Pane name to close"},
-                },
-                "required": ["name"],
+    ),
+    Tool(
+        name="job_status",
+        description="Check status of tracked HPC jobs",
+        inputSchema=_schema(
+            {
+                "job_id": {"type": "string", "description": "Specific job ID (or check all)"},
+                "ssh_name": {"type": "string", "description": "SSH session to use"},
             },
         ),
-        Tool(
-            name="list_named_panes",
-            description="List all registered panes in agent session",
-            inputSchema={"type": "object", "properties": {}},
+    ),
+    # === EDIT ===
+    Tool(
+        name="edit_file",
+        description="Open a file in a new pane with default editor",
+        inputSchema=_schema(
+            {
+                "path": {"type": "string", "description": "File path to edit"},
+                "line": {"type": "integer", "description": "Line number to jump to"},
+                "floating": {"type": "boolean", "description": "Open in floating pane"},
+                "in_place": {"type": "boolean", "description": "Open in place"},
+                "direction": {**DIRECTION_ENUM, "description": "Split direction"},
+            },
+            required=["path"],
         ),
-        # === REPL ===
-        Tool(
-            name="repl_execute",
-            description="Execute code in an interactive REPL (IPython, R, Julia) and capture output",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "REPL pane name"},
-                    "code": {"type": "string", "description": "Code to execute (can be multi-line)"},
-                    "repl_type": {"type": "string", "enum": ["ipython", "python", "r", "julia", "bash", "auto"],
-                                  "description": "REPL type for prompt detection", "default": "auto"},
-                    "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 60},
-                },
-                "required": ["pane_name", "code"],
+    ),
+    Tool(
+        name="edit_scrollback",
+        description="Open pane scrollback in default editor",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    # === SESSION ===
+    Tool(
+        name="list_sessions",
+        description="List all Zellij sessions",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="list_clients",
+        description="List connected clients in current session",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="session_info",
+        description="Get current session information",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="rename_session",
+        description="Rename the current session",
+        inputSchema=_schema({"name": {"type": "string", "description": "New session name"}}, required=["name"]),
+    ),
+    Tool(
+        name="session_map",
+        description="Generate visual ASCII map of all sessions, tabs, and panes",
+        inputSchema=_schema(
+            {
+                "compact": {"type": "boolean", "description": "Compact view (less detail)", "default": False},
             },
         ),
-        Tool(
-            name="repl_interrupt",
-            description="Send Ctrl+C to interrupt a running command in a REPL",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pane_name": {"type": "string", "description": "REPL pane name"},
-                    "wait_for_prompt": {"type": "boolean", "description": "Wait for prompt to return", "default": True},
-                    "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 10},
+    ),
+    Tool(
+        name="session_attach",
+        description="Manage cross-session control. Creates headless pty attachments to other sessions for daemon-based operations.",
+        inputSchema=_schema(
+            {
+                "action": {
+                    "type": "string",
+                    "enum": ["list", "attach", "detach", "detach_all"],
+                    "description": "Action: list attachments, attach to session, detach from session, or detach all",
+                    "default": "list",
+                },
+                "session": {
+                    "type": "string",
+                    "description": "Target session name (required for attach/detach)",
                 },
-                "required": ["pane_name"],
             },
         ),
-        # === SSH/HPC ===
-        Tool(
-            name="ssh_connect",
-            description="Open an SSH connection in a named pane",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Name for this SSH session"},
-                    "host": {"type": "string", "description": "SSH host (user@host or config name)"},
-                    "tab": {"type": "string", "description": "Tab to create pane in"},
-                    "port": {"type": "integer", "description": "SSH port"},
-                    "identity_file": {"type": "string", "description": "Path to SSH key"},
-                },
-                "required": ["name", "host"],
+    ),
+    # === LAYOUT ===
+    Tool(
+        name="dump_layout",
+        description="Dump current layout to stdout",
+        inputSchema=_EMPTY_SCHEMA,
+    ),
+    Tool(
+        name="swap_layout",
+        description="Swap to next or previous layout",
+        inputSchema=_schema(
+            {
+                "direction": {"type": "string", "enum": ["next", "previous"], "description": "Direction"},
             },
         ),
-        Tool(
-            name="ssh_run",
-            description="Execute a command on a remote host via existing SSH session",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "SSH session name"},
-                    "command": {"type": "string", "description": "Command to run"},
-                    "wait": {"type": "boolean", "description": "Wait for completion", "default": True},
-                    "timeout": {"type": "integer", "description": "Max seconds to wait", "default": 30},
-                },
-                "required": ["name", "command"],
+    ),
+    # === MODE ===
+    Tool(
+        name="switch_mode",
+        description="Switch input mode for all clients",
+        inputSchema=_schema({"mode": {**MODE_ENUM, "description": "Input mode"}}, required=["mode"]),
+    ),
+    # === PLUGINS ===
+    Tool(
+        name="launch_plugin",
+        description="Launch a Zellij plugin",
+        inputSchema=_schema(
+            {
+                "url": {"type": "string", "description": "Plugin URL or path"},
+                "floating": {"type": "boolean", "description": "Launch as floating"},
+                "in_place": {"type": "boolean", "description": "Launch in place"},
+                "skip_cache": {"type": "boolean", "description": "Skip plugin cache"},
+                "configuration": {"type": "object", "description": "Plugin configuration"},
             },
+            required=["url"],
         ),
-        Tool(
-            name="job_submit",
-            description="Submit an HPC job (SLURM/PBS) and track it",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "ssh_name": {"type": "string", "description": "SSH session to use"},
-                    "script": {"type": "string", "description": "Path to job script"},
-                    "scheduler": {"type": "string", "enum": ["slurm", "pbs"], "default": "slurm"},
-                    "extra_args": {"type": "string", "description": "Additional sbatch/qsub args"},
-                },
-                "required": ["ssh_name", "script"],
+    ),
+    Tool(
+        name="pipe",
+        description="Send data to plugins via pipe",
+        inputSchema=_schema(
+            {
+                "name": {"type": "string", "description": "Pipe name"},
+                "payload": {"type": "string", "description": "Data payload"},
+                "plugin": {"type": "string", "description": "Target plugin URL"},
+                "args": {"type": "array", "items": {"type": "string"}, "description": "Additional arguments"},
             },
         ),
-        Tool(
-            name="job_status",
-            description="Check status of tracked HPC jobs",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "job_id": {"type": "string", "description": "Specific job ID (or check all)"},
-                    "ssh_name": {"type": "string", "description": "SSH session to use"},
+    ),
+    # === BATCHING ===
+    Tool(
+        name="script",
+        description="Run several tool calls in order within one request",
+        inputSchema=_schema(
+            {
+                "steps": {
+                    "type": "array",
+                    "description": "Tool calls to run in order",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tool": {"type": "string", "description": "Tool name"},
+                            "args": {"type": "object", "description": "Tool arguments"},
+                        },
+                        "required": ["tool"],
+                    },
                 },
+                "stop_on_error": {"type": "boolean", "description": "Stop at the first failing step (default true)", "default": True},
             },
+            required=["steps"],
         ),
-        # === EDIT ===
-        Tool(
-            name="edit_file",
-            description="Open a file in a new pane with default editor",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "File path to edit"},
-                    "line": {"type": "integer", "description": "Line number to jump to"},
-                    "floating": {"type": "boolean", "description": "Open in floating pane"},
-                    "in_place": {"type": "boolean", "description": "Open in place"},
-                    "direction": DIRECTION_ENUM,
+    ),
+    Tool(
+        name="batch_actions",
+        description="Run several raw zellij actions in order with a single process spawn",
+        inputSchema=_schema(
+            {
+                "actions": {
+                    "type": "array",
+                    "items": {"type": "array", "items": {"type": "string"}},
+                    "description": "Action argv lists, e.g. [[\"focus-next-pane\"], [\"write-chars\", \"ls\"]]",
                 },
-                "required": ["path"],
             },
+            required=["actions"],
         ),
-        Tool(
-            name="edit_scrollback",
-            description="Open pane scrollback in default editor",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        # === SESSION ===
-        Tool(
-            name="list_sessions",
-            description="List all Zellij sessions",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="list_clients",
-            description="List connected clients in current session",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="session_info",
-            description="Get current session information",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="rename_session",
-            description="Rename the current session",
-            inputSchema={
-                "type": "object",
-                "properties": {"name": {"type": "string", "description": "New session name"}},
-                "required": ["name"],
-            },
-        ),
-        Tool(
-            name="session_map",
-            description="Generate visual ASCII map of all sessions, tabs, and panes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "compact": {"type": "boolean", "description": "Compact view (less detail)", "default": False},
-                },
-            },
-        ),
-        Tool(
-            name="session_attach",
-            description="Manage cross-session control. Creates headless pty attachments to other sessions for daemon-based operations.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "action": {
-                        "type": "string",
-                        "enum": ["list", "attach", "detach", "detach_all"],
-                        "description": "Action: list attachments, attach to session, detach from session, or detach all",
-                        "default": "list",
-                    },
-                    "session": {
-                        "type": "string",
-                        "description": "Target session name (required for attach/detach)",
-                    },
-                },
-            },
-        ),
-        # === LAYOUT ===
-        Tool(
-            name="dump_layout",
-            description="Dump current layout to stdout",
-            inputSchema={"type": "object", "properties": {}},
-        ),
-        Tool(
-            name="swap_layout",
-            description="Swap to next or previous layout",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "direction": {"type": "string", "enum": ["next", "previous"], "description": "Direction"},
-                },
-            },
-        ),
-        # === MODE ===
-        Tool(
-            name="switch_mode",
-            description="Switch input mode for all clients",
-            inputSchema={
-                "type": "object",
-                "properties": {"mode": {**MODE_ENUM, "description": "Input mode"}},
-                "required": ["mode"],
-            },
-        ),
-        # === PLUGINS ===
-        Tool(
-            name="launch_plugin",
-            description="Launch a Zellij plugin",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {"type": "string", "description": "Plugin URL or path"},
-                    "floating": {"type": "boolean", "description": "Launch as floating"},
-                    "in_place": {"type": "boolean", "description": "Launch in place"},
-                    "skip_cache": {"type": "boolean", "description": "Skip plugin cache"},
-                    "configuration": {"type": "object", "description": "Plugin configuration"},
-                },
-                "required": ["url"],
-            },
-        ),
-        Tool(
-            name="pipe",
-            description="Send data to plugins via pipe",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Pipe name"},
-                    "payload": {"type": "string", "description": "Data payload"},
-                    "plugin": {"type": "string", "description": "Target plugin URL"},
-                    "args": {"type": "array", "items": {"type": "string"}, "description": "Additional arguments"},
-                },
-            },
-        ),
-    ])
+    ),
+])
 
 
-@server.call_tool()
-async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
-    """Execute a Zellij control tool."""
-    result: dict[str, Any]
-    session = arguments.pop("session", None)  # Extract session for all tools
+@server.list_tools()
+async def list_tools() -> list[Tool]:
+    """List all Zellij control tools."""
+    return TOOLS
 
-    # === PANE MANAGEMENT ===
-    if name == "new_pane":
-        command = arguments.get("command")
-        start_suspended = arguments.get("start_suspended", False)
-
-        # Use 'zellij run' when command specified (unless explicitly suspended)
-        # 'zellij action new-pane' creates suspended panes in detached sessions
-        if command and not start_suspended:
-            args = ["run"]
-            if arguments.get("floating"):
-                args.append("--floating")
-            if arguments.get("direction"):
-                args.extend(["--direction", arguments["direction"]])
-            if arguments.get("cwd"):
-                args.extend(["--cwd", arguments["cwd"]])
-            if arguments.get("name"):
-                args.extend(["--name", arguments["name"]])
-            if arguments.get("close_on_exit"):
-                args.append("--close-on-exit")
-            # Complex commands need shell wrapping
-            if any(c in command for c in [' ', '|', '&', ';', '>', '<', '$', '`']):
-                args.extend(["--", "bash", "-c", command])
-            else:
-                args.extend(["--", command])
-            result = run_zellij(*args, session=session)
-        else:
-            # No command or explicitly suspended - use new-pane
-            args = ["new-pane"]
-            if arguments.get("floating"):
-                args.append("--floating")
-            if arguments.get("in_place"):
-                args.append("--in-place")
-            if arguments.get("direction"):
-                args.extend(["--direction", arguments["direction"]])
-            if arguments.get("cwd"):
-                args.extend(["--cwd", arguments["cwd"]])
-            if arguments.get("name"):
-                args.extend(["--name", arguments["name"]])
-            if arguments.get("close_on_exit"):
-                args.append("--close-on-exit")
-            if start_suspended:
-                args.append("--start-suspended")
-            if command:
-                if any(c in command for c in [' ', '|', '&', ';', '>', '<', '$', '`']):
-                    args.extend(["--", "bash", "-c", command])
-                else:
-                    args.extend(["--", command])
-            result = zellij_action(*args, session=session)
 
-    elif name == "close_pane":
-        # PROTECTION: Check if focused pane is Claude before closing
-        layout_result = zellij_action("dump-layout", capture=True, session=session)
-        if layout_result.get("success"):
-            panes = parse_layout_panes(layout_result.get("stdout", ""))
-            focused = next((p for p in panes if p.get("focused")), None)
-            if focused and "claude" in (focused.get("name", "") + focused.get("command", "")).lower():
-                result = {"success": False, "error": "Cannot close Claude pane - this would terminate the session"}
-            else:
-                result = zellij_action("close-pane", session=session)
-        else:
-            result = zellij_action("close-pane", session=session)
+# =============================================================================
+# TOOL HANDLERS - Coroutines per tool, dispatched through TOOL_HANDLERS
+# =============================================================================
+
+# === PANE MANAGEMENT ===
+
+# (argument key, CLI flag, flag takes the argument's value)
+_RUN_FLAGS = (
+    ("floating", "--floating", False),
+    ("direction", "--direction", True),
+    ("cwd", "--cwd", True),
+    ("name", "--name", True),
+    ("close_on_exit", "--close-on-exit", False),
+)
+_NEW_PANE_FLAGS = (
+    ("floating", "--floating", False),
+    ("in_place", "--in-place", False),
+    ("direction", "--direction", True),
+    ("cwd", "--cwd", True),
+    ("name", "--name", True),
+    ("close_on_exit", "--close-on-exit", False),
+    ("start_suspended", "--start-suspended", False),
+)
+_NEW_TAB_FLAGS = (
+    ("name", "--name", True),
+    ("layout", "--layout", True),
+    ("cwd", "--cwd", True),
+)
+_SHELL_CHARS = frozenset(" |&;><$`")
+
+
+def cli_flags(arguments: dict[str, Any], table: tuple) -> list[str]:
+    """Translate truthy tool arguments into CLI flags according to table."""
+    return [
+        tok
+        for key, flag, takes_value in table
+        if (value := arguments.get(key))
+        for tok in ((flag, value) if takes_value else (flag,))
+    ]
+
 
-    elif name == "focus_pane":
-        result = zellij_action("move-focus", arguments["direction"], session=session)
+def command_argv(command: str) -> list[str]:
+    """Argv tail running command, shell-wrapped when it needs a shell."""
+    if not _SHELL_CHARS.isdisjoint(command):
+        return ["--", "bash", "-c", command]
+    return ["--", command]
 
-    elif name == "focus_next_pane":
-        result = zellij_action("focus-next-pane", session=session)
 
-    elif name == "focus_previous_pane":
-        result = zellij_action("focus-previous-pane", session=session)
+async def _tool_new_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    command = arguments.get("command")
+    start_suspended = arguments.get("start_suspended", False)
 
-    elif name == "move_pane":
-        if arguments.get("direction"):
-            result = zellij_action("move-pane", arguments["direction"], session=session)
+    # Use 'zellij run' when command specified (unless explicitly suspended)
+    # 'zellij action new-pane' creates suspended panes in detached sessions
+    if command and not start_suspended:
+        args = ["run", *cli_flags(arguments, _RUN_FLAGS), *command_argv(command)]
+        result = await run_zellij(*args, session=session)
+    else:
+        # No command or explicitly suspended - use new-pane
+        args = ["new-pane", *cli_flags(arguments, _NEW_PANE_FLAGS)]
+        if command:
+            args.extend(command_argv(command))
+        result = await zellij_action(*args, session=session)
+    return result
+
+
+async def _tool_close_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # PROTECTION: Check if focused pane is Claude before closing
+    layout_result = await zellij_action("dump-layout", capture=True, session=session)
+    if layout_result.get("success"):
+        panes = _parse_layout_cached(layout_result.get("stdout", ""))
+        focused = next((p for p in panes if p.get("focused")), None)
+        if focused and "claude" in (focused.get("name", "") + focused.get("command", "")).lower():
+            result = {"success": False, "error": "Cannot close Claude pane - this would terminate the session"}
         else:
-            result = zellij_action("move-pane", session=session)
+            result = await zellij_action("close-pane", session=session)
+    else:
+        result = await zellij_action("close-pane", session=session)
+    return result
 
-    elif name == "move_pane_backwards":
-        result = zellij_action("move-pane-backwards", session=session)
 
-    elif name == "resize_pane":
-        action = "increase" if arguments.get("increase", True) else "decrease"
-        result = zellij_action("resize", action, arguments["direction"], session=session)
+async def _tool_focus_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("move-focus", arguments["direction"], session=session)
+    return result
 
-    elif name == "rename_pane":
-        result = zellij_action("rename-pane", arguments["name"], session=session)
 
-    elif name == "undo_rename_pane":
-        result = zellij_action("undo-rename-pane", session=session)
+async def _tool_move_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    direction = arguments.get("direction")
+    if direction:
+        result = await zellij_action("move-pane", direction, session=session)
+    else:
+        result = await zellij_action("move-pane", session=session)
+    return result
 
-    elif name == "toggle_floating":
-        result = zellij_action("toggle-floating-panes", session=session)
 
-    elif name == "toggle_fullscreen":
-        result = zellij_action("toggle-fullscreen", session=session)
+async def _tool_resize_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    action = "increase" if arguments.get("increase", True) else "decrease"
+    direction = arguments["direction"]
+    amount = max(1, int(arguments.get("amount", 1)))
+    if amount == 1:
+        result = await zellij_action("resize", action, direction, session=session)
+    else:
+        # One shell spawn for all steps instead of one zellij process per step
+        step = ["action", "resize", action, direction]
+        result = await run_zellij_batch([step] * amount, session=session)
+    return result
 
-    elif name == "toggle_embed_or_floating":
-        result = zellij_action("toggle-pane-embed-or-floating", session=session)
 
-    elif name == "toggle_pane_frames":
-        result = zellij_action("toggle-pane-frames", session=session)
+async def _tool_rename_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("rename-pane", arguments["name"], session=session)
+    return result
 
-    elif name == "toggle_sync_tab":
-        result = zellij_action("toggle-active-sync-tab", session=session)
 
-    elif name == "stack_panes":
-        result = zellij_action("stack-panes", *arguments["pane_ids"], session=session)
+async def _tool_stack_panes(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("stack-panes", *arguments["pane_ids"], session=session)
+    return result
 
-    # === TAB MANAGEMENT ===
-    elif name == "new_tab":
-        args = ["new-tab"]
-        if arguments.get("name"):
-            args.extend(["--name", arguments["name"]])
-        if arguments.get("layout"):
-            args.extend(["--layout", arguments["layout"]])
-        if arguments.get("cwd"):
-            args.extend(["--cwd", arguments["cwd"]])
-        result = zellij_action(*args, session=session)
-
-    elif name == "close_tab":
-        result = zellij_action("close-tab", session=session)
-
-    elif name == "focus_tab":
-        if "index" in arguments:
-            result = zellij_action("go-to-tab", str(arguments["index"]), session=session)
-        elif "name" in arguments:
-            result = zellij_action("go-to-tab-name", arguments["name"], session=session)
-        elif arguments.get("direction") == "next":
-            result = zellij_action("go-to-next-tab", session=session)
-        elif arguments.get("direction") == "previous":
-            result = zellij_action("go-to-previous-tab", session=session)
-        else:
-            result = {"success": False, "error": "Specify index, name, or direction"}
 
-    elif name == "move_tab":
-        result = zellij_action("move-tab", arguments["direction"], session=session)
+# === TAB MANAGEMENT ===
 
-    elif name == "rename_tab":
-        result = zellij_action("rename-tab", arguments["name"], session=session)
+async def _tool_new_tab(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("new-tab", *cli_flags(arguments, _NEW_TAB_FLAGS), session=session)
+    return result
 
-    elif name == "undo_rename_tab":
-        result = zellij_action("undo-rename-tab", session=session)
 
-    elif name == "query_tab_names":
-        result = zellij_action("query-tab-names", capture=True, session=session)
+async def _tool_focus_tab(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    if "index" in arguments:
+        result = await zellij_action("go-to-tab", str(arguments["index"]), session=session)
+    elif "name" in arguments:
+        result = await zellij_action("go-to-tab-name", arguments["name"], session=session)
+    elif (direction := arguments.get("direction")) == "next":
+        result = await zellij_action("go-to-next-tab", session=session)
+    elif direction == "previous":
+        result = await zellij_action("go-to-previous-tab", session=session)
+    else:
+        result = {"success": False, "error": "Specify index, name, or direction"}
+    return result
 
-    # === SCROLLING ===
-    elif name == "scroll":
-        direction = arguments["direction"]
-        amount = arguments.get("amount", "line")
-
-        if amount == "top" and direction == "up":
-            result = zellij_action("scroll-to-top", session=session)
-        elif amount == "bottom" and direction == "down":
-            result = zellij_action("scroll-to-bottom", session=session)
-        elif amount == "half_page":
-            cmd = "half-page-scroll-up" if direction == "up" else "half-page-scroll-down"
-            result = zellij_action(cmd, session=session)
-        elif amount == "page":
-            cmd = "page-scroll-up" if direction == "up" else "page-scroll-down"
-            result = zellij_action(cmd, session=session)
-        else:  # line
-            cmd = "scroll-up" if direction == "up" else "scroll-down"
-            result = zellij_action(cmd, session=session)
 
-    # === TEXT/COMMAND ===
-    elif name == "write_chars":
-        result = zellij_action("write-chars", arguments["chars"], session=session)
+async def _tool_move_tab(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("move-tab", arguments["direction"], session=session)
+    return result
 
 
-    elif name == "clear_pane":
-        result = zellij_action("clear", session=session)
+async def _tool_rename_tab(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("rename-tab", arguments["name"], session=session)
+    return result
 
-    elif name == "read_pane":
-        # Panes are now in current session (tab-based workspaces)
-        pane_name = arguments.get("pane_name")
 
-        do_strip = arguments.get("strip_ansi", True)
-        tail_lines = arguments.get("tail")
+async def _tool_query_tab_names(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await cached_query(
+        "query_tab_names", session, lambda: zellij_action("query-tab-names", capture=True, session=session)
+    )
+    return result
 
-        # Try to get pane_id for daemon communication
-        pane_id = None
-        if pane_name:
-            registered_pane = state.get_pane(pane_name)
-            if registered_pane and registered_pane.pane_id:
-                pane_id = registered_pane.pane_id
-            elif is_plugin_available():
-                # Try to find pane_id via plugin
-                pane_id = plugin_find_pane_id(pane_name, session=session)
-                # Update registered pane with discovered pane_id
-                if pane_id and registered_pane:
-                    registered_pane.pane_id = pane_id
-
-        # Try daemon first for focus-free reads (auto-start if needed, cross-session support)
-        daemon_result = None
-        if pane_id and ensure_session_daemon(session):
-            daemon_result = daemon_read_pane(
-                pane_id,
-                full=arguments.get("full", False),
-                tail=tail_lines,
-                session=session
-            )
 
-        if daemon_result and daemon_result.get("success"):
-            content = daemon_result.get("content", "")
-            if do_strip:
-                content = strip_ansi(content)
-            result = {"success": True, "content": content, "method": "daemon",
-                      "pane_id": pane_id}
-        else:
-            # Fall back to dump-screen method (requires focus)
-            async def do_read():
-                args = ["dump-screen", "/dev/stdout"]
-                if arguments.get("full"):
-                    args.append("--full")
-                return zellij_action(*args, capture=True, session=session)
+# === SCROLLING ===
+
+async def _tool_scroll(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    direction = arguments["direction"]
+    amount = arguments.get("amount", "line")
+
+    if amount == "top" and direction == "up":
+        result = await zellij_action("scroll-to-top", session=session)
+    elif amount == "bottom" and direction == "down":
+        result = await zellij_action("scroll-to-bottom", session=session)
+    elif amount == "half_page":
+        cmd = "half-page-scroll-up" if direction == "up" else "half-page-scroll-down"
+        result = await zellij_action(cmd, session=session)
+    elif amount == "page":
+        cmd = "page-scroll-up" if direction == "up" else "page-scroll-down"
+        result = await zellij_action(cmd, session=session)
+    else:  # line
+        cmd = "scroll-up" if direction == "up" else "scroll-down"
+        result = await zellij_action(cmd, session=session)
+    return result
 
-            if pane_name:
-                if pane_id is not None:
-                    # Focus via plugin, then read
-                    focus_result = plugin_command("focus", {"pane_id": pane_id}, session=session)
-                    if focus_result.get("success"):
-                        result = await do_read()
-                        result["method"] = "plugin_focus"
-                    else:
-                        result = await with_pane_focus(pane_name, do_read, session=session)
-                        result["method"] = "focus_fallback"
+
+# === TEXT/COMMAND ===
+
+async def _tool_write_chars(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("write-chars", arguments["chars"], session=session)
+    return result
+
+
+async def _tool_write_lines(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Single write-chars for the whole batch instead of one call per line
+    payload = "\n".join(arguments["lines"]) + "\n"
+    result = await zellij_action("write-chars", payload, session=session)
+    return result
+
+
+async def _tool_focus_then_write(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await run_zellij_batch([
+        ["action", "move-focus", arguments["direction"]],
+        ["action", "write-chars", arguments["chars"]],
+    ], session=session)
+    return result
+
+
+async def _tool_read_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are now in current session (tab-based workspaces)
+    pane_name = arguments.get("pane_name")
+
+    do_strip = arguments.get("strip_ansi", True)
+    tail_lines = arguments.get("tail")
+    full = arguments.get("full", False)
+
+    # Try to get pane_id for daemon communication
+    pane_id = None
+    if pane_name:
+        registered_pane = state.get_pane(pane_name)
+        if registered_pane and registered_pane.pane_id:
+            pane_id = registered_pane.pane_id
+        elif is_plugin_available():
+            # Try to find pane_id via plugin
+            pane_id = await plugin_find_pane_id(pane_name, session=session)
+            # Update registered pane with discovered pane_id
+            if pane_id and registered_pane:
+                registered_pane.pane_id = pane_id
+
+    # Try daemon first for focus-free reads (auto-start if needed, cross-session support)
+    daemon_result = None
+    if pane_id and await ensure_session_daemon(session):
+        daemon_result = await daemon_read_pane(
+            pane_id,
+            full=full,
+            tail=tail_lines,
+            session=session
+        )
+
+    if daemon_result and daemon_result.get("success"):
+        content = daemon_result.get("content", "")
+        if do_strip:
+            content = strip_ansi(content)
+        result = {"success": True, "content": content, "method": "daemon",
+                  "pane_id": pane_id}
+    else:
+        # Fall back to dump-screen method (requires focus)
+        async def do_read():
+            args = ["dump-screen", "/dev/stdout"]
+            if full:
+                args.append("--full")
+            return await zellij_action(*args, capture=True, session=session)
+
+        if pane_name:
+            if pane_id is not None:
+                # Focus via plugin, then read
+                focus_result = await plugin_command("focus", {"pane_id": pane_id}, session=session)
+                if focus_result.get("success"):
+                    result = await do_read()
+                    result["method"] = "plugin_focus"
                 else:
-                    # Pane not found via plugin, try focus method
                     result = await with_pane_focus(pane_name, do_read, session=session)
-                    result["method"] = "focus"
+                    result["method"] = "focus_fallback"
             else:
-                result = await do_read()
-
-            # Post-process output
-            if result.get("success") and result.get("stdout"):
-                content = result["stdout"]
-                if do_strip:
-                    content = strip_ansi(content)
-                if tail_lines:
-                    lines = content.split('\n')
-                    content = '\n'.join(lines[-tail_lines:])
-                result["content"] = content
-
-    elif name == "list_panes":
-        layout_result = zellij_action("dump-layout", capture=True, session=session)
-        if layout_result.get("success"):
-            panes = parse_layout_panes(layout_result.get("stdout", ""))
-            result = {"success": True, "panes": panes}
+                # Pane not found via plugin, try focus method
+                result = await with_pane_focus(pane_name, do_read, session=session)
+                result["method"] = "focus"
         else:
-            result = layout_result
+            result = await do_read()
 
-    elif name == "focus_pane_by_name":
-        target_name = arguments["name"].lower()
-        layout_result = zellij_action("dump-layout", capture=True, session=session)
-        if not layout_result.get("success"):
-            result = layout_result
-        else:
-            panes = parse_layout_panes(layout_result.get("stdout", ""))
-            target_pane = find_pane_by_name(panes, arguments["name"])
+        # Post-process output
+        if result.get("success") and result.get("stdout"):
+            content = result["stdout"]
+            if do_strip:
+                content = strip_ansi(content)
+            if tail_lines:
+                content = tail_text(content, tail_lines)
+            result["content"] = content
+    return result
 
-            if not target_pane:
-                result = {"success": False, "error": f"Pane '{arguments['name']}' not found", "available": panes}
-            elif target_pane.get("focused"):
-                result = {"success": True, "message": "Pane already focused"}
-            else:
-                if not target_pane.get("tab_focused"):
-                    tab_result = zellij_action("go-to-tab-name", target_pane["tab"], session=session)
-                    if not tab_result.get("success"):
-                        result = tab_result
-                    else:
-                        result = {"success": True, "message": f"Switched to tab '{target_pane['tab']}' containing pane", "pane": target_pane}
-                else:
-                    result = {"success": True, "message": "Pane is in current tab - use direction keys to navigate", "pane": target_pane}
 
-    elif name == "write_to_pane":
-        # Panes are in current session (tab-based workspaces)
+async def _tool_list_panes(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    layout_result = await zellij_action("dump-layout", capture=True, session=session)
+    if layout_result.get("success"):
+        panes = _parse_layout_cached(layout_result.get("stdout", ""))
+        result = {"success": True, "panes": panes}
+    else:
+        result = layout_result
+    return result
 
-        pane_name = arguments["pane_name"]
-        chars = arguments["chars"]
-        if arguments.get("press_enter"):
-            chars += "\n"
 
-        # Try plugin first (no focus stealing)
-        if is_plugin_available():
-            pane_id = plugin_find_pane_id(pane_name, session=session)
-            if pane_id is not None:
-                result = plugin_write_to_pane(pane_id, chars, session=session)
-                if result.get("success"):
-                    result["method"] = "plugin"
+async def _tool_focus_pane_by_name(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    pane_name = arguments["name"]
+    layout_result = await zellij_action("dump-layout", capture=True, session=session)
+    if not layout_result.get("success"):
+        result = layout_result
+    else:
+        panes = _parse_layout_cached(layout_result.get("stdout", ""))
+        target_pane = find_pane_by_name(panes, pane_name)
+
+        if not target_pane:
+            result = {"success": False, "error": f"Pane '{pane_name}' not found", "available": panes}
+        elif target_pane.get("focused"):
+            result = {"success": True, "message": "Pane already focused"}
+        else:
+            if not target_pane.get("tab_focused"):
+                tab_result = await zellij_action("go-to-tab-name", target_pane["tab"], session=session)
+                if not tab_result.get("success"):
+                    result = tab_result
                 else:
-                    # Plugin failed, fall back to focus method
-                    async def do_write():
-                        return zellij_action("write-chars", chars, session=session)
-                    result = await with_pane_focus(pane_name, do_write, session=session)
-                    result["method"] = "focus_fallback"
+                    result = {"success": True, "message": f"Switched to tab '{target_pane['tab']}' containing pane", "pane": target_pane}
             else:
-                # Pane not found via plugin, try focus method
+                result = {"success": True, "message": "Pane is in current tab - use direction keys to navigate", "pane": target_pane}
+    return result
+
+
+async def _tool_write_to_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+
+    pane_name = arguments["pane_name"]
+    chars = arguments["chars"]
+    if arguments.get("press_enter"):
+        chars += "\n"
+
+    # Try plugin first (no focus stealing)
+    if is_plugin_available():
+        pane_id = await plugin_find_pane_id(pane_name, session=session)
+        if pane_id is not None:
+            result = await plugin_write_to_pane(pane_id, chars, session=session)
+            if result.get("success"):
+                result["method"] = "plugin"
+            else:
+                # Plugin failed, fall back to focus method
                 async def do_write():
-                    return zellij_action("write-chars", chars, session=session)
+                    return await zellij_action("write-chars", chars, session=session)
                 result = await with_pane_focus(pane_name, do_write, session=session)
-                result["method"] = "focus"
+                result["method"] = "focus_fallback"
         else:
-            # Plugin not available, use focus method
+            # Pane not found via plugin, try focus method
             async def do_write():
-                return zellij_action("write-chars", chars, session=session)
+                return await zellij_action("write-chars", chars, session=session)
             result = await with_pane_focus(pane_name, do_write, session=session)
             result["method"] = "focus"
+    else:
+        # Plugin not available, use focus method
+        async def do_write():
+            return await zellij_action("write-chars", chars, session=session)
+        result = await with_pane_focus(pane_name, do_write, session=session)
+        result["method"] = "focus"
+    return result
 
-    elif name == "send_keys":
-        # Panes are in current session (tab-based workspaces)
-        pane_name = arguments.get("pane_name")
 
-        keys = arguments["keys"].lower()
-        repeat = arguments.get("repeat", 1)
+async def _tool_send_keys(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+    pane_name = arguments.get("pane_name")
 
-        if keys not in KEY_SEQUENCES:
-            result = {"success": False, "error": f"Unknown key: {keys}",
-                      "available": list(KEY_SEQUENCES.keys())}
-        else:
-            byte_seq = KEY_SEQUENCES[keys] * repeat
-            byte_args = [str(b) for b in byte_seq]
+    keys = arguments["keys"]
+    repeat = arguments.get("repeat", 1)
 
-            async def do_send():
-                return zellij_action("write", *byte_args, session=session)
+    # Names are usually sent lowercase already; only lower() on a miss
+    key_seq = KEY_SEQUENCES.get(keys)
+    if key_seq is None:
+        keys = keys.lower()
+        key_seq = KEY_SEQUENCES.get(keys)
 
-            if pane_name:
-                # Try plugin first (no focus stealing)
-                if is_plugin_available():
-                    pane_id = plugin_find_pane_id(pane_name)
-                    if pane_id is not None:
-                        result = plugin_command("write_bytes", {"pane_id": pane_id, "bytes": byte_seq})
-                        if result.get("success"):
-                            result["method"] = "plugin"
-                        else:
-                            result = await with_pane_focus(pane_name, do_send, session=session)
-                            result["method"] = "focus_fallback"
+    if key_seq is None:
+        result = {"success": False, "error": f"Unknown key: {keys}",
+                  "available": list(KEY_SEQUENCES.keys())}
+    else:
+        byte_seq = key_seq * repeat
+        byte_args = KEY_WRITE_ARGS[keys] * repeat
+
+        async def do_send():
+            return await zellij_action("write", *byte_args, session=session)
+
+        if pane_name:
+            # Try plugin first (no focus stealing)
+            if is_plugin_available():
+                pane_id = await plugin_find_pane_id(pane_name)
+                if pane_id is not None:
+                    result = await plugin_command("write_bytes", {"pane_id": pane_id, "bytes": list(byte_seq)})
+                    if result.get("success"):
+                        result["method"] = "plugin"
                     else:
                         result = await with_pane_focus(pane_name, do_send, session=session)
-                        result["method"] = "focus"
+                        result["method"] = "focus_fallback"
                 else:
                     result = await with_pane_focus(pane_name, do_send, session=session)
                     result["method"] = "focus"
             else:
-                result = await do_send()
-
-    elif name == "search_pane":
-        # Panes are in current session (tab-based workspaces)
-        pane_name = arguments.get("pane_name")
+                result = await with_pane_focus(pane_name, do_send, session=session)
+                result["method"] = "focus"
+        else:
+            result = await do_send()
+    return result
 
-        pattern = arguments["pattern"]
-        context = arguments.get("context", 0)
 
-        async def do_read():
-            args = ["dump-screen", "/dev/stdout"]
-            if arguments.get("full", True):
-                args.append("--full")
-            return zellij_action(*args, capture=True, session=session)
+# Constructs whose meaning changes between a single line and the whole dump:
+# \A/\Z, lookarounds (they can see the newline) and atomic groups/possessive
+# quantifiers (they can swallow it without backtracking)
+_WHOLE_TEXT_ONLY_RE = re.compile(r'\\[AZ]|\(\?(?:<?[=!]|>)|[*+?}]\+')
 
-        if pane_name:
-            read_result = await with_pane_focus(pane_name, do_read, session=session)
-        else:
-            read_result = await do_read()
 
-        if not read_result.get("success"):
-            result = read_result
-        else:
-            content = strip_ansi(read_result.get("stdout", ""))
-            lines = content.split('\n')
-            matches = []
-            try:
-                regex = re.compile(pattern, re.IGNORECASE)
-                for i, line in enumerate(lines):
-                    if regex.search(line):
-                        start = max(0, i - context)
-                        end = min(len(lines), i + context + 1)
-                        matches.append({
-                            "line_number": i + 1,
-                            "match": line,
-                            "context": lines[start:end] if context > 0 else None,
-                        })
-                result = {"success": True, "matches": matches, "count": len(matches)}
-            except re.error as e:
-                result = {"success": False, "error": f"Invalid regex: {e}"}
+def matching_lines(pattern: str, flags: int, content: str) -> list[tuple[int, str]]:
+    """(index, line) for every line of content that pattern matches.
 
-    # === MONITORING ===
-    elif name == "wait_for_output":
-        # Panes are in current session (tab-based workspaces)
-        pane_name = arguments.get("pane_name")
+    One MULTILINE scan over the whole text finds candidate lines, and each is
+    confirmed with the per-line pattern, so lines without a match are never
+    split out or searched one by one.
+    """
+    regex = _compile_pattern(pattern, flags)
+    if _WHOLE_TEXT_ONLY_RE.search(pattern):
+        return [(i, line) for i, line in enumerate(content.split('\n')) if regex.search(line)]
+
+    hits = []
+    line_idx, line_off = 0, 0  # line containing the current scan position
+    next_unchecked = 0
+    for m in _compile_pattern(pattern, flags | re.MULTILINE).finditer(content):
+        start, end = m.start(), max(m.end() - 1, m.start())
+        # Advance to the line holding the match start
+        skipped = content.count('\n', line_off, start)
+        if skipped:
+            line_idx += skipped
+            line_off = content.rfind('\n', line_off, start) + 1
+        # Confirm each line the match touches that hasn't been checked yet
+        idx, off = line_idx, line_off
+        while True:
+            eol = content.find('\n', off)
+            if eol == -1:
+                eol = len(content)
+            if idx >= next_unchecked:
+                line = content[off:eol]
+                if regex.search(line):
+                    hits.append((idx, line))
+                next_unchecked = idx + 1
+            if eol >= end or eol == len(content):
+                break
+            idx, off = idx + 1, eol + 1
+    return hits
+
+
+async def _tool_search_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+    pane_name = arguments.get("pane_name")
+
+    pattern = arguments["pattern"]
+    context = arguments.get("context", 0)
 
-        pattern = arguments["pattern"]
-        timeout = arguments.get("timeout", 30)
-        poll_interval = arguments.get("poll_interval", 1.0)
+    async def do_read():
+        args = ["dump-screen", "/dev/stdout"]
+        if arguments.get("full", True):
+            args.append("--full")
+        return await zellij_action(*args, capture=True, session=session)
 
-        async def do_read():
-            args = ["dump-screen", "/dev/stdout"]
-            return zellij_action(*args, capture=True, session=session)
+    if pane_name:
+        read_result = await with_pane_focus(pane_name, do_read, session=session)
+    else:
+        read_result = await do_read()
 
-        start_time = time.time()
+    if not read_result.get("success"):
+        result = read_result
+    else:
+        content = strip_ansi(read_result.get("stdout", ""))
+        matches = []
         try:
-            regex = re.compile(pattern)
+            hits = matching_lines(pattern, re.IGNORECASE, content)
+            # Context needs neighbouring lines; only split when it's asked for
+            lines = content.split('\n') if context > 0 and hits else None
+            for i, line in hits:
+                matches.append({
+                    "line_number": i + 1,
+                    "match": line,
+                    "context": lines[max(0, i - context):i + context + 1] if lines else None,
+                })
+            result = {"success": True, "matches": matches, "count": len(matches)}
         except re.error as e:
             result = {"success": False, "error": f"Invalid regex: {e}"}
-        else:
-            matched = False
-            match_text = None
-            last_content = ""
-
-            while time.time() - start_time < timeout:
-                if pane_name:
-                    read_result = await with_pane_focus(pane_name, do_read, session=session)
-                else:
-                    read_result = await do_read()
-
-                if read_result.get("success"):
-                    content = strip_ansi(read_result.get("stdout", ""))
-                    last_content = content
-                    match = regex.search(content)
-                    if match:
-                        matched = True
-                        match_text = match.group(0)
-                        break
+    return result
 
-                await asyncio.sleep(poll_interval)
 
-            elapsed = time.time() - start_time
-            result = {
-                "success": True,
-                "matched": matched,
-                "match": match_text,
-                "elapsed": round(elapsed, 2),
-                "output": last_content[-2000:] if len(last_content) > 2000 else last_content,
-            }
+# === MONITORING ===
 
-    elif name == "wait_for_idle":
-        # Panes are in current session (tab-based workspaces)
-        pane_name = arguments.get("pane_name")
+async def _tool_wait_for_output(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+    pane_name = arguments.get("pane_name")
 
-        stable_seconds = arguments.get("stable_seconds", 3.0)
-        timeout = arguments.get("timeout", 60)
-        poll_interval = arguments.get("poll_interval", 1.0)
+    pattern = arguments["pattern"]
+    timeout = arguments.get("timeout", 30)
+    poll_interval = arguments.get("poll_interval", 1.0)
 
-        async def do_read():
-            args = ["dump-screen", "/dev/stdout"]
-            return zellij_action(*args, capture=True, session=session)
+    async def do_read():
+        args = ["dump-screen", "/dev/stdout"]
+        return await zellij_action(*args, capture=True, session=session)
 
-        start_time = time.time()
-        last_hash = None
-        stable_since = None
-        # Initialize result for safety (handles case where all reads fail)
-        result = {"success": False, "error": "Timeout waiting for idle", "timeout": True}
+    start_time = time.time()
+    try:
+        regex = _compile_pattern(pattern)
+    except re.error as e:
+        result = {"success": False, "error": f"Invalid regex: {e}"}
+    else:
+        matched = False
+        match_text = None
+        last_content = ""
+        panes = await layout_panes(session) if pane_name else None
+        # Start fast and back off to poll_interval, as wait_for_prompt does
+        interval = min(0.1, poll_interval)
 
         while time.time() - start_time < timeout:
             if pane_name:
-                read_result = await with_pane_focus(pane_name, do_read, session=session)
+                read_result = await with_pane_focus(pane_name, do_read, session=session, panes=panes)
             else:
                 read_result = await do_read()
 
             if read_result.get("success"):
                 content = strip_ansi(read_result.get("stdout", ""))
-                current_hash = hashlib.md5(content.encode()).hexdigest()
-
-                if current_hash == last_hash:
-                    if stable_since is None:
-                        stable_since = time.time()
-                    elif time.time() - stable_since >= stable_seconds:
-                        result = {
-                            "success": True,
-                            "idle": True,
-                            "elapsed": round(time.time() - start_time, 2),
-                            "output": content[-2000:],
-                        }
-                        break
-                else:
-                    stable_since = None
-                    last_hash = current_hash
+                last_content = content
+                match = regex.search(content)
+                if match:
+                    matched = True
+                    match_text = match.group(0)
+                    break
+
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, poll_interval)
+
+        elapsed = time.time() - start_time
+        result = {
+            "success": True,
+            "matched": matched,
+            "match": match_text,
+            "elapsed": round(elapsed, 2),
+            "output": last_content[-2000:] if len(last_content) > 2000 else last_content,
+        }
+    return result
+
+
+async def _tool_wait_for_idle(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+    pane_name = arguments.get("pane_name")
+
+    stable_seconds = arguments.get("stable_seconds", 3.0)
+    timeout = arguments.get("timeout", 60)
+    poll_interval = arguments.get("poll_interval", 1.0)
+
+    async def do_read():
+        args = ["dump-screen", "/dev/stdout"]
+        return await zellij_action(*args, capture=True, session=session)
+
+    start_time = time.time()
+    last_content = None
+    stable_since = None
+    # Initialize result for safety (handles case where all reads fail)
+    result = {"success": False, "error": "Timeout waiting for idle", "timeout": True}
+    panes = await layout_panes(session) if pane_name else None
+    interval = min(0.1, poll_interval)
+
+    while time.time() - start_time < timeout:
+        if pane_name:
+            read_result = await with_pane_focus(pane_name, do_read, session=session, panes=panes)
+        else:
+            read_result = await do_read()
+
+        if read_result.get("success"):
+            content = strip_ansi(read_result.get("stdout", ""))
+            # Plain equality: a length mismatch rejects in O(1), and an unchanged
+            # screen is one memcmp - no need to hash the whole dump every poll
+            if content == last_content:
+                if stable_since is None:
+                    stable_since = time.time()
+                elif time.time() - stable_since >= stable_seconds:
+                    result = {
+                        "success": True,
+                        "idle": True,
+                        "elapsed": round(time.time() - start_time, 2),
+                        "output": content[-2000:],
+                    }
+                    break
+            else:
+                stable_since = None
+                last_content = content
+
+        await asyncio.sleep(interval)
+        interval = min(interval * 1.5, poll_interval)
+    else:
+        result = {
+            "success": True,
+            "idle": False,
+            "elapsed": timeout,
+            "message": "Timeout waiting for idle",
+        }
+    return result
+
 
-            await asyncio.sleep(poll_interval)
+async def _tool_tail_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+    pane_name = arguments.get("pane_name")
+    reset = arguments.get("reset", False)
+
+    # Try to get pane_id for daemon communication
+    pane_id = None
+    registered_pane = state.get_pane(pane_name) if pane_name else None
+    if registered_pane and registered_pane.pane_id:
+        pane_id = registered_pane.pane_id
+    elif pane_name and is_plugin_available():
+        pane_id = await plugin_find_pane_id(pane_name, session=session)
+        if pane_id and registered_pane:
+            registered_pane.pane_id = pane_id
+
+    # Try daemon first for focus-free reads (auto-start if needed, cross-session support)
+    daemon_content = None
+    method = "dump-screen"
+    if pane_id and await ensure_session_daemon(session):
+        daemon_result = await daemon_read_pane(pane_id, full=True, session=session)
+        if daemon_result.get("success"):
+            daemon_content = strip_ansi(daemon_result.get("content", ""))
+            method = "daemon"
+
+    if daemon_content is not None:
+        # Use daemon content
+        # Count lines and slice off only the unread tail; no full split
+        current_count = daemon_content.count('\n') + 1
+        cursor_key = f"{_resolve_session_key(session)}:{pane_name}"
+
+        if reset:
+            state.pane_cursors[cursor_key] = current_count
+            result = {"success": True, "reset": True, "line_count": current_count,
+                      "method": method}
         else:
+            new_count = max(current_count - state.pane_cursors.get(cursor_key, 0), 0)
+            state.pane_cursors[cursor_key] = current_count
             result = {
                 "success": True,
-                "idle": False,
-                "elapsed": timeout,
-                "message": "Timeout waiting for idle",
+                "new_output": tail_text(daemon_content, new_count) if new_count else "",
+                "lines_read": new_count,
+                "method": method,
             }
+    else:
+        # Fall back to dump-screen method
+        async def do_read():
+            args = ["dump-screen", "/dev/stdout", "--full"]
+            return await zellij_action(*args, capture=True, session=session)
 
-    elif name == "tail_pane":
-        # Panes are in current session (tab-based workspaces)
-        pane_name = arguments.get("pane_name")
-        reset = arguments.get("reset", False)
+        if pane_name:
+            read_result = await with_pane_focus(pane_name, do_read, session=session)
+        else:
+            read_result = await do_read()
+            pane_name = "_focused"  # Use distinct key for focused pane
 
-        # Try to get pane_id for daemon communication
-        pane_id = None
-        registered_pane = state.get_pane(pane_name) if pane_name else None
-        if registered_pane and registered_pane.pane_id:
-            pane_id = registered_pane.pane_id
-        elif pane_name and is_plugin_available():
-            pane_id = plugin_find_pane_id(pane_name, session=session)
-            if pane_id and registered_pane:
-                registered_pane.pane_id = pane_id
+        if not read_result.get("success"):
+            result = read_result
+        else:
+            content = strip_ansi(read_result.get("stdout", ""))
+            current_count = content.count('\n') + 1
 
-        # Try daemon first for focus-free reads (auto-start if needed, cross-session support)
-        daemon_content = None
-        method = "dump-screen"
-        if pane_id and ensure_session_daemon(session):
-            daemon_result = daemon_read_pane(pane_id, full=True, session=session)
-            if daemon_result.get("success"):
-                daemon_content = strip_ansi(daemon_result.get("content", ""))
-                method = "daemon"
-
-        if daemon_content is not None:
-            # Use daemon content
-            lines = daemon_content.split('\n')
-            current_count = len(lines)
+            # Use session-qualified key to avoid collisions between same pane names in different sessions
             cursor_key = f"{_resolve_session_key(session)}:{pane_name}"
 
             if reset:
                 state.pane_cursors[cursor_key] = current_count
-                result = {"success": True, "reset": True, "line_count": current_count,
-                          "method": method}
+                result = {"success": True, "reset": True, "line_count": current_count}
             else:
-                cursor = state.pane_cursors.get(cursor_key, 0)
-                new_lines = lines[cursor:] if cursor < current_count else []
+                new_count = max(current_count - state.pane_cursors.get(cursor_key, 0), 0)
                 state.pane_cursors[cursor_key] = current_count
                 result = {
                     "success": True,
-                    "new_output": '\n'.join(new_lines),
-                    "lines_read": len(new_lines),
-                    "method": method,
+                    "new_output": tail_text(content, new_count) if new_count else "",
+                    "lines_read": new_count,
                 }
-        else:
-            # Fall back to dump-screen method
-            async def do_read():
-                args = ["dump-screen", "/dev/stdout", "--full"]
-                return zellij_action(*args, capture=True, session=session)
-
-            if pane_name:
-                read_result = await with_pane_focus(pane_name, do_read, session=session)
-            else:
-                read_result = await do_read()
-                pane_name = "_focused"  # Use distinct key for focused pane
+    return result
 
-            if not read_result.get("success"):
-                result = read_result
-            else:
-                content = strip_ansi(read_result.get("stdout", ""))
-                lines = content.split('\n')
-                current_count = len(lines)
 
-                # Use session-qualified key to avoid collisions between same pane names in different sessions
-                cursor_key = f"{_resolve_session_key(session)}:{pane_name}"
+# === COMPOUND OPERATIONS ===
 
-                if reset:
-                    state.pane_cursors[cursor_key] = current_count
-                    result = {"success": True, "reset": True, "line_count": current_count}
-                else:
-                    cursor = state.pane_cursors.get(cursor_key, 0)
-                    new_lines = lines[cursor:] if cursor < current_count else []
-                    state.pane_cursors[cursor_key] = current_count
-                    result = {
-                        "success": True,
-                        "new_output": '\n'.join(new_lines),
-                        "lines_read": len(new_lines),
-                    }
+async def _tool_run_in_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
 
-    # === COMPOUND OPERATIONS ===
-    elif name == "run_in_pane":
-        # Panes are in current session (tab-based workspaces)
+    pane_name = arguments["pane_name"]
+    command = arguments["command"]
+    wait = arguments.get("wait", True)
+    timeout = arguments.get("timeout", 30)
+    capture = arguments.get("capture", True)
+    prompt_pattern = arguments.get("prompt_pattern", _SHELL_PROMPT_RE)
 
-        pane_name = arguments["pane_name"]
-        command = arguments["command"]
-        wait = arguments.get("wait", True)
-        timeout = arguments.get("timeout", 30)
-        capture = arguments.get("capture", True)
-        prompt_pattern = arguments.get("prompt_pattern", r"[\$#>]\s*$")
+    # Write the command
+    async def do_write():
+        return await zellij_action("write-chars", command + "\n", session=session)
 
-        # Write the command
-        async def do_write():
-            return zellij_action("write-chars", command + "\n", session=session)
+    write_result = await with_pane_focus(pane_name, do_write, session=session)
+    if not write_result.get("success"):
+        result = write_result
+    elif not wait:
+        result = {"success": True, "message": "Command sent", "wait": False}
+    else:
+        # Wait for prompt using shared helper
+        await asyncio.sleep(0.5)  # Initial delay
+        wait_result = await wait_for_prompt(
+            pane_name, prompt_pattern, timeout, session=session, check_lines=5
+        )
+        result = {
+            "success": True,
+            "completed": wait_result.get("completed", False),
+            "elapsed": wait_result.get("elapsed", 0),
+        }
+        if capture:
+            result["output"] = wait_result.get("output", "")
+    return result
 
-        write_result = await with_pane_focus(pane_name, do_write, session=session)
-        if not write_result.get("success"):
-            result = write_result
-        elif not wait:
-            result = {"success": True, "message": "Command sent", "wait": False}
-        else:
-            # Wait for prompt using shared helper
-            await asyncio.sleep(0.5)  # Initial delay
-            wait_result = await wait_for_prompt(
-                pane_name, prompt_pattern, timeout, session=session, check_lines=5
-            )
-            result = {
-                "success": True,
-                "completed": wait_result.get("completed", False),
-                "elapsed": wait_result.get("elapsed", 0),
-            }
-            if capture:
-                result["output"] = wait_result.get("output", "")
 
-    elif name == "create_named_pane":
-        # Use current session by default - pane creation doesn't work in detached sessions
-        # User can explicitly specify session if needed
-        # Invalidate cache since we may mutate layout
-        layout_cache.invalidate(session)
+async def _tool_create_named_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Use current session by default - pane creation doesn't work in detached sessions
+    # User can explicitly specify session if needed
+    # Invalidate cache since we may mutate layout
+    layout_cache.invalidate(session)
 
-        pane_name = arguments["name"]
-        command = arguments.get("command")
-        tab = arguments.get("tab")
-        direction = arguments.get("direction")
-        floating = arguments.get("floating", False)
-        cwd = arguments.get("cwd")
+    pane_name = arguments["name"]
+    command = arguments.get("command")
+    tab = arguments.get("tab")
+    direction = arguments.get("direction")
+    floating = arguments.get("floating", False)
+    cwd = arguments.get("cwd")
 
-        result = None  # Initialize to catch unexpected states
+    result = None  # Initialize to catch unexpected states
 
-        # Check if pane already exists
-        existing = state.get_pane(pane_name)
-        if existing:
-            # Verify it still exists in layout
-            layout_result = zellij_action("dump-layout", capture=True, session=session)
-            if layout_result.get("success"):
-                panes = parse_layout_panes(layout_result.get("stdout", ""))
-                found = find_pane_by_name(panes, pane_name)
-                if found:
-                    result = {"success": True, "exists": True, "pane": existing.__dict__}
-                else:
-                    state.unregister_pane(pane_name)
-                    existing = None
+    # Check if pane already exists
+    existing = state.get_pane(pane_name)
+    if existing:
+        # Verify it still exists in layout
+        layout_result = await zellij_action("dump-layout", capture=True, session=session)
+        if layout_result.get("success"):
+            panes = _parse_layout_cached(layout_result.get("stdout", ""))
+            found = find_pane_by_name(panes, pane_name)
+            if found:
+                result = {"success": True, "exists": True, "pane": asdict(existing)}
             else:
-                # Layout check failed, can't verify - assume stale and recreate
                 state.unregister_pane(pane_name)
                 existing = None
+        else:
+            # Layout check failed, can't verify - assume stale and recreate
+            state.unregister_pane(pane_name)
+            existing = None
 
-        if not existing:
-            # Create the tab if needed
-            if tab:
-                layout_result = zellij_action("dump-layout", capture=True, session=session)
-                tab_exists = False
-                if layout_result.get("success"):
-                    if f'name="{tab}"' in layout_result.get("stdout", ""):
-                        tab_exists = True
-                if not tab_exists:
-                    zellij_action("new-tab", "--name", tab, session=session)
-                else:
-                    zellij_action("go-to-tab-name", tab, session=session)
-
-            # Smart grid layout: calculate direction if not specified
-            if not direction and not floating:
-                # Count existing panes in session
-                layout_result = zellij_action("dump-layout", capture=True, session=session)
-                if layout_result.get("success"):
-                    panes = parse_layout_panes(layout_result.get("stdout", ""))
-                    direction = calculate_grid_direction(len(panes))
-
-            # Count panes before creation (to determine new pane's index)
-            # Use the target tab name (we know what tab we're creating in)
-            target_tab_name = tab if tab else None
-            pre_layout = zellij_action("dump-layout", capture=True, session=session)
-            pre_pane_count = 0
-            if pre_layout.get("success"):
-                pre_panes = parse_layout_panes(pre_layout.get("stdout", ""))
-                # If no explicit tab, find the focused tab
-                if not target_tab_name:
-                    for p in pre_panes:
-                        if p.get("tab_focused"):
-                            target_tab_name = p.get("tab")
-                            break
-                    if not target_tab_name and pre_panes:
-                        target_tab_name = pre_panes[0].get("tab")
-                # Count panes in TARGET tab (excluding plugins)
-                tab_panes = [p for p in pre_panes
-                             if p.get("tab") == target_tab_name
-                             and not (p.get("command") and "plugin" in str(p.get("command", "")))]
-                pre_pane_count = len(tab_panes)
-
-            # Create the pane using 'action new-pane' (works in detached sessions)
-            args = ["action", "new-pane", "--name", pane_name]
-            if floating:
-                args.append("--floating")
-            if direction:
-                args.extend(["--direction", direction])
-            if cwd:
-                args.extend(["--cwd", cwd])
+    if not existing:
+        # Create the tab if needed
+        if tab:
+            layout_result = await zellij_action("dump-layout", capture=True, session=session)
+            tab_exists = False
+            if layout_result.get("success"):
+                if f'name="{tab}"' in layout_result.get("stdout", ""):
+                    tab_exists = True
+            if not tab_exists:
+                await zellij_action("new-tab", "--name", tab, session=session)
+            else:
+                await zellij_action("go-to-tab-name", tab, session=session)
+
+        # Smart grid layout: calculate direction if not specified
+        if not direction and not floating:
+            # Count existing panes in session
+            layout_result = await zellij_action("dump-layout", capture=True, session=session)
+            if layout_result.get("success"):
+                panes = _parse_layout_cached(layout_result.get("stdout", ""))
+                direction = calculate_grid_direction(len(panes))
+
+        # Count panes before creation (to determine new pane's index)
+        # Use the target tab name (we know what tab we're creating in)
+        target_tab_name = tab if tab else None
+        pre_layout = await zellij_action("dump-layout", capture=True, session=session)
+        pre_pane_count = 0
+        if pre_layout.get("success"):
+            pre_panes = _parse_layout_cached(pre_layout.get("stdout", ""))
+            # If no explicit tab, find the focused tab
+            if not target_tab_name:
+                for p in pre_panes:
+                    if p.get("tab_focused"):
+                        target_tab_name = p.get("tab")
+                        break
+                if not target_tab_name and pre_panes:
+                    target_tab_name = pre_panes[0].get("tab")
+            # Count panes in TARGET tab (excluding plugins)
+            tab_panes = [p for p in pre_panes
+                         if p.get("tab") == target_tab_name
+                         and not (p.get("command") and "plugin" in str(p.get("command", "")))]
+            pre_pane_count = len(tab_panes)
+
+        # Create the pane using 'action new-pane' (works in detached sessions)
+        args = ["action", "new-pane", "--name", pane_name]
+        if floating:
+            args.append("--floating")
+        if direction:
+            args.extend(["--direction", direction])
+        if cwd:
+            args.extend(["--cwd", cwd])
+        if command:
+            args.extend(["--", command])
+        create_result = await run_zellij(*args, session=session)
+
+        if create_result.get("success"):
+            # Wait briefly for pane to initialize
+            await asyncio.sleep(0.3)
+
+            # Panes created with a command start suspended in Zellij.
+            # Send Enter to start the command, then wait for shell to initialize.
             if command:
-                args.extend(["--", command])
-            create_result = run_zellij(*args, session=session)
+                # Send Enter to unsuspend the pane (starts the command)
+                await zellij_action("write", "13", session=session)  # 13 = Enter key
+                await asyncio.sleep(0.5)  # Wait for command to start
+
+            # Rename the pane to match the requested name (enables plugin lookup by title)
+            await zellij_action("rename-pane", pane_name, session=session)
+
+            # Try to get the pane ID for daemon communication
+            pane_id = None
+            if is_plugin_available():
+                pane_id = await plugin_find_pane_id(pane_name, session=session)
+
+            # New pane index = pre_pane_count (0-indexed)
+            new_pane_index = pre_pane_count
+
+            # Register in state with index for later lookup
+            pane_info = state.register_pane(
+                name=pane_name,
+                tab=tab or target_tab_name or "current",
+                command=command,
+                cwd=cwd,
+                pane_index=new_pane_index,
+                floating=floating or False,
+                pane_id=pane_id,
+            )
+            result = {"success": True, "created": True, "pane": asdict(pane_info),
+                      "direction": direction}
+            # Invalidate cache after pane creation
+            layout_cache.invalidate(session)
+        else:
+            result = create_result
 
-            if create_result.get("success"):
-                # Wait briefly for pane to initialize
-                time.sleep(0.3)
-
-                # Panes created with a command start suspended in Zellij.
-                # Send Enter to start the command, then wait for shell to initialize.
-                if command:
-                    # Send Enter to unsuspend the pane (starts the command)
-                    zellij_action("write", "13", session=session)  # 13 = Enter key
-                    time.sleep(0.5)  # Wait for command to start
-
-                # Rename the pane to match the requested name (enables plugin lookup by title)
-                zellij_action("rename-pane", pane_name, session=session)
-
-                # Try to get the pane ID for daemon communication
-                pane_id = None
-                if is_plugin_available():
-                    pane_id = plugin_find_pane_id(pane_name, session=session)
-
-                # New pane index = pre_pane_count (0-indexed)
-                new_pane_index = pre_pane_count
-
-                # Register in state with index for later lookup
-                pane_info = state.register_pane(
-                    name=pane_name,
-                    tab=tab or target_tab_name or "current",
-                    command=command,
-                    cwd=cwd,
-                    pane_index=new_pane_index,
-                    floating=floating or False,
-                    pane_id=pane_id,
-                )
-                result = {"success": True, "created": True, "pane": pane_info.__dict__,
-                          "direction": direction}
-                # Invalidate cache after pane creation
-                layout_cache.invalidate(session)
-            else:
-                result = create_result
+    # Safety check for unexpected state
+    if result is None:
+        result = {"success": False, "error": "Unexpected state in create_named_pane"}
+    return result
 
-        # Safety check for unexpected state
-        if result is None:
-            result = {"success": False, "error": "Unexpected state in create_named_pane"}
 
-    elif name == "destroy_named_pane":
-        # Use current session - panes are now created in workspace tabs
-        # Invalidate cache since we're mutating layout
-        layout_cache.invalidate(session)
+async def _tool_destroy_named_pane(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Use current session - panes are now created in workspace tabs
+    # Invalidate cache since we're mutating layout
+    layout_cache.invalidate(session)
 
-        pane_name = arguments["name"]
+    pane_name = arguments["name"]
 
-        # PROTECTION: Never close the Claude pane
-        if "claude" in pane_name.lower():
-            result = {"success": False, "error": "Cannot close Claude pane - this would terminate the session"}
+    # PROTECTION: Never close the Claude pane
+    if "claude" in pane_name.lower():
+        result = {"success": False, "error": "Cannot close Claude pane - this would terminate the session"}
+    else:
+        async def do_close():
+            return await zellij_action("close-pane", session=session)
+
+        close_result = await with_pane_focus(pane_name, do_close, session=session)
+
+        # Check if close actually succeeded - unregister only on success
+        if not close_result.get("success"):
+            result = close_result
         else:
-            async def do_close():
-                return zellij_action("close-pane", session=session)
+            state.unregister_pane(pane_name)
+            result = {"success": True, "closed": pane_name}
+            layout_cache.invalidate(session)
+    return result
+
+
+async def _tool_list_named_panes(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Use current session by default (same as create_named_pane)
+
+    # Get live layout
+    layout_result = await zellij_action("dump-layout", capture=True, session=session)
+    live_panes = []
+    if layout_result.get("success"):
+        live_panes = _parse_layout_cached(layout_result.get("stdout", ""))
+
+    # Reconcile with registry
+    pane_list = []
+    for pane_name_key, pane in state.panes.items():
+        found = find_pane_by_name(live_panes, pane_name_key, pane)
+        pane_list.append({
+            "name": pane_name_key,
+            "tab": pane.tab,
+            "command": pane.command,
+            "alive": found is not None,
+            "focused": found.get("focused") if found else False,
+        })
+
+    result = {"success": True, "panes": pane_list}
+    return result
 
-            close_result = await with_pane_focus(pane_name, do_close, session=session)
 
-            # Check if close actually succeeded - unregister only on success
-            if not close_result.get("success"):
-                result = close_result
+# === REPL ===
+
+async def _tool_repl_execute(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+
+    pane_name = arguments["pane_name"]
+    code = arguments["code"]
+    repl_type = arguments.get("repl_type", "auto")
+    timeout = arguments.get("timeout", 60)
+
+    # Auto-detect REPL type from pane command
+    if repl_type == "auto":
+        pane_info = state.get_pane(pane_name)
+        if pane_info and pane_info.command:
+            cmd = pane_info.command.lower()
+            if "ipython" in cmd:
+                repl_type = "ipython"
+            elif "python" in cmd:
+                repl_type = "python"
+            elif cmd in ("r", "rscript"):
+                repl_type = "r"
+            elif "julia" in cmd:
+                repl_type = "julia"
             else:
-                state.unregister_pane(pane_name)
-                result = {"success": True, "closed": pane_name}
-                layout_cache.invalidate(session)
+                repl_type = "default"
+        else:
+            repl_type = "default"
 
-    elif name == "list_named_panes":
-        # Use current session by default (same as create_named_pane)
+    prompt_pattern = REPL_PROMPTS.get(repl_type, REPL_PROMPTS["default"])
 
-        # Get live layout
-        layout_result = zellij_action("dump-layout", capture=True, session=session)
-        live_panes = []
-        if layout_result.get("success"):
-            live_panes = parse_layout_panes(layout_result.get("stdout", ""))
-
-        # Reconcile with registry
-        pane_list = []
-        for pane_name_key, pane in state.panes.items():
-            found = find_pane_by_name(live_panes, pane_name_key, pane)
-            pane_list.append({
-                "name": pane_name_key,
-                "tab": pane.tab,
-                "command": pane.command,
-                "alive": found is not None,
-                "focused": found.get("focused") if found else False,
-            })
+    # Send the code
+    async def do_write():
+        # For multi-line code, send as-is with trailing newlines
+        text = code.strip() + "\n"
+        if '\n' in code:
+            text += "\n"  # Extra newline to close blocks
+        return await zellij_action("write-chars", text, session=session)
+
+    write_result = await with_pane_focus(pane_name, do_write, session=session)
+    if not write_result.get("success"):
+        result = write_result
+    else:
+        # Wait for prompt using shared helper
+        await asyncio.sleep(0.5)
+        wait_result = await wait_for_prompt(
+            pane_name, prompt_pattern, timeout, session=session, check_lines=3
+        )
+        output = wait_result.get("output", "")
+        if repl_type == "default" and wait_result.get("completed"):
+            # The pane command didn't say; name the REPL from the prompt it showed
+            repl_type = detect_repl_type(tail_text(output, 3))
+        result = {
+            "success": True,
+            "completed": wait_result.get("completed", False),
+            "output": output,
+            "repl_type": repl_type,
+        }
+    return result
+
+
+async def _tool_repl_interrupt(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+
+    pane_name = arguments["pane_name"]
+    should_wait = arguments.get("wait_for_prompt", True)
+    timeout = arguments.get("timeout", 10)
+
+    # Send Ctrl+C
+    async def do_interrupt():
+        return await zellij_action("write", "3", session=session)  # ASCII 3 = Ctrl+C
 
-        result = {"success": True, "panes": pane_list}
+    int_result = await with_pane_focus(pane_name, do_interrupt, session=session)
+
+    if not int_result.get("success"):
+        result = int_result
+    elif not should_wait:
+        result = {"success": True, "interrupted": True}
+    else:
+        # Wait for prompt using shared helper
+        await asyncio.sleep(0.3)
+        prompt_result = await wait_for_prompt(
+            pane_name, REPL_PROMPTS["default"], timeout, session=session, check_lines=3, poll_interval=0.5
+        )
+        result = {"success": True, "interrupted": True, "prompt_returned": prompt_result.get("completed", False)}
+    return result
+
+
+# === SSH/HPC ===
+
+# SSH panes to the same host share one master connection, kept alive for a
+# while after the last pane exits so reconnects skip the handshake
+_SSH_CONTROL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "zellij-mcp")
+
+
+def ssh_control_args() -> list[str]:
+    """OpenSSH connection-sharing options, or none if the socket dir is unusable."""
+    try:
+        os.makedirs(_SSH_CONTROL_DIR, mode=0o700, exist_ok=True)
+    except OSError:
+        return []
+    return ["-o", "ControlMaster=auto",
+            "-o", f"ControlPath={_SSH_CONTROL_DIR}/cm-%C",
+            "-o", "ControlPersist=600"]
+
+
+async def _tool_ssh_connect(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
+
+    ssh_name = arguments["name"]
+    host = arguments["host"]
+    tab = arguments.get("tab")
+    port = arguments.get("port")
+    identity = arguments.get("identity_file")
+
+    # Build SSH command as argument list (zellij expects separate args after --)
+    ssh_args = ["ssh", *ssh_control_args()]
+    if port:
+        ssh_args.extend(["-p", str(port)])
+    if identity:
+        ssh_args.extend(["-i", identity])
+    ssh_args.append(host)
+    ssh_cmd = " ".join(ssh_args)  # For display/registry
+
+    # Create pane with SSH command using 'zellij run' to avoid suspended panes
+    # 'zellij action new-pane' creates suspended panes in detached sessions
+    args = ["run", "--name", ssh_name, "--"] + ssh_args
+
+    if tab:
+        layout_result = await zellij_action("dump-layout", capture=True, session=session)
+        if not layout_result.get("success"):
+            # Layout check failed, try to create tab anyway
+            await zellij_action("new-tab", "--name", tab, session=session)
+        elif f'name="{tab}"' not in layout_result.get("stdout", ""):
+            await zellij_action("new-tab", "--name", tab, session=session)
+        else:
+            await zellij_action("go-to-tab-name", tab, session=session)
+
+    create_result = await run_zellij(*args, session=session)
+    if create_result.get("success"):
+        # Rename pane to ensure name persists in layout
+        await zellij_action("rename-pane", ssh_name, session=session)
+        state.register_pane(name=ssh_name, tab=tab or "current", command=ssh_cmd)
+        state.ssh_sessions[ssh_name] = SSHSession(
+            name=ssh_name, host=host, pane_name=ssh_name
+        )
+        result = {"success": True, "connected": ssh_name, "host": host}
+    else:
+        result = create_result
+    return result
 
-    # === REPL ===
-    elif name == "repl_execute":
-        # Panes are in current session (tab-based workspaces)
 
-        pane_name = arguments["pane_name"]
-        code = arguments["code"]
-        repl_type = arguments.get("repl_type", "auto")
-        timeout = arguments.get("timeout", 60)
-
-        # Auto-detect REPL type from pane command
-        if repl_type == "auto":
-            pane_info = state.get_pane(pane_name)
-            if pane_info and pane_info.command:
-                cmd = pane_info.command.lower()
-                if "ipython" in cmd:
-                    repl_type = "ipython"
-                elif "python" in cmd:
-                    repl_type = "python"
-                elif cmd in ("r", "rscript"):
-                    repl_type = "r"
-                elif "julia" in cmd:
-                    repl_type = "julia"
-                else:
-                    repl_type = "default"
-            else:
-                repl_type = "default"
+async def _tool_ssh_run(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
 
-        prompt_pattern = REPL_PROMPTS.get(repl_type, REPL_PROMPTS["default"])
+    ssh_name = arguments["name"]
+    command = arguments["command"]
+    wait = arguments.get("wait", True)
+    timeout = arguments.get("timeout", 30)
 
-        # Send the code
+    # Validate SSH session exists
+    if ssh_name not in state.ssh_sessions:
+        result = {"success": False, "error": f"SSH session '{ssh_name}' not found. Use ssh_connect first."}
+    else:
+        # Execute command in SSH pane
         async def do_write():
-            # For multi-line code, send as-is with trailing newlines
-            text = code.strip() + "\n"
-            if '\n' in code:
-                text += "\n"  # Extra newline to close blocks
-            return zellij_action("write-chars", text, session=session)
+            return await zellij_action("write-chars", command + "\n", session=session)
 
-        write_result = await with_pane_focus(pane_name, do_write, session=session)
+        write_result = await with_pane_focus(ssh_name, do_write, session=session)
         if not write_result.get("success"):
             result = write_result
+        elif not wait:
+            result = {"success": True, "sent": True}
         else:
             # Wait for prompt using shared helper
             await asyncio.sleep(0.5)
             wait_result = await wait_for_prompt(
-                pane_name, prompt_pattern, timeout, session=session, check_lines=3
+                ssh_name, r"[\$#>]\s*$", timeout, session=session, check_lines=1
             )
             result = {
                 "success": True,
-                "completed": wait_result.get("completed", False),
                 "output": wait_result.get("output", ""),
-                "repl_type": repl_type,
+                "elapsed": wait_result.get("elapsed", 0),
             }
+    return result
 
-    elif name == "repl_interrupt":
-        # Panes are in current session (tab-based workspaces)
 
-        pane_name = arguments["pane_name"]
-        should_wait = arguments.get("wait_for_prompt", True)
-        timeout = arguments.get("timeout", 10)
+async def _tool_job_submit(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
 
-        # Send Ctrl+C
-        async def do_interrupt():
-            return zellij_action("write", "3", session=session)  # ASCII 3 = Ctrl+C
+    ssh_name = arguments["ssh_name"]
+    script = arguments["script"]
+    scheduler = arguments.get("scheduler", "slurm")
+    extra_args = arguments.get("extra_args", "")
 
-        int_result = await with_pane_focus(pane_name, do_interrupt, session=session)
+    if scheduler == "slurm":
+        cmd = f"sbatch {extra_args} {script}".strip()
+        job_pattern = r"Submitted batch job (\d+)"
+    else:  # pbs
+        cmd = f"qsub {extra_args} {script}".strip()
+        job_pattern = r"(\d+\.[\w.-]+)"
 
-        if not int_result.get("success"):
-            result = int_result
-        elif not should_wait:
-            result = {"success": True, "interrupted": True}
-        else:
-            # Wait for prompt using shared helper
-            await asyncio.sleep(0.3)
-            prompt_result = await wait_for_prompt(
-                pane_name, REPL_PROMPTS["default"], timeout, session=session, check_lines=3, poll_interval=0.5
-            )
-            result = {"success": True, "interrupted": True, "prompt_returned": prompt_result.get("completed", False)}
+    # Run the command
+    async def do_write():
+        return await zellij_action("write-chars", cmd + "\n", session=session)
 
-    # === SSH/HPC ===
-    elif name == "ssh_connect":
-        # Panes are in current session (tab-based workspaces)
+    write_result = await with_pane_focus(ssh_name, do_write, session=session)
+    if not write_result.get("success"):
+        result = write_result
+    else:
+        await asyncio.sleep(2.0)
 
-        ssh_name = arguments["name"]
-        host = arguments["host"]
-        tab = arguments.get("tab")
-        port = arguments.get("port")
-        identity = arguments.get("identity_file")
-
-        # Build SSH command as argument list (zellij expects separate args after --)
-        ssh_args = ["ssh"]
-        if port:
-            ssh_args.extend(["-p", str(port)])
-        if identity:
-            ssh_args.extend(["-i", identity])
-        ssh_args.append(host)
-        ssh_cmd = " ".join(ssh_args)  # For display/registry
-
-        # Create pane with SSH command using 'zellij run' to avoid suspended panes
-        # 'zellij action new-pane' creates suspended panes in detached sessions
-        args = ["run", "--name", ssh_name, "--"] + ssh_args
+        async def do_read():
+            return await zellij_action("dump-screen", "/dev/stdout", capture=True, session=session)
 
-        if tab:
-            layout_result = zellij_action("dump-layout", capture=True, session=session)
-            if not layout_result.get("success"):
-                # Layout check failed, try to create tab anyway
-                zellij_action("new-tab", "--name", tab, session=session)
-            elif f'name="{tab}"' not in layout_result.get("stdout", ""):
-                zellij_action("new-tab", "--name", tab, session=session)
-            else:
-                zellij_action("go-to-tab-name", tab, session=session)
+        read_result = await with_pane_focus(ssh_name, do_read, session=session)
 
-        create_result = run_zellij(*args, session=session)
-        if create_result.get("success"):
-            # Rename pane to ensure name persists in layout
-            zellij_action("rename-pane", ssh_name, session=session)
-            state.register_pane(name=ssh_name, tab=tab or "current", command=ssh_cmd)
-            state.ssh_sessions[ssh_name] = SSHSession(
-                name=ssh_name, host=host, pane_name=ssh_name
-            )
-            result = {"success": True, "connected": ssh_name, "host": host}
+        if read_result.get("success"):
+            content = strip_ansi(read_result.get("stdout", ""))
+            match = re.search(job_pattern, content)
+            if match:
+                job_id = match.group(1)
+                state.tracked_jobs[job_id] = TrackedJob(
+                    job_id=job_id, scheduler=scheduler, ssh_name=ssh_name, script=script
+                )
+                result = {"success": True, "job_id": job_id, "output": content[-500:]}
+            else:
+                result = {"success": False, "error": "Could not parse job ID", "output": content[-500:]}
         else:
-            result = create_result
-
-    elif name == "ssh_run":
-        # Panes are in current session (tab-based workspaces)
-
-        ssh_name = arguments["name"]
-        command = arguments["command"]
-        wait = arguments.get("wait", True)
-        timeout = arguments.get("timeout", 30)
+            result = read_result
+    return result
 
-        # Validate SSH session exists
-        if ssh_name not in state.ssh_sessions:
-            result = {"success": False, "error": f"SSH session '{ssh_name}' not found. Use ssh_connect first."}
-        else:
-            # Execute command in SSH pane
-            async def do_write():
-                return zellij_action("write-chars", command + "\n", session=session)
 
-            write_result = await with_pane_focus(ssh_name, do_write, session=session)
-            if not write_result.get("success"):
-                result = write_result
-            elif not wait:
-                result = {"success": True, "sent": True}
-            else:
-                # Wait for prompt using shared helper
-                await asyncio.sleep(0.5)
-                wait_result = await wait_for_prompt(
-                    ssh_name, r"[\$#>]\s*$", timeout, session=session, check_lines=1
-                )
-                result = {
-                    "success": True,
-                    "output": wait_result.get("output", ""),
-                    "elapsed": wait_result.get("elapsed", 0),
-                }
+async def _tool_job_status(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Panes are in current session (tab-based workspaces)
 
-    elif name == "job_submit":
-        # Panes are in current session (tab-based workspaces)
+    job_id = arguments.get("job_id")
+    ssh_name = arguments.get("ssh_name")
 
-        ssh_name = arguments["ssh_name"]
-        script = arguments["script"]
-        scheduler = arguments.get("scheduler", "slurm")
-        extra_args = arguments.get("extra_args", "")
+    jobs_to_check = []
+    if job_id:
+        if job_id in state.tracked_jobs:
+            jobs_to_check.append(state.tracked_jobs[job_id])
+        elif ssh_name:
+            # Untracked job with provided ssh_name - create temporary tracker
+            jobs_to_check.append(TrackedJob(job_id=job_id, scheduler="slurm",
+                                            ssh_name=ssh_name, script=""))
+        else:
+            # Can't check untracked job without ssh_name
+            return {"success": False, "error": f"Job '{job_id}' not found in tracker. Provide ssh_name to check untracked jobs."}
+    else:
+        jobs_to_check = list(state.tracked_jobs.values())
+        if not jobs_to_check:
+            return {"success": True, "jobs": [], "message": "No tracked jobs"}
+
+    # One scheduler query per SSH session rather than one per job
+    statuses = []
+    groups: dict[tuple[str, str], list[str]] = {}
+    for job in jobs_to_check:
+        target_ssh = ssh_name or job.ssh_name
+        if not target_ssh:
+            statuses.append({"job_id": job.job_id, "error": "No SSH session specified"})
+            continue
+        groups.setdefault((target_ssh, job.scheduler), []).append(job.job_id)
 
+    for (target_ssh, scheduler), job_ids in groups.items():
         if scheduler == "slurm":
-            cmd = f"sbatch {extra_args} {script}".strip()
-            job_pattern = r"Submitted batch job (\d+)"
-        else:  # pbs
-            cmd = f"qsub {extra_args} {script}".strip()
-            job_pattern = r"(\d+\.[\w.-]+)"
-
-        # Run the command
-        async def do_write():
-            return zellij_action("write-chars", cmd + "\n", session=session)
-
-        write_result = await with_pane_focus(ssh_name, do_write, session=session)
-        if not write_result.get("success"):
-            result = write_result
+            id_list = ",".join(job_ids)
+            cmd = f"sacct -j {id_list} --format=JobID,State,Elapsed,ExitCode -n 2>/dev/null || squeue -j {id_list} -o '%i %T' --noheader"
         else:
-            await asyncio.sleep(2.0)
-
-            async def do_read():
-                return zellij_action("dump-screen", "/dev/stdout", capture=True, session=session)
-
-            read_result = await with_pane_focus(ssh_name, do_read, session=session)
+            cmd = "qstat " + " ".join(job_ids)
 
-            if read_result.get("success"):
-                content = strip_ansi(read_result.get("stdout", ""))
-                match = re.search(job_pattern, content)
-                if match:
-                    job_id = match.group(1)
-                    state.tracked_jobs[job_id] = TrackedJob(
-                        job_id=job_id, scheduler=scheduler, ssh_name=ssh_name, script=script
-                    )
-                    result = {"success": True, "job_id": job_id, "output": content[-500:]}
-                else:
-                    result = {"success": False, "error": "Could not parse job ID", "output": content[-500:]}
-            else:
-                result = read_result
+        async def do_write():
+            return await zellij_action("write-chars", cmd + "\n", session=session)
 
-    elif name == "job_status":
-        # Panes are in current session (tab-based workspaces)
+        await with_pane_focus(target_ssh, do_write, session=session)
+        await asyncio.sleep(1.5)
 
-        job_id = arguments.get("job_id")
-        ssh_name = arguments.get("ssh_name")
-
-        jobs_to_check = []
-        if job_id:
-            if job_id in state.tracked_jobs:
-                jobs_to_check.append(state.tracked_jobs[job_id])
-            elif ssh_name:
-                # Untracked job with provided ssh_name - create temporary tracker
-                jobs_to_check.append(TrackedJob(job_id=job_id, scheduler="slurm",
-                                                ssh_name=ssh_name, script=""))
-            else:
-                # Can't check untracked job without ssh_name
-                result = {"success": False, "error": f"Job '{job_id}' not found in tracker. Provide ssh_name to check untracked jobs."}
-                jobs_to_check = []  # Skip the loop
-        else:
-            jobs_to_check = list(state.tracked_jobs.values())
+        async def do_read():
+            return await zellij_action("dump-screen", "/dev/stdout", capture=True, session=session)
 
-        statuses = []
-        for job in jobs_to_check:
-            target_ssh = ssh_name or job.ssh_name
-            if not target_ssh:
-                statuses.append({"job_id": job.job_id, "error": "No SSH session specified"})
-                continue
+        read_result = await with_pane_focus(target_ssh, do_read, session=session)
+        if not read_result.get("success"):
+            statuses.extend({"job_id": j, "error": "Failed to read"} for j in job_ids)
+            continue
 
-            if job.scheduler == "slurm":
-                cmd = f"sacct -j {job.job_id} --format=JobID,State,Elapsed,ExitCode -n 2>/dev/null || squeue -j {job.job_id} -o '%i %T' --noheader"
-            else:
-                cmd = f"qstat {job.job_id}"
+        content = strip_ansi(read_result.get("stdout", ""))
+        output = tail_text(content.strip(), 10 * len(job_ids))
+        if len(job_ids) == 1:
+            statuses.append({"job_id": job_ids[0], "output": output})
+            continue
+        # Attribute rows to jobs by their leading ID (sacct adds .batch/.extern
+        # steps, arrays add _N); fall back to the whole tail if nothing matched
+        lines = output.split("\n")
+        firsts = [(line.split(None, 1) or [""])[0] for line in lines]
+        for j in job_ids:
+            own = [line for line, first in zip(lines, firsts)
+                   if first == j or first.startswith((j + ".", j + "_"))]
+            statuses.append({"job_id": j, "output": "\n".join(own) if own else output})
+
+    return {"success": True, "jobs": statuses}
+
+
+# === EDIT ===
+
+async def _tool_edit_file(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    line = arguments.get("line")
+    direction = arguments.get("direction")
+    args = ["edit", arguments["path"]]
+    if line:
+        args.extend(["--line", str(line)])
+    if arguments.get("floating"):
+        args.append("--floating")
+    if arguments.get("in_place"):
+        args.append("--in-place")
+    if direction:
+        args.extend(["--direction", direction])
+    result = await zellij_action(*args, session=session)
+    return result
 
-            async def do_write():
-                return zellij_action("write-chars", cmd + "\n", session=session)
 
-            await with_pane_focus(target_ssh, do_write, session=session)
-            await asyncio.sleep(1.5)
+# === SESSION ===
 
-            async def do_read():
-                return zellij_action("dump-screen", "/dev/stdout", capture=True, session=session)
+async def _tool_list_sessions(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await cached_query("list_sessions", session, lambda: run_zellij("list-sessions", capture=True), scoped=False)
+    return result
 
-            read_result = await with_pane_focus(target_ssh, do_read, session=session)
-            if read_result.get("success"):
-                content = strip_ansi(read_result.get("stdout", ""))
-                # Parse status from output
-                lines = content.strip().split('\n')[-10:]
-                statuses.append({"job_id": job.job_id, "output": '\n'.join(lines)})
-            else:
-                statuses.append({"job_id": job.job_id, "error": "Failed to read"})
 
-        # Set result only if we processed jobs (error case already set result above)
-        if jobs_to_check or statuses:
-            result = {"success": True, "jobs": statuses}
+async def _tool_list_clients(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await cached_query(
+        "list_clients", session, lambda: zellij_action("list-clients", capture=True, session=session)
+    )
+    return result
 
-    # === EDIT ===
-    elif name == "edit_file":
-        args = ["edit", arguments["path"]]
-        if arguments.get("line"):
-            args.extend(["--line", str(arguments["line"])])
-        if arguments.get("floating"):
-            args.append("--floating")
-        if arguments.get("in_place"):
-            args.append("--in-place")
-        if arguments.get("direction"):
-            args.extend(["--direction", arguments["direction"]])
-        result = zellij_action(*args, session=session)
 
-    elif name == "edit_scrollback":
-        result = zellij_action("edit-scrollback", session=session)
+async def _tool_session_info(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = {"success": True, "session": session or _CURRENT_SESSION or "unknown", "pane_id": _CURRENT_PANE_ID}
+    return result
 
-    # === SESSION ===
-    elif name == "list_sessions":
-        result = run_zellij("list-sessions", capture=True)
 
-    elif name == "list_clients":
-        result = zellij_action("list-clients", capture=True, session=session)
+async def _tool_rename_session(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("rename-session", arguments["name"], session=session)
+    _invalidate_sessions_cache()
+    return result
 
-    elif name == "session_info":
-        sess_name = session or os.environ.get("ZELLIJ_SESSION_NAME", "unknown")
-        result = {"success": True, "session": sess_name, "pane_id": os.environ.get("ZELLIJ_PANE_ID", "unknown")}
 
-    elif name == "rename_session":
-        result = zellij_action("rename-session", arguments["name"], session=session)
+async def _tool_session_map(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    compact = arguments.get("compact", False)
 
-    elif name == "session_map":
-        compact = arguments.get("compact", False)
-        current_session = os.environ.get("ZELLIJ_SESSION_NAME", "")
+    # Get all sessions
+    sessions_result = await run_zellij("list-sessions", capture=True)
+    if not sessions_result.get("success"):
+        result = sessions_result
+    else:
+        # Parse session names from output
+        session_names = []
+        for line in sessions_result.get("stdout", "").split('\n'):
+            line = strip_ansi(line).strip()
+            if line:
+                # Format: "session-name [Created Xs ago] (current)"
+                name_match = re.match(r'^(\S+)', line)
+                if name_match:
+                    session_names.append({
+                        "name": name_match.group(1),
+                        "current": "(current)" in line,
+                    })
 
-        # Get all sessions
-        sessions_result = run_zellij("list-sessions", capture=True)
-        if not sessions_result.get("success"):
-            result = sessions_result
-        else:
-            # Parse session names from output
-            session_names = []
-            for line in sessions_result.get("stdout", "").split('\n'):
-                line = strip_ansi(line).strip()
-                if line:
-                    # Format: "session-name [Created Xs ago] (current)"
-                    name_match = re.match(r'^(\S+)', line)
-                    if name_match:
-                        session_names.append({
-                            "name": name_match.group(1),
-                            "current": "(current)" in line,
-                        })
-
-            # Build map for each session
-            session_maps = []
-            for sess in session_names:
-                sess_name = sess["name"]
-                layout_result = zellij_action("dump-layout", capture=True, session=sess_name)
-                if not layout_result.get("success"):
-                    continue
+        # Build map for each session
+        session_maps = []
+        for sess in session_names:
+            sess_name = sess["name"]
+            layout_result = await zellij_action("dump-layout", capture=True, session=sess_name)
+            if not layout_result.get("success"):
+                continue
 
-                layout = layout_result.get("stdout", "")
-
-                # Parse cwd
-                cwd_match = re.search(r'cwd\s+"([^"]+)"', layout)
-                cwd = cwd_match.group(1) if cwd_match else ""
-                # Shorten cwd for display
-                if len(cwd) > 50:
-                    cwd = "..." + cwd[-47:]
-
-                # Parse tabs and their panes
-                tabs = []
-                current_tab = None
-
-                for line in layout.split('\n'):
-                    # Match tab lines
-                    tab_match = re.search(r'tab\s+name="([^"]+)".*?(focus=true)?', line)
-                    if tab_match and 'swap_' not in line and 'new_tab_template' not in layout[max(0, layout.find(line)-50):layout.find(line)]:
-                        # Check this isn't inside swap_tiled_layout or new_tab_template
-                        line_pos = layout.find(line)
-                        before = layout[:line_pos]
-                        if 'swap_tiled_layout' in before.split('tab')[-1] if 'tab' in before else '':
-                            continue
-                        if before.count('{') - before.count('}') > 2:  # Deep nesting = template
-                            continue
-
-                        if current_tab:
-                            tabs.append(current_tab)
-                        current_tab = {
-                            "name": tab_match.group(1),
-                            "focused": tab_match.group(2) is not None,
-                            "panes": [],
-                            "floating": [],
-                        }
+            layout = layout_result.get("stdout", "")
+
+            # Parse cwd
+            cwd_match = re.search(r'cwd\s+"([^"]+)"', layout)
+            cwd = cwd_match.group(1) if cwd_match else ""
+            # Shorten cwd for display
+            if len(cwd) > 50:
+                cwd = "..." + cwd[-47:]
+
+            # Parse tabs and their panes
+            tabs = []
+            current_tab = None
+
+            for line in layout.split('\n'):
+                # Match tab lines
+                tab_match = re.search(r'tab\s+name="([^"]+)".*?(focus=true)?', line)
+                if tab_match and 'swap_' not in line and 'new_tab_template' not in layout[max(0, layout.find(line)-50):layout.find(line)]:
+                    # Check this isn't inside swap_tiled_layout or new_tab_template
+                    line_pos = layout.find(line)
+                    before = layout[:line_pos]
+                    if 'swap_tiled_layout' in before.split('tab')[-1] if 'tab' in before else '':
+                        continue
+                    if before.count('{') - before.count('}') > 2:  # Deep nesting = template
                         continue
 
                     if current_tab:
-                        # Match pane with command
-                        cmd_match = re.search(r'pane\s+command="([^"]+)"', line)
-                        if cmd_match and 'plugin' not in line:
-                            pane_info = cmd_match.group(1)
-                            # Check for name
-                            name_match = re.search(r'name="([^"]+)"', line)
-                            if name_match:
-                                pane_info = f'"{name_match.group(1)}" ({pane_info})'
-                            if 'start_suspended' in line:
-                                pane_info += " [suspended]"
+                        tabs.append(current_tab)
+                    current_tab = {
+                        "name": tab_match.group(1),
+                        "focused": tab_match.group(2) is not None,
+                        "panes": [],
+                        "floating": [],
+                    }
+                    continue
+
+                if current_tab:
+                    # Match pane with command
+                    cmd_match = re.search(r'pane\s+command="([^"]+)"', line)
+                    if cmd_match and 'plugin' not in line:
+                        pane_info = cmd_match.group(1)
+                        # Check for name
+                        name_match = re.search(r'name="([^"]+)"', line)
+                        if name_match:
+                            pane_info = f'"{name_match.group(1)}" ({pane_info})'
+                        if 'start_suspended' in line:
+                            pane_info += " [suspended]"
+                        if 'floating_panes' in layout[max(0, layout.find(line)-200):layout.find(line)]:
+                            current_tab["floating"].append(pane_info)
+                        else:
+                            current_tab["panes"].append(pane_info)
+                    # Match named pane without command
+                    elif 'pane' in line and 'plugin' not in line and 'size=' not in line.split('pane')[0]:
+                        name_match = re.search(r'name="([^"]+)"', line)
+                        if name_match:
+                            pane_info = f'"{name_match.group(1)}"'
                             if 'floating_panes' in layout[max(0, layout.find(line)-200):layout.find(line)]:
                                 current_tab["floating"].append(pane_info)
                             else:
                                 current_tab["panes"].append(pane_info)
-                        # Match named pane without command
-                        elif 'pane' in line and 'plugin' not in line and 'size=' not in line.split('pane')[0]:
-                            name_match = re.search(r'name="([^"]+)"', line)
-                            if name_match:
-                                pane_info = f'"{name_match.group(1)}"'
-                                if 'floating_panes' in layout[max(0, layout.find(line)-200):layout.find(line)]:
-                                    current_tab["floating"].append(pane_info)
-                                else:
-                                    current_tab["panes"].append(pane_info)
 
-                if current_tab:
-                    tabs.append(current_tab)
+            if current_tab:
+                tabs.append(current_tab)
 
-                session_maps.append({
-                    "name": sess_name,
-                    "current": sess["current"],
-                    "cwd": cwd,
-                    "tabs": tabs,
-                })
+            session_maps.append({
+                "name": sess_name,
+                "current": sess["current"],
+                "cwd": cwd,
+                "tabs": tabs,
+            })
 
-            # ANSI colors
-            O = "\033[38;5;208m"  # orange
-            G = "\033[38;5;82m"   # green
-            D = "\033[38;5;240m"  # dim
-            B = "\033[1m"         # bold
-            R = "\033[0m"         # reset
-
-            def parse_layout_tree(layout_str: str) -> dict:
-                """Parse layout string into a tree structure for a tab."""
-                lines_iter = iter(layout_str.split('\n'))
-
-                def extract_attrs(line: str) -> dict:
-                    """Extract attributes from a pane line."""
-                    attrs = {"command": None, "name": None, "size": None, "focused": False,
-                             "split": "horizontal"}
-                    if 'split_direction="vertical"' in line:
-                        attrs["split"] = "vertical"
-                    if 'focus=true' in line and 'hide_floating' not in line:
-                        attrs["focused"] = True
-                    cmd = re.search(r'command="([^"]+)"', line)
-                    if cmd:
-                        attrs["command"] = cmd.group(1)
-                    name = re.search(r'name="([^"]+)"', line)
-                    if name and 'tab ' not in line:
-                        attrs["name"] = name.group(1)
-                    size = re.search(r'size="?(\d+%?)"?', line)
-                    if size:
-                        attrs["size"] = size.group(1)
-                    return attrs
-
-                def parse_pane(initial_attrs=None):
-                    """Recursively parse pane structure."""
-                    pane = {"type": "pane", "children": []}
-                    if initial_attrs:
-                        pane.update(initial_attrs)
-                    else:
-                        pane.update({"name": None, "command": None, "split": "horizontal",
-                                     "size": None, "focused": False})
+        # ANSI colors
+        O = "\033[38;5;208m"  # orange
+        G = "\033[38;5;82m"   # green
+        D = "\033[38;5;240m"  # dim
+        B = "\033[1m"         # bold
+        R = "\033[0m"         # reset
+
+        def parse_layout_tree(layout_str: str) -> dict:
+            """Parse layout string into a tree structure for a tab."""
+            lines_iter = iter(layout_str.split('\n'))
+
+            def extract_attrs(line: str) -> dict:
+                """Extract attributes from a pane line."""
+                attrs = {"command": None, "name": None, "size": None, "focused": False,
+                         "split": "horizontal"}
+                if 'split_direction="vertical"' in line:
+                    attrs["split"] = "vertical"
+                if 'focus=true' in line and 'hide_floating' not in line:
+                    attrs["focused"] = True
+                cmd = re.search(r'command="([^"]+)"', line)
+                if cmd:
+                    attrs["command"] = cmd.group(1)
+                name = re.search(r'name="([^"]+)"', line)
+                if name and 'tab ' not in line:
+                    attrs["name"] = name.group(1)
+                size = re.search(r'size="?(\d+%?)"?', line)
+                if size:
+                    attrs["size"] = size.group(1)
+                return attrs
+
+            def parse_pane(initial_attrs=None):
+                """Recursively parse pane structure."""
+                pane = {"type": "pane", "children": []}
+                if initial_attrs:
+                    pane.update(initial_attrs)
+                else:
+                    pane.update({"name": None, "command": None, "split": "horizontal",
+                                 "size": None, "focused": False})
+
+                for line in lines_iter:
+                    stripped = line.strip()
+                    if not stripped:
+                        continue
 
-                    for line in lines_iter:
-                        stripped = line.strip()
-                        if not stripped:
-                            continue
+                    # End of block
+                    if stripped == '}':
+                        return pane
 
-                        # End of block
-                        if stripped == '}':
-                            return pane
+                    # Skip plugins and their content
+                    if 'plugin' in stripped:
+                        brace_count = stripped.count('{') - stripped.count('}')
+                        while brace_count > 0:
+                            next_line = next(lines_iter, '')
+                            brace_count += next_line.count('{') - next_line.count('}')
+                        continue
+
+                    # Skip non-pane lines (args, start_suspended, etc.)
+                    if not stripped.startswith('pane'):
+                        continue
 
-                        # Skip plugins and their content
-                        if 'plugin' in stripped:
-                            brace_count = stripped.count('{') - stripped.count('}')
+                    # Skip borderless panes (plugin containers like tab-bar, status-bar)
+                    if 'borderless=true' in stripped:
+                        if '{' in stripped:
+                            brace_count = 1
                             while brace_count > 0:
                                 next_line = next(lines_iter, '')
                                 brace_count += next_line.count('{') - next_line.count('}')
-                            continue
-
-                        # Skip non-pane lines (args, start_suspended, etc.)
-                        if not stripped.startswith('pane'):
-                            continue
-
-                        # Skip borderless panes (plugin containers like tab-bar, status-bar)
-                        if 'borderless=true' in stripped:
-                            if '{' in stripped:
-                                brace_count = 1
-                                while brace_count > 0:
-                                    next_line = next(lines_iter, '')
-                                    brace_count += next_line.count('{') - next_line.count('}')
-                            continue
-
-                        # Skip floating_panes section
-                        if 'floating_panes' in stripped:
-                            if '{' in stripped:
-                                brace_count = 1
-                                while brace_count > 0:
-                                    next_line = next(lines_iter, '')
-                                    brace_count += next_line.count('{') - next_line.count('}')
-                            continue
-
-                        # Pane with braces - recursive parse
+                        continue
+
+                    # Skip floating_panes section
+                    if 'floating_panes' in stripped:
                         if '{' in stripped:
-                            attrs = extract_attrs(stripped)
-                            child = parse_pane(attrs)
-                            # Keep panes with children, commands, names, or percentage sizes
-                            if child.get("children") or child.get("command") or child.get("name"):
-                                pane["children"].append(child)
-                            elif child.get("size") and '%' in str(child.get("size", "")):
-                                # Percentage-sized pane without command = shell
-                                pane["children"].append(child)
-                        else:
-                            # Leaf pane without braces (e.g., "pane size="50%"")
-                            attrs = extract_attrs(stripped)
-                            leaf = {"type": "pane", "children": [], **attrs}
-                            pane["children"].append(leaf)
+                            brace_count = 1
+                            while brace_count > 0:
+                                next_line = next(lines_iter, '')
+                                brace_count += next_line.count('{') - next_line.count('}')
+                        continue
 
-                    return pane
+                    # Pane with braces - recursive parse
+                    if '{' in stripped:
+                        attrs = extract_attrs(stripped)
+                        child = parse_pane(attrs)
+                        # Keep panes with children, commands, names, or percentage sizes
+                        if child.get("children") or child.get("command") or child.get("name"):
+                            pane["children"].append(child)
+                        elif child.get("size") and '%' in str(child.get("size", "")):
+                            # Percentage-sized pane without command = shell
+                            pane["children"].append(child)
+                    else:
+                        # Leaf pane without braces (e.g., "pane size="50%"")
+                        attrs = extract_attrs(stripped)
+                        leaf = {"type": "pane", "children": [], **attrs}
+                        pane["children"].append(leaf)
 
-                return parse_pane()
+                return pane
 
-            def render_layout(pane: dict, width: int, height: int, x: int = 0, y: int = 0) -> list:
-                """Render pane tree into a 2D grid. Returns list of (x, y, w, h, label, focused)."""
-                cells = []
-                children = pane.get("children", [])
+            return parse_pane()
 
-                if not children:
-                    # Leaf pane - show it
-                    label = pane.get("command") or pane.get("name") or "shell"
-                    label = label.split('/')[-1][:12]
-                    cells.append((x, y, width, height, label, pane.get("focused", False)))
-                else:
-                    # Container - split children based on direction
-                    is_vertical = pane.get("split") == "vertical"  # vertical = side by side
-                    n = len(children)
-
-                    # Calculate sizes from percentages or divide equally
-                    sizes = []
-                    for c in children:
-                        sz = c.get("size")
-                        if sz and sz.endswith('%'):
-                            sizes.append(int(sz[:-1]))
-                        elif sz and sz.isdigit():
-                            sizes.append(int(sz))
-                        else:
-                            sizes.append(0)
-
-                    # Normalize sizes - distribute remaining to unspecified
-                    total = sum(sizes)
-                    unspec = sizes.count(0)
-                    if total < 100 and unspec > 0:
-                        remaining = 100 - total
-                        for i in range(len(sizes)):
-                            if sizes[i] == 0:
-                                sizes[i] = remaining // unspec
-
-                    # Render children
-                    if is_vertical:
-                        # Horizontal arrangement (side by side)
-                        cx = x
-                        for i, child in enumerate(children):
-                            cw = max(1, (width * sizes[i]) // 100) if sum(sizes) > 0 else width // n
-                            if i == n - 1:  # Last child takes remaining space
-                                cw = width - (cx - x)
-                            cells.extend(render_layout(child, cw, height, cx, y))
-                            cx += cw
+        def render_layout(pane: dict, width: int, height: int, x: int = 0, y: int = 0) -> list:
+            """Render pane tree into a 2D grid. Returns list of (x, y, w, h, label, focused)."""
+            cells = []
+            children = pane.get("children", [])
+
+            if not children:
+                # Leaf pane - show it
+                label = pane.get("command") or pane.get("name") or "shell"
+                label = label.split('/')[-1][:12]
+                cells.append((x, y, width, height, label, pane.get("focused", False)))
+            else:
+                # Container - split children based on direction
+                is_vertical = pane.get("split") == "vertical"  # vertical = side by side
+                n = len(children)
+
+                # Calculate sizes from percentages or divide equally
+                sizes = []
+                for c in children:
+                    sz = c.get("size")
+                    if sz and sz.endswith('%'):
+                        sizes.append(int(sz[:-1]))
+                    elif sz and sz.isdigit():
+                        sizes.append(int(sz))
                     else:
-                        # Vertical arrangement (stacked)
-                        cy = y
-                        for i, child in enumerate(children):
-                            ch = max(1, (height * sizes[i]) // 100) if sum(sizes) > 0 else height // n
-                            if i == n - 1:
-                                ch = height - (cy - y)
-                            cells.extend(render_layout(child, width, ch, x, cy))
-                            cy += ch
-
-                return cells
-
-            def draw_grid(cells: list, width: int, height: int) -> list:
-                """Draw cells as ASCII grid with proper box characters."""
-                # Initialize grid and metadata
-                grid = [[' ' for _ in range(width)] for _ in range(height)]
-                colors = [[None for _ in range(width)] for _ in range(height)]
-
-                # Sort cells by area (draw smaller on top)
-                cells = sorted(cells, key=lambda c: c[2] * c[3], reverse=True)
-
-                for cx, cy, cw, ch, label, focused in cells:
-                    if cw < 3 or ch < 1:
-                        continue
+                        sizes.append(0)
+
+                # Normalize sizes - distribute remaining to unspecified
+                total = sum(sizes)
+                unspec = sizes.count(0)
+                if total < 100 and unspec > 0:
+                    remaining = 100 - total
+                    for i in range(len(sizes)):
+                        if sizes[i] == 0:
+                            sizes[i] = remaining // unspec
+
+                # Render children
+                if is_vertical:
+                    # Horizontal arrangement (side by side)
+                    cx = x
+                    for i, child in enumerate(children):
+                        cw = max(1, (width * sizes[i]) // 100) if sum(sizes) > 0 else width // n
+                        if i == n - 1:  # Last child takes remaining space
+                            cw = width - (cx - x)
+                        cells.extend(render_layout(child, cw, height, cx, y))
+                        cx += cw
+                else:
+                    # Vertical arrangement (stacked)
+                    cy = y
+                    for i, child in enumerate(children):
+                        ch = max(1, (height * sizes[i]) // 100) if sum(sizes) > 0 else height // n
+                        if i == n - 1:
+                            ch = height - (cy - y)
+                        cells.extend(render_layout(child, width, ch, x, cy))
+                        cy += ch
+
+            return cells
+
+        def draw_grid(cells: list, width: int, height: int) -> list:
+            """Draw cells as ASCII grid with proper box characters."""
+            # Initialize grid and metadata
+            grid = [[' ' for _ in range(width)] for _ in range(height)]
+            colors = [[None for _ in range(width)] for _ in range(height)]
+
+            # Sort cells by area (draw smaller on top)
+            cells = sorted(cells, key=lambda c: c[2] * c[3], reverse=True)
+
+            for cx, cy, cw, ch, label, focused in cells:
+                if cw < 3 or ch < 1:
+                    continue
 
-                    # Draw horizontal borders
-                    for i in range(cx, min(cx + cw, width)):
-                        if cy < height:
-                            grid[cy][i] = '─'
-                            if focused:
-                                colors[cy][i] = O
-                        if cy + ch - 1 < height and ch > 1:
-                            grid[cy + ch - 1][i] = '─'
+                # Draw horizontal borders
+                for i in range(cx, min(cx + cw, width)):
+                    if cy < height:
+                        grid[cy][i] = '─'
+                        if focused:
+                            colors[cy][i] = O
+                    if cy + ch - 1 < height and ch > 1:
+                        grid[cy + ch - 1][i] = '─'
+                        if focused:
+                            colors[cy + ch - 1][i] = O
+
+                # Draw vertical borders
+                for j in range(cy, min(cy + ch, height)):
+                    if cx < width:
+                        grid[j][cx] = '│'
+                        if focused:
+                            colors[j][cx] = O
+                    if cx + cw - 1 < width:
+                        grid[j][cx + cw - 1] = '│'
+                        if focused:
+                            colors[j][cx + cw - 1] = O
+
+                # Corners
+                if cy < height and cx < width:
+                    grid[cy][cx] = '┌'
+                if cy < height and cx + cw - 1 < width:
+                    grid[cy][cx + cw - 1] = '┐'
+                if cy + ch - 1 < height and cx < width:
+                    grid[cy + ch - 1][cx] = '└'
+                if cy + ch - 1 < height and cx + cw - 1 < width:
+                    grid[cy + ch - 1][cx + cw - 1] = '┘'
+
+                # Label (centered)
+                label_y = cy + max(1, ch // 2) if ch > 1 else cy
+                max_label_len = cw - 2
+                if max_label_len > 0:
+                    disp_label = label[:max_label_len]
+                    label_x = cx + 1 + (max_label_len - len(disp_label)) // 2
+                    for k, char in enumerate(disp_label):
+                        if label_x + k < width:
+                            grid[label_y][label_x + k] = char
                             if focused:
-                                colors[cy + ch - 1][i] = O
+                                colors[label_y][label_x + k] = O
+
+            # Fix overlapping corners
+            for y in range(height):
+                for x in range(width):
+                    c = grid[y][x]
+                    # Check neighbors for T-junctions
+                    has_up = y > 0 and grid[y-1][x] in '│┌┐├┤┬┴┼'
+                    has_down = y < height-1 and grid[y+1][x] in '│└┘├┤┬┴┼'
+                    has_left = x > 0 and grid[y][x-1] in '─┌└├┬┴┼'
+                    has_right = x < width-1 and grid[y][x+1] in '─┐┘┤┬┴┼'
+
+                    if c in '┌┐└┘─│':
+                        if has_up and has_down and has_left and has_right:
+                            grid[y][x] = '┼'
+                        elif has_up and has_down and has_right:
+                            grid[y][x] = '├'
+                        elif has_up and has_down and has_left:
+                            grid[y][x] = '┤'
+                        elif has_left and has_right and has_down:
+                            grid[y][x] = '┬'
+                        elif has_left and has_right and has_up:
+                            grid[y][x] = '┴'
+
+            # Build output with colors
+            lines = []
+            for y in range(height):
+                line = ""
+                for x in range(width):
+                    if colors[y][x]:
+                        line += colors[y][x] + grid[y][x] + R
+                    else:
+                        line += grid[y][x]
+                lines.append(line)
+
+            return lines
+
+        lines = []
+
+        for i, sess in enumerate(session_maps):
+            name = sess["name"]
+            is_agent = name == "zellij-agent"
+            is_current = sess["current"]
+
+            # Session header
+            badge = f" {O}[AGENT]{R}" if is_agent else ""
+            badge_len = 8 if is_agent else 0
+            status = f"{G}●{R}" if is_current else f"{D}○{R}"
+
+            header = f"{status} {B}{name}{R}{badge}"
+            header_len = 2 + len(name) + badge_len
+
+            lines.append(f"{O}╔{'═' * 62}╗{R}")
+            lines.append(f"{O}║{R} {header}{' ' * (60 - header_len)} {O}║{R}")
+            lines.append(f"{O}╚{'═' * 62}╝{R}")
+
+            # Get full layout for this session
+            layout_result = await zellij_action("dump-layout", capture=True, session=name)
+            layout_str = layout_result.get("stdout", "") if layout_result.get("success") else ""
+
+            # Parse tabs from layout
+            for tab in sess["tabs"]:
+                tname = tab["name"]
+                is_focused = tab["focused"]
+
+                focus = f"{O}►{R} " if is_focused else "  "
+                tab_status = f"{G}active{R}" if is_focused else f"{D}idle{R}"
+                lines.append(f"  {focus}{D}[{R}{tname}{D}]{R} {tab_status}")
+
+                if not compact:
+                    # Extract tab section from layout
+                    tab_pattern = rf'tab name="{re.escape(tname)}"[^{{]*\{{'
+                    tab_match = re.search(tab_pattern, layout_str)
+
+                    if tab_match:
+                        # Find the matching closing brace
+                        start = tab_match.end()
+                        brace_count = 1
+                        end = start
+                        while brace_count > 0 and end < len(layout_str):
+                            if layout_str[end] == '{':
+                                brace_count += 1
+                            elif layout_str[end] == '}':
+                                brace_count -= 1
+                            end += 1
+
+                        tab_content = layout_str[start:end-1]
+
+                        # Parse and render
+                        tree = parse_layout_tree(tab_content)
+                        cells = render_layout(tree, 60, 6, 0, 0)
+
+                        if cells:
+                            grid_lines = draw_grid(cells, 60, 6)
+                            for gl in grid_lines:
+                                lines.append(f"  {D}{gl}{R}")
+
+                    # Floating panes
+                    if tab["floating"]:
+                        fl_names = ", ".join(f[:15] for f in tab["floating"][:3])
+                        if len(tab["floating"]) > 3:
+                            fl_names += f" +{len(tab['floating'])-3}"
+                        lines.append(f"  {O}~{R} floating: {fl_names}")
+
+            lines.append("")
+
+        # Legend
+        lines.append(f"{O}●{R} current  {D}○{R} idle  {O}►{R} focused tab  {O}~{R} floating")
+
+        result = {
+            "success": True,
+            "map": "\n".join(lines),
+            "sessions": session_maps,
+        }
+    return result
 
-                    # Draw vertical borders
-                    for j in range(cy, min(cy + ch, height)):
-                        if cx < width:
-                            grid[j][cx] = '│'
-                            if focused:
-                                colors[j][cx] = O
-                        if cx + cw - 1 < width:
-                            grid[j][cx + cw - 1] = '│'
-                            if focused:
-                                colors[j][cx + cw - 1] = O
-
-                    # Corners
-                    if cy < height and cx < width:
-                        grid[cy][cx] = '┌'
-                    if cy < height and cx + cw - 1 < width:
-                        grid[cy][cx + cw - 1] = '┐'
-                    if cy + ch - 1 < height and cx < width:
-                        grid[cy + ch - 1][cx] = '└'
-                    if cy + ch - 1 < height and cx + cw - 1 < width:
-                        grid[cy + ch - 1][cx + cw - 1] = '┘'
-
-                    # Label (centered)
-                    label_y = cy + max(1, ch // 2) if ch > 1 else cy
-                    max_label_len = cw - 2
-                    if max_label_len > 0:
-                        disp_label = label[:max_label_len]
-                        label_x = cx + 1 + (max_label_len - len(disp_label)) // 2
-                        for k, char in enumerate(disp_label):
-                            if label_x + k < width:
-                                grid[label_y][label_x + k] = char
-                                if focused:
-                                    colors[label_y][label_x + k] = O
-
-                # Fix overlapping corners
-                for y in range(height):
-                    for x in range(width):
-                        c = grid[y][x]
-                        # Check neighbors for T-junctions
-                        has_up = y > 0 and grid[y-1][x] in '│┌┐├┤┬┴┼'
-                        has_down = y < height-1 and grid[y+1][x] in '│└┘├┤┬┴┼'
-                        has_left = x > 0 and grid[y][x-1] in '─┌└├┬┴┼'
-                        has_right = x < width-1 and grid[y][x+1] in '─┐┘┤┬┴┼'
-
-                        if c in '┌┐└┘─│':
-                            if has_up and has_down and has_left and has_right:
-                                grid[y][x] = '┼'
-                            elif has_up and has_down and has_right:
-                                grid[y][x] = '├'
-                            elif has_up and has_down and has_left:
-                                grid[y][x] = '┤'
-                            elif has_left and has_right and has_down:
-                                grid[y][x] = '┬'
-                            elif has_left and has_right and has_up:
-                                grid[y][x] = '┴'
-
-                # Build output with colors
-                lines = []
-                for y in range(height):
-                    line = ""
-                    for x in range(width):
-                        if colors[y][x]:
-                            line += colors[y][x] + grid[y][x] + R
-                        else:
-                            line += grid[y][x]
-                    lines.append(line)
 
-                return lines
+async def _tool_session_attach(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    action = arguments.get("action", "list")
+    target_session = arguments.get("session")
 
-            lines = []
+    if action == "list":
+        attachments = await asyncio.to_thread(session_manager.list_attachments)
+        result = {
+            "success": True,
+            "attachments": attachments,
+            "count": len(attachments),
+        }
+    elif action == "attach":
+        if not target_session:
+            result = {"success": False, "error": "Session name required for attach"}
+        else:
+            result = await session_manager.headless_attach(target_session)
+            if result.get("success"):
+                # Also start daemon in the newly attached session
+                daemon_result = await start_daemon(target_session)
+                result["daemon"] = daemon_result
+    elif action == "detach":
+        if not target_session:
+            result = {"success": False, "error": "Session name required for detach"}
+        else:
+            result = await asyncio.to_thread(session_manager.detach, target_session)
+    elif action == "detach_all":
+        await asyncio.to_thread(session_manager.cleanup_all)
+        result = {"success": True, "message": "All attachments cleaned up"}
+    else:
+        result = {"success": False, "error": f"Unknown action: {action}"}
+    return result
 
-            for i, sess in enumerate(session_maps):
-                name = sess["name"]
-                is_agent = name == "zellij-agent"
-                is_current = sess["current"]
 
-                # Session header
-                badge = f" {O}[AGENT]{R}" if is_agent else ""
-                badge_len = 8 if is_agent else 0
-                status = f"{G}●{R}" if is_current else f"{D}○{R}"
+# === LAYOUT ===
 
-                header = f"{status} {B}{name}{R}{badge}"
-                header_len = 2 + len(name) + badge_len
+async def _tool_dump_layout(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("dump-layout", capture=True, session=session)
+    return result
 
-                lines.append(f"{O}╔{'═' * 62}╗{R}")
-                lines.append(f"{O}║{R} {header}{' ' * (60 - header_len)} {O}║{R}")
-                lines.append(f"{O}╚{'═' * 62}╝{R}")
 
-                # Get full layout for this session
-                layout_result = zellij_action("dump-layout", capture=True, session=name)
-                layout_str = layout_result.get("stdout", "") if layout_result.get("success") else ""
+async def _tool_swap_layout(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    direction = arguments.get("direction", "next")
+    if direction == "next":
+        result = await zellij_action("next-swap-layout", session=session)
+    else:
+        result = await zellij_action("previous-swap-layout", session=session)
+    return result
 
-                # Parse tabs from layout
-                for tab in sess["tabs"]:
-                    tname = tab["name"]
-                    is_focused = tab["focused"]
 
-                    focus = f"{O}►{R} " if is_focused else "  "
-                    tab_status = f"{G}active{R}" if is_focused else f"{D}idle{R}"
-                    lines.append(f"  {focus}{D}[{R}{tname}{D}]{R} {tab_status}")
+# === MODE ===
 
-                    if not compact:
-                        # Extract tab section from layout
-                        tab_pattern = rf'tab name="{re.escape(tname)}"[^{{]*\{{'
-                        tab_match = re.search(tab_pattern, layout_str)
+async def _tool_switch_mode(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    result = await zellij_action("switch-mode", arguments["mode"], session=session)
+    return result
 
-                        if tab_match:
-                            # Find the matching closing brace
-                            start = tab_match.end()
-                            brace_count = 1
-                            end = start
-                            while brace_count > 0 and end < len(layout_str):
-                                if layout_str[end] == '{':
-                                    brace_count += 1
-                                elif layout_str[end] == '}':
-                                    brace_count -= 1
-                                end += 1
 
-                            tab_content = layout_str[start:end-1]
+# === PLUGINS ===
+
+async def _tool_launch_plugin(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    args = ["launch-plugin", arguments["url"]]
+    if arguments.get("floating"):
+        args.append("--floating")
+    if arguments.get("in_place"):
+        args.append("--in-place")
+    if arguments.get("skip_cache"):
+        args.append("--skip-plugin-cache")
+    configuration = arguments.get("configuration")
+    if configuration:
+        for k, v in configuration.items():
+            args.extend(["--configuration", f"{k}={v}"])
+    result = await zellij_action(*args, session=session)
+    return result
 
-                            # Parse and render
-                            tree = parse_layout_tree(tab_content)
-                            cells = render_layout(tree, 60, 6, 0, 0)
 
-                            if cells:
-                                grid_lines = draw_grid(cells, 60, 6)
-                                for gl in grid_lines:
-                                    lines.append(f"  {D}{gl}{R}")
+async def _tool_pipe(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    name = arguments.get("name")
+    payload = arguments.get("payload")
+    plugin = arguments.get("plugin")
+    pipe_args = arguments.get("args")
+    args = ["pipe"]
+    if name:
+        args.extend(["--name", name])
+    if payload:
+        args.extend(["--payload", payload])
+    if plugin:
+        args.extend(["--plugin", plugin])
+    if pipe_args:
+        args.extend(["--args", *pipe_args])
+    result = await zellij_action(*args, session=session)
+    return result
 
-                        # Floating panes
-                        if tab["floating"]:
-                            fl_names = ", ".join(f[:15] for f in tab["floating"][:3])
-                            if len(tab["floating"]) > 3:
-                                fl_names += f" +{len(tab['floating'])-3}"
-                            lines.append(f"  {O}~{R} floating: {fl_names}")
 
-                lines.append("")
+# === WORKSPACE MANAGEMENT ===
 
-            # Legend
-            lines.append(f"{O}●{R} current  {D}○{R} idle  {O}►{R} focused tab  {O}~{R} floating")
+async def _tool_agent_session(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # DEPRECATED: Agent session isolation doesn't work (Zellij can't create
+    # panes in detached sessions). Now uses tab-based workspaces instead.
+    action = arguments.get("action", "status")
 
-            result = {
-                "success": True,
-                "map": "\n".join(lines),
-                "sessions": session_maps,
-            }
+    if action == "create":
+        # Instead of creating a separate session, create a workspace tab
+        workspace_tab = DEFAULT_WORKSPACE_TAB
+        layout_result = await zellij_action("dump-layout", capture=True, session=session)
+        tab_exists = False
+        if layout_result.get("success"):
+            if f'name="{workspace_tab}"' in layout_result.get("stdout", ""):
+                tab_exists = True
+        if not tab_exists:
+            await zellij_action("new-tab", "--name", workspace_tab, session=session)
+        result = {
+            "success": True,
+            "workspace_tab": workspace_tab,
+            "message": f"Workspace tab '{workspace_tab}' ready in current session",
+            "note": "Session isolation deprecated - using tab-based workspaces now"
+        }
+    elif action == "status":
+        sessions = await asyncio.to_thread(get_active_sessions)
+        # Check for workspace tabs in current session
+        layout_result = await zellij_action("dump-layout", capture=True, session=session)
+        workspace_tabs = []
+        if layout_result.get("success"):
+            layout = layout_result.get("stdout", "")
+            # Find all tab names
+            for match in re.finditer(r'tab name="([^"]+)"', layout):
+                workspace_tabs.append(match.group(1))
+        result = {
+            "success": True,
+            "workspace_tabs": workspace_tabs,
+            "all_sessions": sessions,
+            "note": "Using tab-based workspaces (session isolation deprecated)"
+        }
+    elif action == "destroy":
+        # Close the workspace tab if it exists
+        workspace_tab = DEFAULT_WORKSPACE_TAB
+        await zellij_action("go-to-tab-name", workspace_tab, session=session)
+        await asyncio.sleep(0.2)
+        await zellij_action("close-tab", session=session)
+        result = {
+            "success": True,
+            "closed_tab": workspace_tab,
+            "note": "Closed workspace tab (session isolation deprecated)"
+        }
+    else:
+        result = {"success": False, "error": f"Unknown action: {action}"}
+    return result
 
-    elif name == "session_attach":
-        action = arguments.get("action", "list")
-        target_session = arguments.get("session")
 
-        if action == "list":
-            attachments = session_manager.list_attachments()
-            result = {
-                "success": True,
-                "attachments": attachments,
-                "count": len(attachments),
-            }
-        elif action == "attach":
-            if not target_session:
-                result = {"success": False, "error": "Session name required for attach"}
-            else:
-                result = session_manager.headless_attach(target_session)
-                if result.get("success"):
-                    # Also start daemon in the newly attached session
-                    daemon_result = start_daemon(target_session)
-                    result["daemon"] = daemon_result
-        elif action == "detach":
-            if not target_session:
-                result = {"success": False, "error": "Session name required for detach"}
-            else:
-                result = session_manager.detach(target_session)
-        elif action == "detach_all":
-            session_manager.cleanup_all()
-            result = {"success": True, "message": "All attachments cleaned up"}
+async def _tool_spawn_agents(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    # Spawn multiple Claude agents in parallel in current session (tab-based workspaces)
+    tasks = arguments.get("tasks", [])
+    tab = arguments.get("tab", "agents")
+    skip_permissions = arguments.get("dangerously_skip_permissions", False)
+
+    if not tasks:
+        result = {"success": False, "error": "No tasks provided"}
+    else:
+        # Create tab for agents if needed
+        layout_result = await zellij_action("dump-layout", capture=True, session=session)
+        if layout_result.get("success") and f'name="{tab}"' not in layout_result.get("stdout", ""):
+            await zellij_action("new-tab", "--name", tab, session=session)
         else:
-            result = {"success": False, "error": f"Unknown action: {action}"}
+            await zellij_action("go-to-tab-name", tab, session=session)
+
+        spawned = []
+        for i, task in enumerate(tasks):
+            task_name = task.get("name", f"agent-{i}")
+            prompt = task.get("prompt", "")
+            model = task.get("model", "claude-sonnet-4-22k-0514")
+            cwd = task.get("cwd")
+
+            # Build claude command
+            claude_args = ["claude", "--model", model, "--print"]
+            if skip_permissions:
+                claude_args.append("--dangerously-skip-permissions")
+
+            # Escape prompt for shell
+            escaped_prompt = prompt.replace("'", "'\"'\"'")
+            claude_cmd = " ".join(claude_args) + f" '{escaped_prompt}'"
+
+            # Determine direction for grid layout
+            direction = calculate_grid_direction(i)
+
+            # Create pane with claude command
+            pane_name = f"agent-{task_name}"
+            args = ["run", "--name", pane_name]
+            if direction and i > 0:
+                args.extend(["--direction", direction])
+            if cwd:
+                args.extend(["--cwd", cwd])
+            args.extend(["--", "bash", "-c", claude_cmd])
 
-    # === LAYOUT ===
-    elif name == "dump_layout":
-        result = zellij_action("dump-layout", capture=True, session=session)
+            create_result = await run_zellij(*args, session=session)
 
+            if create_result.get("success"):
+                # Register the agent
+                agent = SpawnedAgent(
+                    name=task_name,
+                    pane_name=pane_name,
+                    task=task_name,
+                    prompt=prompt,
+                    model=model,
+                    tab=tab,
+                )
+                with state._lock:
+                    state.spawned_agents[task_name] = agent
 
-    elif name == "swap_layout":
-        direction = arguments.get("direction", "next")
-        if direction == "next":
-            result = zellij_action("next-swap-layout", session=session)
-        else:
-            result = zellij_action("previous-swap-layout", session=session)
+                # Also register as pane for read operations
+                state.register_pane(pane_name, tab, command="claude")
 
-    # === MODE ===
-    elif name == "switch_mode":
-        result = zellij_action("switch-mode", arguments["mode"], session=session)
+                spawned.append({
+                    "name": task_name,
+                    "pane": pane_name,
+                    "model": model,
+                    "prompt": prompt[:100] + "..." if len(prompt) > 100 else prompt,
+                })
 
-    # === PLUGINS ===
-    elif name == "launch_plugin":
-        args = ["launch-plugin", arguments["url"]]
-        if arguments.get("floating"):
-            args.append("--floating")
-        if arguments.get("in_place"):
-            args.append("--in-place")
-        if arguments.get("skip_cache"):
-            args.append("--skip-plugin-cache")
-        if arguments.get("configuration"):
-            for k, v in arguments["configuration"].items():
-                args.extend(["--configuration", f"{k}={v}"])
-        result = zellij_action(*args, session=session)
-
-    elif name == "pipe":
-        args = ["pipe"]
-        if arguments.get("name"):
-            args.extend(["--name", arguments["name"]])
-        if arguments.get("payload"):
-            args.extend(["--payload", arguments["payload"]])
-        if arguments.get("plugin"):
-            args.extend(["--plugin", arguments["plugin"]])
-        if arguments.get("args"):
-            args.extend(["--args", *arguments["args"]])
-        result = zellij_action(*args, session=session)
+        result = {
+            "success": True,
+            "spawned": len(spawned),
+            "agents": spawned,
+            "tab": tab,
+            "session": session,
+        }
+        layout_cache.invalidate(session)
+    return result
 
-    # === WORKSPACE MANAGEMENT ===
-    elif name == "agent_session":
-        # DEPRECATED: Agent session isolation doesn't work (Zellij can't create
-        # panes in detached sessions). Now uses tab-based workspaces instead.
-        action = arguments.get("action", "status")
-
-        if action == "create":
-            # Instead of creating a separate session, create a workspace tab
-            workspace_tab = DEFAULT_WORKSPACE_TAB
-            layout_result = zellij_action("dump-layout", capture=True, session=session)
-            tab_exists = False
-            if layout_result.get("success"):
-                if f'name="{workspace_tab}"' in layout_result.get("stdout", ""):
-                    tab_exists = True
-            if not tab_exists:
-                zellij_action("new-tab", "--name", workspace_tab, session=session)
-            result = {
-                "success": True,
-                "workspace_tab": workspace_tab,
-                "message": f"Workspace tab '{workspace_tab}' ready in current session",
-                "note": "Session isolation deprecated - using tab-based workspaces now"
-            }
-        elif action == "status":
-            sessions = get_active_sessions()
-            # Check for workspace tabs in current session
-            layout_result = zellij_action("dump-layout", capture=True, session=session)
-            workspace_tabs = []
-            if layout_result.get("success"):
-                layout = layout_result.get("stdout", "")
-                # Find all tab names
-                for match in re.finditer(r'tab name="([^"]+)"', layout):
-                    workspace_tabs.append(match.group(1))
-            result = {
-                "success": True,
-                "workspace_tabs": workspace_tabs,
-                "all_sessions": sessions,
-                "note": "Using tab-based workspaces (session isolation deprecated)"
-            }
-        elif action == "destroy":
-            # Close the workspace tab if it exists
-            workspace_tab = DEFAULT_WORKSPACE_TAB
-            zellij_action("go-to-tab-name", workspace_tab, session=session)
-            time.sleep(0.2)
-            zellij_action("close-tab", session=session)
-            result = {
-                "success": True,
-                "closed_tab": workspace_tab,
-                "note": "Closed workspace tab (session isolation deprecated)"
-            }
-        else:
-            result = {"success": False, "error": f"Unknown action: {action}"}
 
-    elif name == "spawn_agents":
-        # Spawn multiple Claude agents in parallel in current session (tab-based workspaces)
-        tasks = arguments.get("tasks", [])
-        tab = arguments.get("tab", "agents")
-        skip_permissions = arguments.get("dangerously_skip_permissions", False)
+async def _tool_list_spawned_agents(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    with state._lock:
+        agents_list = []
+        for name, agent in state.spawned_agents.items():
+            agents_list.append({
+                "name": agent.name,
+                "pane": agent.pane_name,
+                "task": agent.task,
+                "model": agent.model,
+                "status": agent.status,
+                "spawned_at": agent.spawned_at,
+                "tab": agent.tab,
+                "prompt": agent.prompt[:80] + "..." if len(agent.prompt) > 80 else agent.prompt,
+            })
+    result = {"success": True, "agents": agents_list, "count": len(agents_list)}
+    return result
+
 
-        if not tasks:
-            result = {"success": False, "error": "No tasks provided"}
-        else:
-            # Create tab for agents if needed
-            layout_result = zellij_action("dump-layout", capture=True, session=session)
-            if layout_result.get("success") and f'name="{tab}"' not in layout_result.get("stdout", ""):
-                zellij_action("new-tab", "--name", tab, session=session)
-            else:
-                zellij_action("go-to-tab-name", tab, session=session)
-
-            spawned = []
-            for i, task in enumerate(tasks):
-                task_name = task.get("name", f"agent-{i}")
-                prompt = task.get("prompt", "")
-                model = task.get("model", "claude-sonnet-4-22k-0514")
-                cwd = task.get("cwd")
-
-                # Build claude command
-                claude_args = ["claude", "--model", model, "--print"]
-                if skip_permissions:
-                    claude_args.append("--dangerously-skip-permissions")
-
-                # Escape prompt for shell
-                escaped_prompt = prompt.replace("'", "'\"'\"'")
-                claude_cmd = " ".join(claude_args) + f" '{escaped_prompt}'"
-
-                # Determine direction for grid layout
-                direction = calculate_grid_direction(i)
-
-                # Create pane with claude command
-                pane_name = f"agent-{task_name}"
-                args = ["run", "--name", pane_name]
-                if direction and i > 0:
-                    args.extend(["--direction", direction])
-                if cwd:
-                    args.extend(["--cwd", cwd])
-                args.extend(["--", "bash", "-c", claude_cmd])
-
-                create_result = run_zellij(*args, session=session)
-
-                if create_result.get("success"):
-                    # Register the agent
-                    agent = SpawnedAgent(
-                        name=task_name,
-                        pane_name=pane_name,
-                        task=task_name,
-                        prompt=prompt,
-                        model=model,
-                        tab=tab,
-                    )
-                    with state._lock:
-                        state.spawned_agents[task_name] = agent
+async def _tool_agent_output(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    agent_name = arguments["name"]
+    tail_lines = arguments.get("tail", 50)
 
-                    # Also register as pane for read operations
-                    state.register_pane(pane_name, tab, command="claude")
+    with state._lock:
+        agent = state.spawned_agents.get(agent_name)
 
-                    spawned.append({
-                        "name": task_name,
-                        "pane": pane_name,
-                        "model": model,
-                        "prompt": prompt[:100] + "..." if len(prompt) > 100 else prompt,
-                    })
+    if not agent:
+        result = {"success": False, "error": f"Agent '{agent_name}' not found"}
+    else:
+        # Panes are in current session (tab-based workspaces)
+        async def do_read():
+            args = ["dump-screen", "/dev/stdout", "--full"]
+            return await zellij_action(*args, capture=True, session=session)
 
+        read_result = await with_pane_focus(agent.pane_name, do_read, session=session)
+
+        if read_result.get("success"):
+            content = strip_ansi(read_result.get("stdout", ""))
+            if tail_lines:
+                lines = tail_text(content, tail_lines).split('\n')
+            else:
+                lines = content.split('\n')
             result = {
                 "success": True,
-                "spawned": len(spawned),
-                "agents": spawned,
-                "tab": tab,
-                "session": session,
+                "agent": agent_name,
+                "output": '\n'.join(lines),
+                "lines": len(lines),
             }
-            layout_cache.invalidate(session)
+        else:
+            result = read_result
+    return result
 
-    elif name == "list_spawned_agents":
-        with state._lock:
-            agents_list = []
-            for name, agent in state.spawned_agents.items():
-                agents_list.append({
-                    "name": agent.name,
-                    "pane": agent.pane_name,
-                    "task": agent.task,
-                    "model": agent.model,
-                    "status": agent.status,
-                    "spawned_at": agent.spawned_at,
-                    "tab": agent.tab,
-                    "prompt": agent.prompt[:80] + "..." if len(agent.prompt) > 80 else agent.prompt,
-                })
-        result = {"success": True, "agents": agents_list, "count": len(agents_list)}
 
-    elif name == "agent_output":
-        agent_name = arguments["name"]
-        tail_lines = arguments.get("tail", 50)
+async def _tool_stop_agent(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    agent_name = arguments["name"]
+
+    with state._lock:
+        agent = state.spawned_agents.get(agent_name)
+
+    if not agent:
+        result = {"success": False, "error": f"Agent '{agent_name}' not found"}
+    else:
+        # Panes are in current session (tab-based workspaces)
+        async def do_interrupt():
+            return await zellij_action("write", "3", session=session)  # Ctrl+C
 
-        with state._lock:
-            agent = state.spawned_agents.get(agent_name)
+        interrupt_result = await with_pane_focus(agent.pane_name, do_interrupt, session=session)
 
-        if not agent:
-            result = {"success": False, "error": f"Agent '{agent_name}' not found"}
+        if interrupt_result.get("success"):
+            with state._lock:
+                if agent_name in state.spawned_agents:
+                    state.spawned_agents[agent_name].status = "stopped"
+            result = {"success": True, "stopped": agent_name}
         else:
-            # Panes are in current session (tab-based workspaces)
-            async def do_read():
-                args = ["dump-screen", "/dev/stdout", "--full"]
-                return zellij_action(*args, capture=True, session=session)
+            result = interrupt_result
+    return result
 
-            read_result = await with_pane_focus(agent.pane_name, do_read, session=session)
 
-            if read_result.get("success"):
-                content = strip_ansi(read_result.get("stdout", ""))
-                lines = content.split('\n')
-                if tail_lines:
-                    lines = lines[-tail_lines:]
-                result = {
-                    "success": True,
-                    "agent": agent_name,
-                    "output": '\n'.join(lines),
-                    "lines": len(lines),
-                }
-            else:
-                result = read_result
+# === BATCHING ===
+
+# Tools that map to a fixed zellij action regardless of arguments. Runs of
+# these inside a script are pipelined through one run_zellij_batch call.
+STATIC_ACTIONS = {
+    "focus_next_pane": ("focus-next-pane",),
+    "focus_previous_pane": ("focus-previous-pane",),
+    "move_pane_backwards": ("move-pane-backwards",),
+    "undo_rename_pane": ("undo-rename-pane",),
+    "toggle_floating": ("toggle-floating-panes",),
+    "toggle_fullscreen": ("toggle-fullscreen",),
+    "toggle_embed_or_floating": ("toggle-pane-embed-or-floating",),
+    "toggle_pane_frames": ("toggle-pane-frames",),
+    "toggle_sync_tab": ("toggle-active-sync-tab",),
+    "close_tab": ("close-tab",),
+    "undo_rename_tab": ("undo-rename-tab",),
+    "clear_pane": ("clear",),
+    "edit_scrollback": ("edit-scrollback",),
+}
 
-    elif name == "stop_agent":
-        agent_name = arguments["name"]
 
-        with state._lock:
-            agent = state.spawned_agents.get(agent_name)
+async def _run_static_action(action: tuple[str, ...], arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    return await zellij_action(*action, session=session)
 
-        if not agent:
-            result = {"success": False, "error": f"Agent '{agent_name}' not found"}
-        else:
-            # Panes are in current session (tab-based workspaces)
-            async def do_interrupt():
-                return zellij_action("write", "3", session=session)  # Ctrl+C
 
-            interrupt_result = await with_pane_focus(agent.pane_name, do_interrupt, session=session)
+async def _run_script_step(tool: str, step_args: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    """Run a single script step through its tool handler."""
+    handler = TOOL_HANDLERS.get(tool)
+    if tool == "script":
+        return {"success": False, "error": "script steps cannot be nested"}
+    if handler is None:
+        return {"success": False, "error": f"Unknown tool: {tool}"}
+    try:
+        return await handler(step_args, session)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 
-            if interrupt_result.get("success"):
-                with state._lock:
-                    if agent_name in state.spawned_agents:
-                        state.spawned_agents[agent_name].status = "stopped"
-                result = {"success": True, "stopped": agent_name}
+async def _tool_script(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    stop_on_error = arguments.get("stop_on_error", True)
+    plan = []
+    for step in arguments["steps"]:
+        step_args = step.get("args") or {}
+        plan.append((step.get("tool"), step_args, step_args.get("session", session)))
+
+    steps = []
+    all_ok = True
+    i = 0
+    while i < len(plan):
+        tool, step_args, step_session = plan[i]
+        # Gather a run of static actions targeting the same session
+        j = i
+        while j < len(plan) and plan[j][0] in STATIC_ACTIONS and plan[j][2] == step_session:
+            j += 1
+
+        if j - i > 1:
+            batch = await run_zellij_batch(
+                [["action", *STATIC_ACTIONS[plan[k][0]]] for k in range(i, j)], session=step_session
+            )
+            if batch["success"]:
+                done, failed = j - i, None
+            elif "failed_step" in batch:
+                done = batch["failed_step"]
+                failed = {"success": False, "error": f"zellij action {STATIC_ACTIONS[plan[i + done][0]][0]} failed"}
             else:
-                result = interrupt_result
+                # Unknown how far the batch got; report the whole run as failed
+                done, failed = 0, batch
+            results = [{"success": True}] * done
+            if failed is not None:
+                results += [failed] * (1 if "failed_step" in batch else j - i)
+        else:
+            results = [await _run_script_step(tool, step_args, step_session)]
+
+        for offset, step_result in enumerate(results):
+            steps.append({"step": i + offset, "tool": plan[i + offset][0], "result": dict(step_result)})
+        i += len(results)
+        if not results[-1].get("success"):
+            all_ok = False
+            if stop_on_error:
+                break
+    result = {"success": all_ok, "steps": steps}
+    return result
+
+
+async def _tool_batch_actions(arguments: dict[str, Any], session: Optional[str]) -> dict[str, Any]:
+    actions = arguments["actions"]
+    if not actions or not all(a and all(isinstance(x, str) for x in a) for a in actions):
+        result = {"success": False, "error": "actions must be non-empty lists of strings"}
+    else:
+        # Ordered and stops at the first failure, so no gather()
+        result = await run_zellij_batch([["action", *a] for a in actions], session=session)
+    return result
+
+
+TOOL_HANDLERS: dict[str, Callable[[dict[str, Any], Optional[str]], Awaitable[dict[str, Any]]]] = {
+    "new_pane": _tool_new_pane,
+    "close_pane": _tool_close_pane,
+    "focus_pane": _tool_focus_pane,
+    "move_pane": _tool_move_pane,
+    "resize_pane": _tool_resize_pane,
+    "rename_pane": _tool_rename_pane,
+    "stack_panes": _tool_stack_panes,
+    "new_tab": _tool_new_tab,
+    "focus_tab": _tool_focus_tab,
+    "move_tab": _tool_move_tab,
+    "rename_tab": _tool_rename_tab,
+    "query_tab_names": _tool_query_tab_names,
+    "scroll": _tool_scroll,
+    "write_chars": _tool_write_chars,
+    "write_lines": _tool_write_lines,
+    "focus_then_write": _tool_focus_then_write,
+    "read_pane": _tool_read_pane,
+    "list_panes": _tool_list_panes,
+    "focus_pane_by_name": _tool_focus_pane_by_name,
+    "write_to_pane": _tool_write_to_pane,
+    "send_keys": _tool_send_keys,
+    "search_pane": _tool_search_pane,
+    "wait_for_output": _tool_wait_for_output,
+    "wait_for_idle": _tool_wait_for_idle,
+    "tail_pane": _tool_tail_pane,
+    "run_in_pane": _tool_run_in_pane,
+    "create_named_pane": _tool_create_named_pane,
+    "destroy_named_pane": _tool_destroy_named_pane,
+    "list_named_panes": _tool_list_named_panes,
+    "repl_execute": _tool_repl_execute,
+    "repl_interrupt": _tool_repl_interrupt,
+    "ssh_connect": _tool_ssh_connect,
+    "ssh_run": _tool_ssh_run,
+    "job_submit": _tool_job_submit,
+    "job_status": _tool_job_status,
+    "edit_file": _tool_edit_file,
+    "list_sessions": _tool_list_sessions,
+    "list_clients": _tool_list_clients,
+    "session_info": _tool_session_info,
+    "rename_session": _tool_rename_session,
+    "session_map": _tool_session_map,
+    "session_attach": _tool_session_attach,
+    "dump_layout": _tool_dump_layout,
+    "swap_layout": _tool_swap_layout,
+    "switch_mode": _tool_switch_mode,
+    "launch_plugin": _tool_launch_plugin,
+    "pipe": _tool_pipe,
+    "agent_session": _tool_agent_session,
+    "spawn_agents": _tool_spawn_agents,
+    "list_spawned_agents": _tool_list_spawned_agents,
+    "agent_output": _tool_agent_output,
+    "stop_agent": _tool_stop_agent,
+    "script": _tool_script,
+    "batch_actions": _tool_batch_actions,
+    # Fixed-action tools are bound once at import
+    **{tool: partial(_run_static_action, action) for tool, action in STATIC_ACTIONS.items()},
+}
 
+# Tools whose successful output is already plain text; returned as-is
+# instead of being escaped into a JSON string
+RAW_TEXT_TOOLS = {"dump_layout", "list_sessions"}
+
+
+@server.call_tool()
+async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Execute a Zellij control tool."""
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
+        # Bail out before touching the arguments
+        result = {"success": False, "error": "Unknown tool: " + name}
     else:
-        result = {"success": False, "error": f"Unknown tool: {name}"}
+        session = arguments.get("session")  # Session applies to all tools; arguments stay untouched
+        result = await handler(arguments, session)
 
-    return [TextContent(type="text", text=json.dumps(result, indent=2))]
+    if name in RAW_TEXT_TOOLS and result.get("success"):
+        text = result.get("stdout", "")
+    else:
+        text = _dumps(result)
+    # Fields are known-good, so skip pydantic validation on every response
+    return [TextContent.model_construct(type="text", text=text)]
 
 
 async def main():
@@ -3676,4 +4465,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    # uvloop is optional; the stock loop works fine without it
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
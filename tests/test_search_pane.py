@@ -0,0 +1,43 @@
+"""search_pane line matching must agree with a plain per-line regex search."""
+
+import re
+import unittest
+
+try:
+    import server
+except ImportError:  # mcp not installed
+    server = None
+
+
+def per_line(pattern, flags, content):
+    regex = re.compile(pattern, flags)
+    return [(i, line) for i, line in enumerate(content.split('\n')) if regex.search(line)]
+
+
+@unittest.skipIf(server is None, "server dependencies not installed")
+class MatchingLinesTest(unittest.TestCase):
+    CONTENT = "xa\nb\n  a  \nab\n\nqa"
+
+    def check(self, pattern, content=CONTENT):
+        self.assertEqual(
+            server.matching_lines(pattern, re.IGNORECASE, content),
+            per_line(pattern, re.IGNORECASE, content),
+        )
+
+    def test_negative_lookahead_at_end_of_line(self):
+        self.assertEqual(server.matching_lines(r'a(?!\s)', 0, 'xa\nb'), [(0, 'xa')])
+        self.assertEqual(server.matching_lines(r'a(?!\n)', 0, 'xa\nb'), [(0, 'xa')])
+
+    def test_possessive_and_atomic_do_not_swallow_newlines(self):
+        self.check(r'\s++(?:$|z)')
+        self.check(r'(?>\s*)$')
+
+    def test_patterns_agree_with_per_line_search(self):
+        for pattern in ('a', '^a', 'b$', '^$', r'\s+b', r'a\sb', '[^a]', r'\Aa', r'a\Z',
+                        r'(?<=x)a', r'a(?=\s)', 'x*'):
+            with self.subTest(pattern=pattern):
+                self.check(pattern)
+
+
+if __name__ == "__main__":
+    unittest.main()